@@ -108,7 +108,7 @@ def test_CTL(base_tm, cutoff, block_size=1, offset=None, use_backsymbol=True,
     print()
   tape = [None, None]
   for d in range(2):
-    tape[d] = [block.symbol for block in reversed(sim.tape.tape[d]) if block.num != "Inf"]
+    tape[d] = [block.symbol for block in reversed(sim.tape.get_tape()[d]) if block.num != "Inf"]
   config = GenContainer(state=sim.state, dir=sim.dir, tape=tape)
   return CTL(m, config, verbose=verbose)
 
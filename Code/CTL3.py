@@ -100,11 +100,11 @@ def test_CTL(base_tm, cutoff, block_size=1, offset=None, use_backsymbol=True,
   for d in range(2):
     # Pass all symbols from this side of tape except for inf 0s
     # A is the first symbol
-    A = set([sim.tape.tape[d][-1].symbol])
+    A = set([sim.tape.get_tape()[d][-1].symbol])
     # B is set of all other symbols before inf 0s
-    B = set([block.symbol for block in reversed(sim.tape.tape[d][1:-1])])
-    if sim.tape.tape[d][-1].num >= 2 and sim.tape.tape[d][-1] != "Inf":
-      B.add(sim.tape.tape[d][-1].symbol)
+    B = set([block.symbol for block in reversed(sim.tape.get_tape()[d][1:-1])])
+    if sim.tape.get_tape()[d][-1].num >= 2 and sim.tape.get_tape()[d][-1] != "Inf":
+      B.add(sim.tape.get_tape()[d][-1].symbol)
     sets[d] = (A, B)
   config = GenContainer(state=sim.state, dir=sim.dir, init_sets=tuple(sets))
   return CTL(m, config, verbose=verbose)
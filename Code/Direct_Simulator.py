@@ -79,7 +79,7 @@ class DirectTape:
     self._expand_tape()
 
   def copy(self):
-    new_tape = DirectTape(self.init_symbol)
+    new_tape = DirectTape(self.init_symbol.value)
     new_tape.tape = self.tape.copy()
     new_tape.index = self.index
     new_tape.position = self.position
@@ -138,7 +138,8 @@ class DirectSimulator:
   def step(self) -> None:
     if not self.halted:
       state_in = self.state
-      symbol_in = self.tape.read()
+      cell_in = self.tape.read_or_blank()
+      symbol_in = cell_in.value
       trans = self.tm.get_trans_object(symbol_in, state_in)
 
       self.tape.write(trans.symbol_out)
@@ -150,9 +151,23 @@ class DirectSimulator:
         # Record which (state, symbol) -> Halt. Useful while enumerating TMs.
         self.halt_from_state = state_in
         self.halt_from_symbol = symbol_in
+        self.halt_from_cell = cell_in
+        self.halt_dir = trans.dir_out
 
       self.step_num += 1
 
+  def undo_halt(self) -> DirectSimulator:
+    """Return a copy of this (halted) simulator from right before the halting
+    transition was applied."""
+    assert self.halted
+    new_sim = self.copy()
+    new_sim.tape.move(1 - self.halt_dir)
+    new_sim.tape.tape[new_sim.tape.index] = self.halt_from_cell
+    new_sim.state = self.halt_from_state
+    new_sim.halted = False
+    new_sim.step_num -= 1
+    return new_sim
+
   def seek(self, target_step_num : int) -> None:
     while not self.halted and self.step_num < target_step_num:
       self.step()
@@ -7,21 +7,48 @@ Macro Machine simulator, gathers statistics, and outputs all of the machines
 like Generate does.
 """
 
+import itertools
 import pickle as pickle
 import math
-from optparse import OptionParser, OptionGroup
+import multiprocessing
+from optparse import OptionParser, OptionGroup, Values
 import os
+import queue
 import random
+import struct
 import sys
 import time
+import zlib
 
 import IO
-from IO.TM_Record import TM_Record
+from IO.TM_Record import TM_Job, TM_Record
 import Macro_Simulator
+from Macro import Trans_Cache
+import Multiprocessing_Work_Queue
 import TM_Enum
 import Work_Queue
 from Time_Limit import TimeLimit
 
+import io_pb2
+
+
+JOB_HEADER = struct.Struct("<LL?")
+
+def encode_job_bytes(job : TM_Job) -> bytes:
+  """Serialize job for Work_Queue.Spilling_Work_Queue."""
+  return JOB_HEADER.pack(job.num_symbols, job.max_transitions,
+                         job.only_reversible) + job.ttable
+
+def decode_job_bytes(job_bytes : bytes) -> TM_Job:
+  num_symbols, max_transitions, only_reversible = \
+    JOB_HEADER.unpack_from(job_bytes)
+  return TM_Job(job_bytes[JOB_HEADER.size:], num_symbols, max_transitions,
+                only_reversible)
+
+def in_shard(tm_enum : TM_Enum.TM_Enum, options) -> bool:
+  """Is this TM assigned to our shard (--shard)? Decided by hashing the
+  (packed) transition table, so it is the same in every process."""
+  return zlib.crc32(tm_enum.ttable) % options.num_shards == options.shard_index
 
 def long_to_eng_str(number, left, right):
   if number != 0:
@@ -39,8 +66,16 @@ def long_to_eng_str(number, left, right):
   else:
     return "0.%se+00" % ("0" * right)
 
+# Max # TMs deferred by --first-pass-time to keep in memory by default.
+DEFAULT_DEFERRED_IN_MEMORY = 10_000
+
+# Enumerator stats saved in checkpoints.
+CHECKPOINT_STATS = ["tm_num", "num_halt", "num_inf_quasi_unknown",
+                    "num_quasihalt", "num_infinite", "num_unknown",
+                    "num_rescued"]
+
 class Enumerator(object):
-  def __init__(self, options, stack, writer, pout):
+  def __init__(self, options, stack, writer, pout, defer_slow_tms=True):
     self.options = options
 
     # Main TM attributes
@@ -48,11 +83,33 @@ class Enumerator(object):
     self.writer = writer
     self.pout = pout
     self.save_freq = options.save_freq
+    # tm_num at last save(). Start so that we save before the first TM.
+    self.last_saved_tm_num = -self.save_freq
+    self.checkpoint_filename = options.checkpoint
+
+    # Learned filter order (--adaptive-order).
+    self.adaptive_order = None
+    if options.adaptive_order:
+      self.adaptive_order = Macro_Simulator.Adaptive_Order()
 
     # Stack of TM descriptions to simulate
     assert isinstance(stack, Work_Queue.Work_Queue)
     self.stack = stack
 
+    # Time budget for each TM. With --first-pass-time, TMs which time out are
+    # pushed onto `deferred` and re-run with the full --time at the end
+    # (see finish_deferred). Not needed if this Enumerator does not run TMs
+    # itself (`defer_slow_tms` is False).
+    self.time_budget = options.time
+    self.deferred = None
+    if options.first_pass_time and defer_slow_tms:
+      self.time_budget = options.first_pass_time
+      self.deferred = Work_Queue.Spilling_Work_Queue(
+        lifo = True,
+        max_in_memory = options.max_queue_in_memory or DEFAULT_DEFERRED_IN_MEMORY,
+        encode = encode_job_bytes, decode = decode_job_bytes,
+        spill_dir = options.spill_dir)
+
     # If we are randomizing the stack order
     self.randomize = options.randomize
     if self.randomize:
@@ -66,8 +123,13 @@ class Enumerator(object):
     self.num_quasihalt = 0
     self.num_infinite = 0
     self.num_unknown = 0
+    # Number of decided TMs which needed macro transitions retried (or a
+    # smaller block size) after going over --max-steps-per-macro.
+    self.num_rescued = 0
     self.max_sim_time_s = 0.0
     self.start_time = time.time()
+    # Number of input TMs pushed onto the stack so far.
+    self.num_inputs = 0
 
   def continue_enum(self):
     """
@@ -79,47 +141,98 @@ class Enumerator(object):
         self.pout.write("Ran requested number of TMs...\n")
         break
 
+      # Periodically save state (before popping so that all unfinished TMs
+      # are on the stack).
+      self.maybe_save()
+
       # While we have machines to run, pop one off the stack ...
-      tm_record = self.stack.pop_job()
+      job = self.stack.pop_job()
 
-      if not tm_record:
+      if job is None:
         break
+      tm_record = job.to_record()
 
       if self.options.debug_print_current:
         print("----- Debug - Current TM:", tm_record.ttable_str())
         sys.stdout.flush()
 
-      # Periodically save state
-      if (self.tm_num % self.save_freq) == 0:
-        self.save()
-
       # ... and run it.
       start_time = time.time()
 
       time_limit = TimeLimit()
-      time_limit.start(self.options.time)
+      time_limit.start(self.time_budget)
 
       self.run(tm_record, time_limit)
 
+      # Note: Check before cancel() which stops the clock.
+      timed_out = time_limit.timed_out
       time_limit.cancel()
 
       sim_time = time.time() - start_time
       self.max_sim_time_s = max(sim_time, self.max_sim_time_s)
 
-      self.add_result(tm_record)
+      if (self.deferred and self.time_budget != self.options.time and
+          tm_record.is_unknown_halting() and
+          (timed_out or
+           tm_record.proto.filter.simulator.result.unknown_info.HasField("over_time"))):
+        # Ran out of first pass time, try again later with the full time.
+        tm_record.continuation = None
+        self.deferred.push_job(tm_record.to_job())
+      else:
+        self.add_result(tm_record)
 
     # Save any remaining machines on the stack.
     if self.options.num_enum:
-      tm_record = self.stack.pop_job()
-      while tm_record:
+      job = self.stack.pop_job()
+      while job is not None:
         # Empty tm_record (no filter results) indicates that the TM hasn't been run.
-        self.add_result(tm_record)
-        tm_record = self.stack.pop_job()
+        self.add_result(job.to_record())
+        job = self.stack.pop_job()
+
+  def finish_deferred(self, barrier=None):
+    """Re-run all TMs which timed out in the first pass (--first-pass-time)
+    using the full time budget. Call after the rest of the enumeration is done.
+
+    In --workers mode, `barrier` is shared by all workers and the deferred TMs
+    of all workers are put on the shared queue, so that all workers re-run
+    them together."""
+    if self.deferred:
+      self.time_budget = self.options.time
+      if barrier:
+        # Wait until no worker is still in the first pass (and so could pick
+        # up a deferred TM with the first pass time).
+        barrier.wait()
+      job = self.deferred.pop_job()
+      while job is not None:
+        if barrier:
+          self.stack.push_shared_job(job)
+        else:
+          self.stack.push_job(job)
+        job = self.deferred.pop_job()
+      if barrier:
+        # Wait until all deferred TMs are shared (so that no worker finds the
+        # shared queue empty and exits early).
+        barrier.wait()
+      self.continue_enum()
+
+  def close(self):
+    """Delete any TMs deferred (and spilled to disk) by --first-pass-time."""
+    if self.deferred:
+      self.deferred.close()
+
+  def maybe_save(self):
+    """save() if at least save_freq TMs have been recorded since the last
+    save. (tm_num does not advance for deferred or skipped TMs.)"""
+    if self.tm_num - self.last_saved_tm_num >= self.save_freq:
+      self.save()
 
   def save(self):
-    """Write stats."""
+    """Write stats (and checkpoint)."""
+    self.last_saved_tm_num = self.tm_num
     # Actually write to disk.
     self.writer.flush()
+    if self.checkpoint_filename:
+      self.write_checkpoint()
 
     if self.pout:
       # Print out statistical data
@@ -127,19 +240,65 @@ class Enumerator(object):
                       f"halt {self.num_halt:_} (qhalt {self.num_quasihalt:_}) "
                       f"inf {self.num_infinite:_} (qunk {self.num_inf_quasi_unknown:_}) "
                       f"unk {self.num_unknown:_} - "
+                      + (f"rescued {self.num_rescued:_} - "
+                         if self.num_rescued else "")
+                      + (f"deferred {self.deferred.num_jobs:_} - "
+                         if self.deferred else "") +
                       f"max {self.max_sim_time_s * 1000:_.0f}ms / "
                       f"total {time.time() - self.start_time:_.2f}s\n")
+      if self.adaptive_order and self.adaptive_order.num_tms:
+        self.pout.write(f"  {self.adaptive_order}\n")
       self.pout.flush()
 
     # Restart timer and time stats.
     self.start_time = time.time()
     self.max_sim_time_s = 0.0
 
+  def write_checkpoint(self):
+    """Atomically save everything needed to continue this enumeration (see
+    `restore_checkpoint`). Must only be called between TMs (when all
+    unfinished TMs are on the stack)."""
+    checkpoint = {
+      "options": vars(self.options),
+      "outfile_offset": self.writer.sync(),
+      "stack": [Multiprocessing_Work_Queue.encode_job(job)
+                for job in self.stack.list_jobs()],
+      "num_inputs": self.num_inputs,
+      "deferred": ([encode_job_bytes(job)
+                    for job in self.deferred.list_jobs()]
+                   if self.deferred else []),
+      "time_budget": self.time_budget,
+      "random_state": self.random.getstate() if self.randomize else None,
+      "stats": {name: getattr(self, name) for name in CHECKPOINT_STATS},
+    }
+    temp_filename = self.checkpoint_filename + ".tmp"
+    with open(temp_filename, "wb") as outfile:
+      pickle.dump(checkpoint, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+      outfile.flush()
+      os.fsync(outfile.fileno())
+    os.replace(temp_filename, self.checkpoint_filename)
+
+  def restore_checkpoint(self, checkpoint):
+    """Load state saved by `write_checkpoint`."""
+    self.stack.push_jobs([Multiprocessing_Work_Queue.decode_job(job)
+                          for job in checkpoint["stack"]])
+    self.num_inputs = checkpoint["num_inputs"]
+    if self.deferred:
+      self.deferred.push_jobs([decode_job_bytes(job)
+                               for job in checkpoint["deferred"]])
+    self.time_budget = checkpoint["time_budget"]
+    if self.randomize:
+      self.random.setstate(checkpoint["random_state"])
+    for name, value in checkpoint["stats"].items():
+      setattr(self, name, value)
+
   def run(self, tm_record : TM_Record, time_limit=None) -> TM_Record:
     """Simulate TM"""
 
     try:
-      Macro_Simulator.run_options(tm_record, self.options, time_limit)
+      Macro_Simulator.run_options(tm_record, self.options, time_limit,
+                                  self.adaptive_order,
+                                  self.options.resume_children)
 
     except Exception as e:
       print("ERROR: Exception raised while simulating TM:",
@@ -155,24 +314,34 @@ class Enumerator(object):
     assert old_tm_record.is_halting()
     state_in = old_tm_record.proto.status.halt_status.from_state
     symbol_in = old_tm_record.proto.status.halt_status.from_symbol
-    new_tms = [TM_Record(tm_enum = tm_enum) for tm_enum in
-               old_tm_record.tm_enum().enum_children(state_in, symbol_in)]
-
-    if new_tms:
+    children = old_tm_record.tm_enum().enum_children(state_in, symbol_in)
+    if self.options.num_shards:
+      # Each subtree rooted at --shard-depth belongs to only one shard.
+      children = [tm_enum for tm_enum in children
+                  if tm_enum.num_def_trans != self.options.shard_depth or
+                     in_shard(tm_enum, self.options)]
+    # All children share our history up until this undefined transition.
+    continuation = (old_tm_record.continuation
+                    if self.options.resume_children else None)
+    new_jobs = [TM_Job.from_tm_enum(tm_enum, continuation)
+                for tm_enum in children]
+    # We will not need this anymore (free memory).
+    old_tm_record.continuation = None
+
+    if new_jobs:
       if self.randomize:
-        self.random.shuffle(new_tms)
+        self.random.shuffle(new_jobs)
 
-      self.stack.push_jobs(new_tms)
+      self.stack.push_jobs(new_jobs)
 
   def add_result(self, tm_record : TM_Record) -> None:
-    # Update stats
-    self.tm_num += 1
-
-    if tm_record.is_unknown_halting():
-      self.num_unknown += 1
+    # TMs above --shard-depth are simulated by all shards (in order to find
+    # all subtrees), but only written by one.
+    is_output = (not self.options.num_shards or
+                 tm_record.tm_enum().num_def_trans >= self.options.shard_depth or
+                 in_shard(tm_record.tm_enum(), self.options))
 
-    elif tm_record.is_halting():
-      self.num_halt += 1
+    if not tm_record.is_unknown_halting() and tm_record.is_halting():
       # All halting machines (during enumeration) are actually reaching
       # undefined cells.
       # Push all the possible non-halting transitions onto the stack.
@@ -181,6 +350,19 @@ class Enumerator(object):
       # save it as halting below the ttable reflects that.
       tm_record.standardize_halt_trans()
 
+    if is_output:
+      self.record_result(tm_record)
+
+  def record_result(self, tm_record : TM_Record) -> None:
+    """Update stats and write out a finished TM."""
+    self.tm_num += 1
+
+    if tm_record.is_unknown_halting():
+      self.num_unknown += 1
+
+    elif tm_record.is_halting():
+      self.num_halt += 1
+
     elif tm_record.is_unknown_quasihalting():
       self.num_inf_quasi_unknown += 1
 
@@ -190,9 +372,98 @@ class Enumerator(object):
     else:
       self.num_infinite += 1
 
+    sim_result = tm_record.proto.filter.simulator.result
+    if (not tm_record.is_unknown_halting() and
+        (sim_result.num_macro_retries or sim_result.num_block_fallbacks)):
+      self.num_rescued += 1
+
     self.writer.write_record(tm_record)
 
+def run_worker(worker_num, options, stack, result_queue, deferred_barrier):
+  """Main function for worker processes (in --workers mode). Simulate TMs
+  and send results to the writer (main) process."""
+  writer = Multiprocessing_Work_Queue.Result_Writer(result_queue)
+  enumerator = Enumerator(options, stack, writer, pout=None)
+  if enumerator.randomize:
+    # Each worker needs a different (but reproducible) random sequence.
+    enumerator.random.seed(options.seed + worker_num)
+  try:
+    enumerator.continue_enum()
+    enumerator.finish_deferred(deferred_barrier)
+  finally:
+    enumerator.close()
+  # Worker processes do not run atexit handlers.
+  Trans_Cache.flush_all()
+  writer.close()
+
+def enum_parallel(options, writer, pout):
+  """Enumerate using `options.workers` worker processes. This process
+  distributes input TMs and merges all results into `writer`."""
+  context = multiprocessing.get_context()
+  stack = Multiprocessing_Work_Queue.Multiprocessing_Work_Queue.create(context)
+  result_queue = context.Queue()
+  # All workers finish the first pass (--first-pass-time) before re-running
+  # deferred TMs.
+  deferred_barrier = context.Barrier(options.workers)
+  workers = [context.Process(target=run_worker,
+                             args=(i, options, stack, result_queue,
+                                   deferred_barrier))
+             for i in range(options.workers)]
+  for worker in workers:
+    worker.start()
+
+  # Note: This enumerator is only used for writing results and keeping stats.
+  enumerator = Enumerator(options, stack, writer, pout, defer_slow_tms=False)
+  enumerator.save()
+  initial_tms = enum_initial_tms(options)
+  num_running = len(workers)
+  while num_running > 0:
+    # Push input TMs a few at a time so we don't blow up memory if there are a
+    # lot of input machines.
+    if not stack.inputs_done.is_set():
+      while stack.num_unfinished() < 2 * options.workers:
+        tm_record = next(initial_tms, None)
+        if tm_record is None:
+          stack.inputs_done.set()
+          break
+        stack.push_shared_job(tm_record.to_job())
+
+    try:
+      batch = result_queue.get(timeout=1)
+    except queue.Empty:
+      for worker in workers:
+        if worker.exitcode not in (None, 0):
+          raise Exception(f"Worker process failed with exit code {worker.exitcode}")
+      continue
+
+    if batch is None:
+      # This worker has finished.
+      num_running -= 1
+      continue
+
+    for pb_bytes in batch:
+      proto = io_pb2.TMRecord()
+      proto.ParseFromString(pb_bytes)
+      tm_record = TM_Record(proto = proto)
+      enumerator.max_sim_time_s = max(enumerator.max_sim_time_s,
+                                      proto.elapsed_time_us / 1_000_000)
+      enumerator.record_result(tm_record)
+      enumerator.maybe_save()
+
+  for worker in workers:
+    worker.join()
+  return enumerator
+
 def enum_initial_tms(options):
+  for tm_record in enum_all_initial_tms(options):
+    # Input TMs at or below --shard-depth are split between shards. Shallower
+    # ones are filtered by Enumerator.
+    if (not options.num_shards or
+        tm_record.tm_enum().num_def_trans < options.shard_depth or
+        in_shard(tm_record.tm_enum(), options)):
+      yield tm_record
+
+def enum_all_initial_tms(options):
   if options.infilename:
     # Initialize with all machines from infile.
     with IO.Reader(options.infilename) as reader:
@@ -239,6 +510,36 @@ def main(args):
   enum_parser.add_option("--no-first-1rb", dest="first_1rb",
                          action="store_false", default=True,
                          help="Allow first transition to be anything (not just restricted to A1->1RB).")
+  enum_parser.add_option("--workers", type=int, default=1, metavar="N",
+                         help="Number of worker processes to simulate TMs "
+                         "with. Results are all written to OUTFILE by the main "
+                         "process. [Default: %default]")
+  enum_parser.add_option("--no-resume-children", dest="resume_children",
+                         action="store_false", default=True,
+                         help="Simulate each TM from scratch, rather than "
+                         "continuing from where its parent reached the "
+                         "undefined transition (uses less memory).")
+  enum_parser.add_option("--max-queue-in-memory", type=int, metavar="NUM",
+                         help="Keep at most (about) NUM TMs of the work queue "
+                         "in memory, spilling the rest to disk. Useful with "
+                         "--breadth-first. [Default: unlimited]")
+  enum_parser.add_option("--spill-dir", metavar="DIR",
+                         help="Directory to spill work queue to (see "
+                         "--max-queue-in-memory). [Default: system temp dir]")
+  enum_parser.add_option("--first-pass-time", type=float, metavar="SECS",
+                         help="Only give each TM SECS seconds at first. TMs "
+                         "which time out are deferred (spilled to disk if "
+                         "needed) and re-run with the full --time after all "
+                         "other TMs are done (shared by all --workers).")
+  enum_parser.add_option("--shard", metavar="K/N",
+                         help="Only enumerate shard K (0 <= K < N) out of N. "
+                         "Each subtree rooted at a TM with SHARD_DEPTH defined "
+                         "transitions is assigned to one shard (by hash), so "
+                         "N independent runs cover the whole TNF tree (see "
+                         "Merge_Shards.py).")
+  enum_parser.add_option("--shard-depth", type=int, default=5, metavar="SHARD_DEPTH",
+                         help="Number of defined transitions at which to split "
+                         "the TNF tree into shards. [Default: %default]")
   enum_parser.add_option("--debug-print-current", dest="debug_print_current", action="store_true", default=False)
 
   # TM model restrictions.
@@ -264,11 +565,36 @@ def main(args):
   out_parser.add_option("--force", action="store_true", default=False,
                         help="Force overwriting outfile (don't ask).")
   out_parser.add_option("--save-freq", type=int, default=100_000, metavar="FREQ",
-                        help="Freq to save output and write stats [Default: %default]")
+                        help="Freq to save output, write stats and checkpoint "
+                        "[Default: %default]")
+  out_parser.add_option("--background-write", action="store_true",
+                        default=False,
+                        help="Write OUTFILE (and gzip compress) on a "
+                        "background thread, overlapping it with simulation. "
+                        "Ignored with --workers (the main process already "
+                        "only writes).")
+  out_parser.add_option("--checkpoint", metavar="CHECKPOINT",
+                        help="Periodically (every FREQ TMs) save enumeration "
+                        "state to this file so that it can be continued with "
+                        "--resume.")
+  out_parser.add_option("--resume", metavar="CHECKPOINT",
+                        help="Continue the enumeration saved in CHECKPOINT "
+                        "(using the options it was started with). OUTFILE is "
+                        "truncated to the last checkpoint.")
   parser.add_option_group(out_parser)
 
   (options, args) = parser.parse_args(args)
 
+  checkpoint = None
+  if options.resume:
+    with open(options.resume, "rb") as infile:
+      checkpoint = pickle.load(infile)
+    resume_filename = options.resume
+    options = Values(checkpoint["options"])
+    options.resume = resume_filename
+    # Keep checkpointing to the same file.
+    options.checkpoint = resume_filename
+
   ## Set complex defaults
   if options.randomize and not options.seed:
     options.seed = int(1000*time.time())
@@ -276,6 +602,24 @@ def main(args):
   if not options.outfilename:
     parser.error("--outfile is required")
 
+  if options.workers > 1 and (options.breadth_first or options.num_enum or
+                              options.checkpoint or options.max_queue_in_memory):
+    parser.error("--breadth-first, --num-enum, --checkpoint and "
+                 "--max-queue-in-memory only work with --workers=1")
+
+  options.num_shards = None
+  if options.shard:
+    try:
+      options.shard_index, options.num_shards = (
+        int(x) for x in options.shard.split("/"))
+    except ValueError:
+      parser.error(f"Invalid --shard={options.shard} (expected K/N)")
+    if not 0 <= options.shard_index < options.num_shards:
+      parser.error(f"Invalid --shard={options.shard} (need 0 <= K < N)")
+
+  if options.checkpoint and options.outfilename.endswith(".gz"):
+    parser.error("--checkpoint does not support gzipped OUTFILE")
+
   pout = None
   if not options.no_output:
     pout = sys.stdout
@@ -284,27 +628,58 @@ def main(args):
     options.max_block_size = 5
 
   # Set up work queue and populate with blank machine.
-  if options.breadth_first:
+  if options.max_queue_in_memory:
+    stack = Work_Queue.Spilling_Work_Queue(
+      lifo = not options.breadth_first,
+      max_in_memory = options.max_queue_in_memory,
+      encode = encode_job_bytes, decode = decode_job_bytes,
+      spill_dir = options.spill_dir)
+  elif options.breadth_first:
     stack = Work_Queue.Basic_FIFO_Work_Queue()
   else:
     stack = Work_Queue.Basic_LIFO_Work_Queue()
 
   # Set up output
-  if os.path.exists(options.outfilename) and not options.force:
+  if options.background_write and options.workers == 1:
+    writer_class = IO.Proto.Background_Writer
+  else:
+    writer_class = IO.Proto.Writer
+  if checkpoint:
+    writer = writer_class(options.outfilename,
+                          resume_offset = checkpoint["outfile_offset"])
+  elif os.path.exists(options.outfilename) and not options.force:
     parser.error("Output file already exits. Delete or use --force")
+  else:
+    writer = writer_class(options.outfilename)
+
+  with writer, stack:
+    if options.workers > 1:
+      enumerator = enum_parallel(options, writer, pout)
+      enumerator.save()
+      return
 
-  with IO.Proto.Writer(options.outfilename) as writer:
     ## Enumerate machines
     enumerator = Enumerator(options, stack, writer, pout)
-
-    # Push input TMs one at a time so we don't blow up memory if there are a
-    # lot of input machines.
-    for tm_record in enum_initial_tms(options):
-      stack.push_job(tm_record)
-      enumerator.continue_enum()
-
-    # Done
-    enumerator.save()
+    try:
+      if checkpoint:
+        enumerator.restore_checkpoint(checkpoint)
+        enumerator.continue_enum()
+
+      # Push input TMs one at a time so we don't blow up memory if there are
+      # a lot of input machines.
+      for tm_record in itertools.islice(enum_initial_tms(options),
+                                        enumerator.num_inputs, None):
+        enumerator.num_inputs += 1
+        stack.push_job(tm_record.to_job())
+        enumerator.continue_enum()
+      enumerator.finish_deferred()
+
+      # Done
+      enumerator.save()
+    finally:
+      enumerator.close()
+    if pout:
+      stack.print_stats()
 
 if __name__ == "__main__":
   main(sys.argv[1:])
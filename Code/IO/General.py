@@ -41,12 +41,15 @@ def Reader(source : Path | str | TextIO):
     mod = IO.StdText
   return mod.Reader(source)
 
-def Writer(source : Path | str | TextIO):
+def Writer(source : Path | str | TextIO, *, background : bool = False):
+  """If `background`, use IO.Proto.Background_Writer for proto output."""
   if isinstance(source, (Path, str)):
     mod = guess_module(source)
   else:
     # If source is a file object, we can't guess the module, so default to StdText.
     mod = IO.StdText
+  if background and mod is IO.Proto:
+    return IO.Proto.Background_Writer(source)
   return mod.Writer(source)
 
 def load_tm(filename : Path, record_num : int) -> Turing_Machine.Simple_Machine:
@@ -10,8 +10,11 @@ Protobuffers are written using custom length-delimed sequential format. See ex:
 
 import gzip
 import io
+import os
 from pathlib import Path
+import queue
 import struct
+import threading
 
 from IO.Common import RecordLocateError
 from IO.TM_Record import TM_Record
@@ -22,15 +25,44 @@ import io_pb2
 class IO_Error(Exception): pass
 
 
+def encode_record(tm_record : TM_Record) -> bytes:
+  """Serialize TMRecord protobuf using length-delimited format."""
+  # Serialize the protobuf into a bytes object
+  pb_bytes = tm_record.proto.SerializeToString()
+
+  # Serialize length of pb_bytes.
+  #   Use fixed 4 byte (L), little endian (<) encoding for this length.
+  #   Note: 4 bytes limits us to 4GB for a single tm_record, which is
+  #         twice the maximum possible Protobuf size.
+  #   Note: We could consider using varint which would allow us to only use
+  #         1 byte for pbs < 128 bytes, and 2 for < 16KB. But, unless
+  #         protobufs are really small, this might not make a huge difference.
+  len_bytes = struct.pack("<L", len(pb_bytes))
+
+  # Size followed by message
+  return len_bytes + pb_bytes
+
+
 class Writer:
-  """Class to manage writing TMRecords to a file."""
-  def __init__(self, outfilename : Path):
+  """Class to manage writing TMRecords to a file.
+
+  If `resume_offset` is set, the existing file is truncated to that many bytes
+  and new records are appended after it (Ex: when resuming from a checkpoint).
+  """
+  def __init__(self, outfilename : Path, resume_offset : int | None = None):
     self.outfilename = Path(outfilename)
+    self.resume_offset = resume_offset
     self.outfile = None
 
   def __enter__(self):
     if ".gz" in self.outfilename.suffixes:
+      if self.resume_offset is not None:
+        raise IO_Error("Cannot resume writing to a gzip file.")
       self.outfile = gzip.open(self.outfilename, "wb")
+    elif self.resume_offset is not None:
+      self.outfile = open(self.outfilename, "r+b")
+      self.outfile.truncate(self.resume_offset)
+      self.outfile.seek(self.resume_offset)
     else:
       self.outfile = open(self.outfilename, "wb")
     return self
@@ -41,25 +73,114 @@ class Writer:
 
   def write_record(self, tm_record : TM_Record) -> None:
     """Write TMRecord protobuf using length-delimited format."""
-    # Serialize the protobuf into a bytes object
-    pb_bytes = tm_record.proto.SerializeToString()
-
-    # Serialize length of pb_bytes.
-    #   Use fixed 4 byte (L), little endian (<) encoding for this length.
-    #   Note: 4 bytes limits us to 4GB for a single tm_record, which is
-    #         twice the maximum possible Protobuf size.
-    #   Note: We could consider using varint which would allow us to only use
-    #         1 byte for pbs < 128 bytes, and 2 for < 16KB. But, unless
-    #         protobufs are really small, this might not make a huge difference.
-    len_bytes = struct.pack("<L", len(pb_bytes))
-
-    # Write size followed by message
-    self.outfile.write(len_bytes)
-    self.outfile.write(pb_bytes)
+    self.outfile.write(encode_record(tm_record))
 
   def flush(self):
     self.outfile.flush()
 
+  def sync(self) -> int:
+    """Flush all records to disk. Returns the current file size (in bytes)."""
+    self.outfile.flush()
+    os.fsync(self.outfile.fileno())
+    return self.outfile.tell()
+
+
+class Background_Writer(Writer):
+  """Writer which writes to disk (and gzip compresses) on a background
+  thread, so that output overlaps with simulation.
+
+  Records are serialized immediately (so callers may modify them afterwards)
+  and handed to the thread in batches through a bounded queue. If the thread
+  falls behind, write_record() blocks (backpressure). `flush()` does not wait
+  for the thread, `sync()` and closing do. Any exception raised in the
+  thread is re-raised in the caller on the next call.
+  """
+  # Number of records per batch sent to the background thread.
+  BATCH_SIZE = 256
+  # Max number of batches waiting to be written.
+  MAX_BATCHES = 64
+
+  # Queue markers (sent instead of a batch).
+  _FLUSH = "flush"
+  _CLOSE = "close"
+
+  def __init__(self, outfilename : Path, resume_offset : int | None = None):
+    super().__init__(outfilename, resume_offset)
+    self.batch = []
+    self.queue = None
+    self.thread = None
+    self.error = None
+
+  def __enter__(self):
+    super().__enter__()
+    self.queue = queue.Queue(maxsize = self.MAX_BATCHES)
+    self.thread = threading.Thread(target = self._write_loop, daemon = True,
+                                   name = f"Writer({self.outfilename})")
+    self.thread.start()
+    return self
+
+  def __exit__(self, exc_type, *args):
+    try:
+      if exc_type is None:
+        self._put_batch()
+    finally:
+      # Always stop the thread (even if interrupted above) before closing the
+      # file it writes to.
+      try:
+        self.queue.put(self._CLOSE)
+        self.thread.join()
+      finally:
+        super().__exit__(exc_type, *args)
+    if exc_type is None:
+      self._check_error()
+
+  def _write_loop(self):
+    while True:
+      item = self.queue.get()
+      try:
+        if item is self._CLOSE:
+          return
+        # After an error, keep draining the queue so that callers never block.
+        if self.error is None:
+          if item is self._FLUSH:
+            self.outfile.flush()
+          else:
+            self.outfile.write(b"".join(item))
+      except BaseException as e:
+        self.error = e
+      finally:
+        self.queue.task_done()
+
+  def _check_error(self):
+    if self.error is not None:
+      raise IO_Error(f"Background write to {self.outfilename} failed: "
+                     f"{self.error!r}") from self.error
+
+  def _put_batch(self):
+    self._check_error()
+    if self.batch:
+      self.queue.put(self.batch)
+      self.batch = []
+
+  def write_record(self, tm_record : TM_Record) -> None:
+    self.batch.append(encode_record(tm_record))
+    if len(self.batch) >= self.BATCH_SIZE:
+      self._put_batch()
+
+  def flush(self):
+    """Hand all pending records to the background thread and ask it to flush
+    them to the OS (does not wait)."""
+    self._put_batch()
+    self.queue.put(self._FLUSH)
+
+  def sync(self) -> int:
+    """Wait for all records to be written and flushed to disk. Returns the
+    current file size (in bytes)."""
+    self._put_batch()
+    self.queue.join()
+    self._check_error()
+    return super().sync()
+
 
 class Reader:
   """Class to manage reading TMRecords from a file."""
@@ -1,6 +1,7 @@
 import ctypes
 import string
 import sys
+from typing import NamedTuple
 
 import TM_Enum
 
@@ -152,6 +153,43 @@ def write_tm(tm : Turing_Machine.Simple_Machine, proto_tm : io_pb2.TuringMachine
   else:
     tm_to_list(tm, proto_tm.ttable_list)
 
+def write_tm_enum(tm_enum : TM_Enum.TM_Enum, proto_tm : io_pb2.TuringMachine):
+  """Equivalent to write_tm(tm_enum.tm, proto_tm), but packs directly from
+  tm_enum's transition table (without building the Simple_Machine)."""
+  if tm_enum.num_states < 7 and tm_enum.num_symbols < 7:
+    num_symbols = tm_enum.num_symbols
+    proto_tm.ttable_packed = bytes(
+      _pack_trans_ints(symbol, dir, state, is_newrow = (i % num_symbols == 0))
+      for i, (symbol, dir, state) in enumerate(tm_enum.iter_trans_ints()))
+  else:
+    tm_to_list(tm_enum.tm, proto_tm.ttable_list)
+
+
+class TM_Job(NamedTuple):
+  """Compact form of a TM_Record which has not been simulated yet: just the
+  packed transition table (TM_Enum.ttable) and enumeration flags. Used as the
+  entry type in enumeration work queues so that deep stacks don't hold a
+  protobuf and TM_Enum for every pending TM."""
+  ttable : bytes
+  num_symbols : int
+  max_transitions : int
+  only_reversible : bool
+  # See TM_Record.continuation. Only kept in memory (never serialized).
+  continuation : object = None
+
+  @staticmethod
+  def from_tm_enum(tm_enum : TM_Enum.TM_Enum, continuation=None) -> "TM_Job":
+    return TM_Job(bytes(tm_enum.ttable), tm_enum.num_symbols,
+                  tm_enum.max_transitions, tm_enum.only_reversible,
+                  continuation)
+
+  def to_record(self) -> "TM_Record":
+    tm_record = TM_Record(tm_enum = TM_Enum.TM_Enum.from_ttable(
+      self.ttable, self.num_symbols, max_transitions = self.max_transitions,
+      only_reversible = self.only_reversible))
+    tm_record.continuation = self.continuation
+    return tm_record
+
 
 class TM_Record:
   """Collection of TM (TM_Enum) and results (io_pb2.TMRecord)."""
@@ -167,10 +205,14 @@ class TM_Record:
       # Don't create TM unless needed (by calling tm_enum() or tm() below.)
       self.tme = None
 
+    # State of parent TM (during enumeration) which we can continue
+    # simulating from. See Macro_Simulator.Continuation.
+    self.continuation = None
+
 
   def update_tm(self, tm_enum : TM_Enum.TM_Enum) -> None:
     self.tme = tm_enum
-    write_tm(self.tme.tm, self.proto.tm)
+    write_tm_enum(self.tme, self.proto.tm)
 
   def tm_enum(self):
     if not self.tme:
@@ -182,6 +224,10 @@ class TM_Record:
   def tm(self):
     return self.tm_enum().tm
 
+  def to_job(self) -> TM_Job:
+    """Compact version of this TM for work queues (drops all results)."""
+    return TM_Job.from_tm_enum(self.tm_enum(), self.continuation)
+
   def ttable_str(self) -> str:
     return self.tm().ttable_str()
 
@@ -198,7 +244,7 @@ class TM_Record:
     self.tme.set_halt_trans(
       state_in = self.proto.status.halt_status.from_state,
       symbol_in = self.proto.status.halt_status.from_symbol)
-    write_tm(self.tme.tm, self.proto.tm)
+    write_tm_enum(self.tme, self.proto.tm)
 
 
   def is_unknown_halting(self):
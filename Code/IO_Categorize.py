@@ -1,6 +1,7 @@
 #! /usr/bin/env python3
 
 import argparse
+import contextlib
 from pathlib import Path
 
 import Halting_Lib
@@ -19,7 +20,7 @@ class OutputFiles:
 
   def __enter__(self):
     for type in ["halt", "qhalt", "infinite", "unknown"]:
-      self.writer[type] = IO.Proto.Writer(Path(self.dir, f"{type}.pb"))
+      self.writer[type] = IO.Proto.Background_Writer(Path(self.dir, f"{type}.pb"))
       self.writer[type].__enter__()
     return self
 
@@ -70,25 +71,26 @@ def categorize(infilenames, outdir):
 
 def split_unknown(infilenames: list[Path], outdir: Path) -> None:
   out = {
-    "over_loops": IO.Proto.Writer(outdir / "unknown_over_loops.pb"),
-    "over_tape": IO.Proto.Writer(outdir / "unknown_over_tape.pb"),
-    "over_time": IO.Proto.Writer(outdir / "unknown_over_time.pb"),
-    "over_steps_in_macro": IO.Proto.Writer(outdir / "unknown_over_steps_in_macro.pb"),
-    "threw_exception": IO.Proto.Writer(outdir / "unknown_threw_exception.pb"),
+    "over_loops": IO.Proto.Background_Writer(outdir / "unknown_over_loops.pb"),
+    "over_tape": IO.Proto.Background_Writer(outdir / "unknown_over_tape.pb"),
+    "over_time": IO.Proto.Background_Writer(outdir / "unknown_over_time.pb"),
+    "over_steps_in_macro": IO.Proto.Background_Writer(outdir / "unknown_over_steps_in_macro.pb"),
+    "threw_exception": IO.Proto.Background_Writer(outdir / "unknown_threw_exception.pb"),
   }
-  for writer in out.values():
-    writer.__enter__()
-  num_written = 0
-  for infilename in infilenames:
-    with IO.Proto.Reader(infilename) as reader:
-      for tm_record in reader:
-        reason = tm_record.proto.filter.simulator.result.unknown_info.WhichOneof("reason")
-        if reason:
-          out[reason].write_record(tm_record)
-          num_written += 1
-          if num_written % 1_000_000 == 0:
-            print(f" ... categorized {num_written:_} records ...")
-    print(f"Categorized {num_written:_} records total")
+  with contextlib.ExitStack() as stack:
+    for writer in out.values():
+      stack.enter_context(writer)
+    num_written = 0
+    for infilename in infilenames:
+      with IO.Proto.Reader(infilename) as reader:
+        for tm_record in reader:
+          reason = tm_record.proto.filter.simulator.result.unknown_info.WhichOneof("reason")
+          if reason:
+            out[reason].write_record(tm_record)
+            num_written += 1
+            if num_written % 1_000_000 == 0:
+              print(f" ... categorized {num_written:_} records ...")
+      print(f"Categorized {num_written:_} records total")
 
 def main():
   parser = argparse.ArgumentParser()
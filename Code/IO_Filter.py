@@ -15,7 +15,7 @@ def filter(infilenames, outfilename):
   start_time = time.time()
   num_records_read = 0
   num_records_written = 0
-  with IO.Proto.Writer(outfilename) as writer:
+  with IO.Proto.Background_Writer(outfilename) as writer:
     for infilename in infilenames:
       try:
         with IO.Reader(infilename) as reader:
@@ -3,7 +3,10 @@
 Search for Lin Recurrence (as discussed in https://nickdrozd.github.io/2021/02/24/lin-recurrence-and-lins-algorithm.html)
 """
 
+from __future__ import annotations
+
 import argparse
+import copy
 
 import Direct_Simulator
 import Halting_Lib
@@ -34,76 +37,124 @@ def are_sections_equal(start_tape, end_tape, most_left_pos, most_right_pos, offs
       return False
   return True
 
+class Lin_Recur_Search:
+  """In-progress state of a lin_detect_not_min() search.
+
+  While enumerating, a TM that reaches an undefined transition has the exact
+  same history as all of its children up to that point. So we save the search
+  state right before that transition (see `copy()`) and children resume from
+  there instead of starting over.
+  """
+  def __init__(self, tm : Turing_Machine.Simple_Machine):
+    self.sim = Direct_Simulator.DirectSimulator(tm)
+    self.states_last_seen = {self.sim.state: self.sim.step_num}
+    self.sim.step()
+    # No Brent segment started yet (see start_segment()).
+    self.steps_reset = 0
+
+  def start_segment(self) -> None:
+    """Start a new segment of Brent's algorithm at the current step."""
+    sim = self.sim
+    self.init_step_num = sim.step_num
+    self.steps_reset = 2 * self.init_step_num
+    self.init_pos = sim.tape.position
+    self.most_left_pos = self.most_right_pos = self.init_pos
+    self.init_state = sim.state
+    self.init_tape = sim.tape.copy()
+
+  def states_used(self) -> set:
+    """States seen since the start of the current segment."""
+    return {state for state, last_seen in self.states_last_seen.items()
+            if last_seen >= self.init_step_num}
+
+  def copy(self, tm : Turing_Machine.Simple_Machine) -> Lin_Recur_Search:
+    """Copy of this search which continues by simulating `tm`."""
+    new_search = copy.copy(self)
+    new_search.sim = self.sim.copy()
+    new_search.sim.tm = tm
+    new_search.states_last_seen = dict(self.states_last_seen)
+    # Note: init_tape is never modified, so it can be shared.
+    return new_search
+
 def lin_detect_not_min(tm : Turing_Machine.Simple_Machine,
                        max_steps : int,
                        result : io_pb2.LinRecurFilterResult,
-                       bb_status : io_pb2.BBStatus) -> None:
+                       bb_status : io_pb2.BBStatus,
+                       resume_from : Lin_Recur_Search | None = None,
+                       ) -> Lin_Recur_Search | None:
   """Detect Lin Recurrence without knowing the period or start time.
   The result is a point at which it is in Lin Recurrence, not necessarily the
-  time that it has started LR."""
-  sim = Direct_Simulator.DirectSimulator(tm)
-  states_last_seen = {sim.state: sim.step_num}
-  sim.step()
+  time that it has started LR.
 
-  while (not max_steps or sim.step_num < max_steps) and not result.success:
+  If `resume_from` is set, continue that search (which must be from a TM
+  identical to `tm` except for the undefined transition it stopped at).
+  If the TM reaches an undefined transition, returns the search state right
+  before that transition (for children to resume from)."""
+  if resume_from:
+    search = resume_from.copy(tm)
+  else:
+    search = Lin_Recur_Search(tm)
+  sim = search.sim
+  states_last_seen = search.states_last_seen
+
+  while not result.success:
     # Brent's algorithm for loop detection:
     #   Instead of comparing each config to all previous configs, we try at one
     #   starting steps up til 2x those steps. Then fix at 2x and repeat.
     #   Thus instead of doing N^2 tape comparisons, we do N.
     #   This works because once the TM repeats, it will keep repeating forever!
-    init_step_num = sim.step_num
-    steps_reset = 2 * init_step_num
-    init_pos = sim.tape.position
-    most_left_pos = most_right_pos = init_pos
-    init_state = sim.state
-    init_tape = sim.tape.copy()
-    states_used = set()
-    while sim.step_num < steps_reset and not result.success:
-      states_last_seen[sim.state] = sim.step_num
-      states_used.add(sim.state)
-      sim.step()
-      if sim.halted:
-        # If a machine halts, it will never Lin Recur.
-        result.success = False
-        # NOTE: We do not currently evaluate `halt_score`
-        Halting_Lib.set_halting(bb_status,
-                                halt_steps = sim.step_num,
-                                halt_score = sim.halt_score,
-                                from_state = sim.halt_from_state,
-                                from_symbol = sim.halt_from_symbol)
-        return
-
-      most_left_pos = min(most_left_pos, sim.tape.position)
-      most_right_pos = max(most_right_pos, sim.tape.position)
-      if sim.state == init_state:
-        offset = sim.tape.position - init_pos
-        if offset > 0:  # Right
-          if are_half_tapes_equal(init_tape, most_left_pos,
-                                  sim.tape, most_left_pos + offset, dir_offset=+1):
-            result.success = True
-        elif offset < 0:  # Left
-          if are_half_tapes_equal(init_tape, most_right_pos,
-                                  sim.tape, most_right_pos + offset, dir_offset=-1):
-            result.success = True
-        else:  # In place
-          if are_sections_equal(init_tape, sim.tape,
-                                most_left_pos, most_right_pos, offset):
-            result.success = True
+    if sim.step_num >= search.steps_reset:
+      if max_steps and sim.step_num >= max_steps:
+        break
+      search.start_segment()
+
+    states_last_seen[sim.state] = sim.step_num
+    sim.step()
+    if sim.halted:
+      # Save search state from right before the halting transition.
+      snapshot = search.copy(tm)
+      snapshot.sim = sim.undo_halt()
+      # If a machine halts, it will never Lin Recur.
+      result.success = False
+      # NOTE: We do not currently evaluate `halt_score`
+      Halting_Lib.set_halting(bb_status,
+                              halt_steps = sim.step_num,
+                              halt_score = sim.halt_score,
+                              from_state = sim.halt_from_state,
+                              from_symbol = sim.halt_from_symbol)
+      return snapshot
+
+    search.most_left_pos = min(search.most_left_pos, sim.tape.position)
+    search.most_right_pos = max(search.most_right_pos, sim.tape.position)
+    if sim.state == search.init_state:
+      offset = sim.tape.position - search.init_pos
+      if offset > 0:  # Right
+        if are_half_tapes_equal(search.init_tape, search.most_left_pos,
+                                sim.tape, search.most_left_pos + offset, dir_offset=+1):
+          result.success = True
+      elif offset < 0:  # Left
+        if are_half_tapes_equal(search.init_tape, search.most_right_pos,
+                                sim.tape, search.most_right_pos + offset, dir_offset=-1):
+          result.success = True
+      else:  # In place
+        if are_sections_equal(search.init_tape, sim.tape,
+                              search.most_left_pos, search.most_right_pos, offset):
+          result.success = True
 
   if result.success:
-    result.start_step = init_step_num
-    result.period = sim.step_num - init_step_num
+    result.start_step = search.init_step_num
+    result.period = sim.step_num - search.init_step_num
     result.offset = offset
     Halting_Lib.set_inf_recur(bb_status,
-                              states_to_ignore = states_used,
+                              states_to_ignore = search.states_used(),
                               states_last_seen = states_last_seen)
     Halting_Lib.set_not_halting(bb_status, io_pb2.INF_LIN_RECUR)
-    return
+    return None
   else:
-    assert sim.step_num == steps_reset, (sim.step_num, steps_reset)
+    assert sim.step_num == search.steps_reset, (sim.step_num, search.steps_reset)
     result.success = False
     # We have no information on halt_status or quasihalt_status.
-    return
+    return None
 
 
 def check_recur(tm : Turing_Machine.Simple_Machine, init_step, period):
@@ -161,12 +212,17 @@ def period_search(tm : Turing_Machine.Simple_Machine, init_step, period):
 
 def filter(tm : Turing_Machine.Simple_Machine,
            lr_info : io_pb2.LinRecurFilterInfo,
-           bb_status : io_pb2.BBStatus) -> None:
+           bb_status : io_pb2.BBStatus,
+           resume_from : Lin_Recur_Search | None = None,
+           ) -> Lin_Recur_Search | None:
   """Applies Lin Recur filter to `tm` using `params`.
-  The results are stored in `result`."""
+  The results are stored in `result`.
+
+  Returns search state before undefined transition (see lin_detect_not_min)."""
   with IO.Timer(lr_info.result):
-    lin_detect_not_min(tm, max_steps=lr_info.parameters.max_steps,
-                       result=lr_info.result, bb_status=bb_status)
+    snapshot = lin_detect_not_min(tm, max_steps=lr_info.parameters.max_steps,
+                                  result=lr_info.result, bb_status=bb_status,
+                                  resume_from=resume_from)
     if lr_info.result.success and lr_info.parameters.find_min_start_step:
       # NOTE: lr_info.result.start_step is not necessarily the earliest time that
       # recurrence starts, it is simply a time after which recurrence is in effect.
@@ -175,6 +231,7 @@ def filter(tm : Turing_Machine.Simple_Machine,
       # earliest start time of the recurrence.
       lr_info.result.start_step = period_search(tm, lr_info.result.start_step,
                                                 lr_info.result.period)
+  return snapshot
 
 
 def main():
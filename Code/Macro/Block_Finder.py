@@ -6,10 +6,15 @@ Search for a good block size for the TM simulator.
 """
 
 
+import array
+import atexit
+import concurrent.futures
 import copy
 import math
+import multiprocessing
 import optparse
 from optparse import OptionParser, OptionGroup
+import os
 import sys
 import time
 
@@ -44,9 +49,74 @@ def add_option_group(parser : OptionParser):
                    "block finder. "
                    "[Default: %default]")
 
+  group.add_option("--block-finder-workers", type=int, default=1, metavar="N",
+                   help="Try block multiples in N processes in parallel. "
+                   "[Default: %default]")
+
   parser.add_option_group(group)
 
 
+# One (process pool, trial_set) per (process, number of workers).
+# `trial_set` is a counter shared with the worker processes. Each
+# block_finder() call increments it and its trials give up once it has
+# changed (their results are no longer needed).
+_pools = {}
+# The shared counter (in worker processes).
+_trial_set = None
+# Trials check whether they are still needed every this many loops.
+TRIAL_CHECK_LOOPS = 100
+
+def _init_worker(trial_set) -> None:
+  global _trial_set
+  _trial_set = trial_set
+
+def get_pool(num_workers : int):
+  """Returns (pool, trial_set) for `num_workers` workers."""
+  key = (os.getpid(), num_workers)
+  if key not in _pools:
+    context = multiprocessing.get_context()
+    trial_set = context.RawValue("q", 0)
+    pool = concurrent.futures.ProcessPoolExecutor(
+      num_workers, mp_context=context,
+      initializer=_init_worker, initargs=(trial_set,))
+    _pools[key] = (pool, trial_set)
+  return _pools[key]
+
+def shutdown_pools() -> None:
+  """Stop all trials and worker processes started by this process."""
+  pid = os.getpid()
+  for key in [key for key in _pools if key[0] == pid]:
+    pool, trial_set = _pools.pop(key)
+    trial_set.value += 1
+    pool.shutdown(wait=True, cancel_futures=True)
+
+atexit.register(shutdown_pools)
+
+def mult_trial(machine : Turing_Machine.Turing_Machine, block_size : int,
+               options : optparse.Values, num_loops : int,
+               trial_set : int = None):
+  """Simulate `machine` with block size `block_size` for `num_loops`.
+  Returns (stopped, chain_factor) where `stopped` means that the simulation
+  stopped running (and so this is a good block size).
+
+  In a worker process, `trial_set` is the value of the shared counter for
+  this trial. Returns None early if the counter changes."""
+  block_machine = Turing_Machine.Block_Macro_Machine(machine, block_size)
+  back_machine = Turing_Machine.Backsymbol_Macro_Machine(block_machine)
+  sim = Simulator(back_machine, options)
+  if trial_set is None:
+    sim.loop_seek(num_loops)
+  else:
+    while (sim.num_loops < num_loops and
+           sim.op_state == Turing_Machine.RUNNING):
+      if _trial_set.value != trial_set:
+        return None
+      sim.loop_seek(min(num_loops, sim.num_loops + TRIAL_CHECK_LOOPS))
+  if sim.op_state != Turing_Machine.RUNNING:
+    return True, None
+  return False, sim.steps_from_chain / sim.steps_from_macro
+
+
 def block_finder(machine : Turing_Machine.Turing_Machine,
                  options : optparse.Values,
                  params : io_pb2.BlockFinderParams,
@@ -62,6 +132,11 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
     new_options.compute_steps = True  # Even if --no-steps, we need steps here.
     new_options.prover = False
     new_options.verbose_simulator = False
+    new_options.reblock_loops = 0
+    new_options.block_fallback = False
+    if options.prover:
+      # Periodic chain moves are only used without the prover.
+      new_options.max_chain_period = 1
 
     if options.verbose_block_finder:
       print("BF: Searching for optimal block size")
@@ -71,14 +146,20 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
 
       ## Find the least compressed time in before limit
       # Run sim to find when the tape is least compressed with macro size 1
-      max_length = len(sim.tape.tape[0]) + len(sim.tape.tape[1])
+      max_length = sim.tape.compressed_size()
       worst_loop = 0
+      worst_tape = snapshot_tape(sim.tape)
+      worst_step_num = 0
       for i in range(params.compression_search_loops):
         sim.step()
-        tape_length = len(sim.tape.tape[0]) + len(sim.tape.tape[1])
+        tape_length = sim.tape.compressed_size()
         if tape_length > max_length:
           max_length = tape_length
           worst_loop = sim.num_loops
+          # Note: Each new max is longer, so we take at most max_length
+          # snapshots.
+          worst_tape = snapshot_tape(sim.tape)
+          worst_step_num = sim.step_num
         # If it has stopped running then this is a good block size!
         if sim.op_state != Turing_Machine.RUNNING:
           result.best_block_size = 1
@@ -87,22 +168,17 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
       result.least_compressed_loop = worst_loop
       result.least_compressed_tape_size_chain = max_length
 
-      # TODO: Instead of re-seeking, keep going till next bigger tape?
-      sim = Simulator(machine, new_options)
-      sim.loop_seek(worst_loop)
-      assert len(sim.tape.tape[0]) + len(sim.tape.tape[1]) == max_length
-
       # Analyze this time to see which block size provides greatest compression
-      tape = uncompress_tape(sim.tape.tape)
-      result.least_compressed_tape_size_raw = len(tape)
+      tape = Tape_Hashes(tape_runs(worst_tape))
+      result.least_compressed_tape_size_raw = tape.length
 
       if options.verbose_block_finder:
-        tape_str = "".join(str(symb) for symb in tape)
-        print("BF: Least compressed tape at step", sim.step_num, ":", tape_str)
+        tape_str = "".join(str(symb) for symb in uncompress_tape(worst_tape))
+        print("BF: Least compressed tape at step", worst_step_num, ":", tape_str)
 
-      min_compr = len(tape) + 1 # Worse than no compression
+      min_compr = tape.length + 1 # Worse than no compression
       opt_size = 1
-      for block_size in range(1, len(tape)//2):
+      for block_size in range(1, tape.length//2):
         compr_size = compression_efficiency(tape, block_size)
         if compr_size < min_compr:
           if block_size <= max_block_size:
@@ -140,16 +216,28 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
     max_chain_factor = 0
     opt_mult = 1
     mult = 1
+    if options.block_finder_workers > 1:
+      # Start trials for all multiples we know we will need in parallel.
+      pool, trial_set = get_pool(options.block_finder_workers)
+      trial_set.value += 1
+      futures = {}
+    else:
+      pool = None
     while (mult <= opt_mult + params.max_block_mult and
            mult * opt_size <= max_block_size):
-      block_machine = Turing_Machine.Block_Macro_Machine(machine, mult*opt_size)
-      back_machine = Turing_Machine.Backsymbol_Macro_Machine(block_machine)
-      sim = Simulator(back_machine, new_options)
-      sim.loop_seek(params.mult_sim_loops)
-      if sim.op_state != Turing_Machine.RUNNING:
+      if pool:
+        for next_mult in range(mult, opt_mult + params.max_block_mult + 1):
+          if next_mult not in futures and next_mult * opt_size <= max_block_size:
+            futures[next_mult] = pool.submit(
+              mult_trial, machine, next_mult * opt_size, new_options,
+              params.mult_sim_loops, trial_set.value)
+        stopped, chain_factor = futures.pop(mult).result()
+      else:
+        stopped, chain_factor = mult_trial(machine, mult * opt_size, new_options,
+                                           params.mult_sim_loops)
+      if stopped:
         result.best_block_size = mult * opt_size
-        return
-      chain_factor = sim.steps_from_chain / sim.steps_from_macro
+        break
 
       if options.verbose_block_finder:
         print("BF: *", mult, chain_factor)
@@ -160,10 +248,16 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
         max_chain_factor = chain_factor
         opt_mult = mult
       mult += 1
+    else:
+      result.best_mult = opt_mult
+      result.best_chain_factor = max_chain_factor
+      result.best_block_size = opt_mult * opt_size
 
-    result.best_mult = opt_mult
-    result.best_chain_factor = max_chain_factor
-    result.best_block_size = opt_mult * opt_size
+    if pool:
+      # Cancel any trials we no longer need (and stop running ones).
+      trial_set.value += 1
+      for future in futures.values():
+        future.cancel()
 
   if options.verbose_block_finder:
     print("BF: Block Finder finished")
@@ -171,20 +265,78 @@ def block_finder(machine : Turing_Machine.Turing_Machine,
     print(result)
     sys.stdout.flush()
 
-def uncompress_tape(compr_tape):
-  """Expand out repetition counts in tape."""
-  tape_out = []
+def snapshot_tape(chain_tape):
+  """Copy of half-tapes as (symbol, num) pairs (Repeated_Symbols are modified
+  in place as the simulation continues)."""
+  return [[(block.symbol, block.num) for block in half_tape]
+          for half_tape in chain_tape.get_tape()]
+
+def tape_runs(compr_tape):
+  """List of (symbol, num) runs from left to right on tape (from
+  snapshot_tape()), not including the infinite blank ends."""
   left_tape = compr_tape[0][1:]
   right_tape = compr_tape[1][1:]
   right_tape.reverse()
-  for seq in left_tape + right_tape:
-    tape_out += [seq.symbol]*seq.num
+  return left_tape + right_tape
+
+def uncompress_tape(compr_tape):
+  """Expand out repetition counts in tape (from snapshot_tape())."""
+  tape_out = []
+  for symbol, num in tape_runs(compr_tape):
+    tape_out += [symbol]*num
   return tape_out
 
-def compression_efficiency(tape, k):
-  """Find size of tape when compressed with blocks of size k."""
-  compr_size = len(tape)
-  for i in range(0, len(tape) - 2*k, k):
-    if tape[i:i + k] == tape[i + k:i + 2*k]:
+
+# Polynomial hashes of tape sections are computed modulo this (Mersenne) prime.
+HASH_MOD = (1 << 61) - 1
+HASH_BASE = 1_000_003
+
+class Tape_Hashes:
+  """Hashes of all prefixes of a tape, so that any two sections of the tape
+  can be compared in O(1) time (up to hash collisions, which have
+  probability ~ length / HASH_MOD)."""
+  def __init__(self, runs):
+    """Build directly from (symbol, num) `runs` without expanding the tape
+    into a list of symbols."""
+    # prefix[i] = hash(tape[:i])
+    prefix = array.array("q", [0])
+    hash = 0
+    for symbol, num in runs:
+      # Offset so that symbol 0 does not hash like an empty string.
+      symbol += 1
+      for _ in range(num):
+        hash = (hash * HASH_BASE + symbol) % HASH_MOD
+        prefix.append(hash)
+    self.prefix = prefix
+    self.length = len(prefix) - 1
+    # powers[i] = HASH_BASE**i
+    powers = array.array("q", [1])
+    power = 1
+    for _ in range(self.length):
+      power = (power * HASH_BASE) % HASH_MOD
+      powers.append(power)
+    self.powers = powers
+
+  def section(self, start : int, end : int) -> int:
+    """Hash of tape[start:end]."""
+    return (self.prefix[end] -
+            self.prefix[start] * self.powers[end - start]) % HASH_MOD
+
+def compression_efficiency(tape : Tape_Hashes, k : int) -> int:
+  """Find size of tape when compressed with blocks of size k.
+
+  Takes O(length / k) time, so trying all block sizes takes
+  O(length log length)."""
+  compr_size = tape.length
+  if compr_size <= 2 * k:
+    return compr_size
+  prefix = tape.prefix
+  power = tape.powers[k]
+  # Compare each block [i - k, i) with the next one [i, i + k).
+  prev_hash = prefix[k]
+  for i in range(k, tape.length - k, k):
+    hash = (prefix[i + k] - prefix[i] * power) % HASH_MOD
+    if hash == prev_hash:
       compr_size -= k
+    prev_hash = hash
   return compr_size
@@ -85,7 +85,7 @@ class Diff_Rule(Rule):
     # Figure out if any exponents decrease by > 1. If so, these can lead to
     # branching (Collatz) behavior, so it's good to know about!
     self.has_collatz_decrease = False
-    for htape in self.diff_tape.tape:
+    for htape in self.diff_tape.get_tape():
       for block in htape:
         if block.num < -1:
           self.has_collatz_decrease = True
@@ -105,8 +105,8 @@ class Linear_Rule(Rule):
     assert len(var_list) == len(min_list) == len(func_list)
     self.var_list = var_list
     self.func_list = func_list
-    self.block_list = [block.symbol for block in result_tape.tape[0] + result_tape.tape[1]]
-    self.left_size = len(result_tape.tape[0])
+    self.block_list = [block.symbol for block in result_tape.get_tape()[0] + result_tape.get_tape()[1]]
+    self.left_size = len(result_tape.get_tape()[0])
     self.num_steps = num_steps
     self.num_loops = num_loops
     self.name = str(rule_num)
@@ -144,7 +144,7 @@ class Linear_Rule(Rule):
   def try_gen(var_list, min_list, result_tape,
               num_steps, num_loops, rule_num, states_last_seen, level: int):
     func_list = []
-    for i, result_block in enumerate(result_tape.tape[0]+result_tape.tape[1]):
+    for i, result_block in enumerate(result_tape.get_tape()[0]+result_tape.get_tape()[1]):
       if not var_list[i]:
         # Constant run_length (1 or inf)
         func_list.append(None)
@@ -207,8 +207,8 @@ class Exponential_Rule(Rule):
                num_steps, num_loops, rule_num, states_last_seen, level: int):
     self.func_list = func_list
     self.const_list = const_list
-    self.block_list = [block.symbol for block in result_tape.tape[0] + result_tape.tape[1]]
-    self.left_size = len(result_tape.tape[0])
+    self.block_list = [block.symbol for block in result_tape.get_tape()[0] + result_tape.get_tape()[1]]
+    self.left_size = len(result_tape.get_tape()[0])
     self.num_steps = num_steps
     self.num_loops = num_loops
     self.name = str(rule_num)
@@ -245,7 +245,7 @@ class Exponential_Rule(Rule):
               num_steps, num_loops, rule_num, states_last_seen, level: int):
     func_list = []
     const_list = []
-    for i, result_block in enumerate(result_tape.tape[0]+result_tape.tape[1]):
+    for i, result_block in enumerate(result_tape.get_tape()[0]+result_tape.get_tape()[1]):
       if not var_list[i]:
         # Constant run_length (1 or inf)
         func_list.append(None)
@@ -335,9 +335,9 @@ class General_Rule(Rule):
     self.min_list = min_list  # List of minimum values for variables.
     # TODO: result_list and force output tape to be the same stripped config as input tape.
     self.result_tape = result_tape
-    self.result_list = [block.num for block in result_tape.tape[0] + result_tape.tape[1]]
-    self.block_list = [block.symbol for block in result_tape.tape[0] + result_tape.tape[1]]
-    self.left_size = len(result_tape.tape[0])
+    self.result_list = [block.num for block in result_tape.get_tape()[0] + result_tape.get_tape()[1]]
+    self.block_list = [block.symbol for block in result_tape.get_tape()[0] + result_tape.get_tape()[1]]
+    self.left_size = len(result_tape.get_tape()[0])
     self.num_steps = num_steps
     self.num_loops = num_loops
     self.name = str(rule_num)
@@ -411,7 +411,7 @@ class Limited_Diff_Rule(Rule):
     # Figure out if any exponents decrease by > 1. If so, these can lead to
     # branching (Collatz) behavior, so it's good to know about!
     self.has_collatz_decrease = False
-    for htape in self.diff_tape.tape:
+    for htape in self.diff_tape.get_tape():
       for block in htape:
         if block.num < -1:
           self.has_collatz_decrease = True
@@ -518,6 +518,8 @@ class Proof_System(object):
     self.past_configs = defaultdict(Past_Config)
     # Collection of proven rules indexed by stripped configurations.
     self.rules = {}
+    # Is `rules` shared with other Proof_Systems (see copy())?
+    self.rules_shared = False
 
     self.max_num_reps = options.max_num_reps
 
@@ -533,12 +535,46 @@ class Proof_System(object):
     # could lead to collatz-like behavior.
     self.num_collatz_rules = 0
     self.num_failed_proofs = 0
+    # Did any proof attempt reach an undefined transition? If so, our rules
+    # might differ from those of a TM with that transition defined.
+    self.reached_undefined = False
     self.num_loops = 0
     # Tracks the highest level of any rule applied during the current inner
     # simulation (used only by frozen inner provers in prove_rule).
     self.max_rule_level_used = 0
     # TODO: Record how many steps are taken by recursive rules in simulator.
 
+  def switch_machine(self, machine) -> None:
+    """Start proving rules for `machine` instead (see Reblock.py). Past
+    configs and rules refer to the old machine's symbols, so forget them
+    (but keep stats)."""
+    self.machine = machine
+    self.past_configs = defaultdict(Past_Config)
+    self.rules = {}
+    self.rules_shared = False
+
+  def copy(self, machine):
+    """Copy of this prover for a Simulator resumed with `machine` (see
+    Simulator.resume()). Proven rules are never modified (except for their
+    num_uses stat), so the rules table is shared until either copy adds a
+    rule."""
+    new = copy.copy(self)
+    new.machine = machine
+    if self.past_configs is not None:
+      new.past_configs = defaultdict(Past_Config)
+      for stripped_config, past_config in self.past_configs.items():
+        new.past_configs[stripped_config] = copy.copy(past_config)
+    new.num_rules_by_level = defaultdict(int, self.num_rules_by_level)
+    self.rules_shared = new.rules_shared = True
+    return new
+
+  def _own_rules(self):
+    """Make sure that our rules table is not shared (before modifying it)."""
+    if self.rules_shared:
+      self.rules = {config: (list(rule) if isinstance(rule, list) else rule)
+                    for config, rule in self.rules.items()}
+      self.rules_shared = False
+
   def print_this(self, *args):
     """Print with prefix."""
     print(self.verbose_prefix, end=' ')
@@ -594,7 +630,7 @@ class Proof_System(object):
     # Stores state, direction pointed, and list of symbols on tape.
     # Note: we ignore the number of repetitions of these sequences so that we
     #   can get a very general view of the tape.
-    stripped_config = strip_config(state, tape.dir, tape.tape)
+    stripped_config = strip_config(state, tape.dir, tape.get_tape())
     full_config = (state, tape, loop_num)
 
     # Try to apply an already proven rule.
@@ -685,6 +721,7 @@ class Proof_System(object):
 
   def add_rule(self, rule, stripped_config):
     """Add a proven rule"""
+    self._own_rules()
     # Remember rule.
     if isinstance(rule, Limited_Diff_Rule):
       (state, dir, stripped_tape_left, stripped_tape_right) = stripped_config
@@ -818,13 +855,15 @@ class Proof_System(object):
       gen_sim.step()
       # After step: Record the block behind us (which we just wrote to).
       back_dir = Turing_Machine.other_dir(gen_sim.tape.dir)
-      wrote_offset = gen_sim.tape.tape[back_dir][-1].id
+      wrote_offset = gen_sim.tape.get_tape()[back_dir][-1].id
       if wrote_offset:
         max_offset_touched[back_dir] = max(max_offset_touched[back_dir],
                                            wrote_offset)
       self.num_loops += 1
 
-      if gen_sim.op_state is not Turing_Machine.RUNNING:
+      if gen_sim.op_state != Turing_Machine.RUNNING:
+        if gen_sim.op_state == Turing_Machine.UNDEFINED:
+          self.reached_undefined = True
         if self.verbose:
           print()
           self.print_this("** Failed: Machine stopped running:", gen_sim.op_state)
@@ -834,7 +873,7 @@ class Proof_System(object):
       # TODO: We only need to update for the blocks on each side of head.
       # TODO: Better yet, build these checks into the data type!
       for dir in range(2):
-        for block in gen_sim.tape.tape[dir]:
+        for block in gen_sim.tape.get_tape()[dir]:
           vars = variables(block.num)
           if len(vars) > 1:
             if self.verbose:
@@ -849,7 +888,7 @@ class Proof_System(object):
 
     # Make sure finishing tape has the same stripped config as original.
     gen_stripped_config = strip_config(gen_sim.state, gen_sim.tape.dir,
-                                       gen_sim.tape.tape)
+                                       gen_sim.tape.get_tape())
     if gen_stripped_config != stripped_config:
       if self.verbose:
         print()
@@ -874,7 +913,7 @@ class Proof_System(object):
     diff_tape = gen_sim.tape.copy()
     for dir in range(2):
       for diff_block, initial_block in zip(diff_tape.tape[dir],
-                                           initial_tape.tape[dir]):
+                                           initial_tape.get_tape()[dir]):
         if diff_block.num != math.inf:
           diff_block.num -= initial_block.num
           if isinstance(diff_block.num, Algebraic_Expression):
@@ -889,7 +928,7 @@ class Proof_System(object):
       var_list = []
       min_list = []
       assignment = {}
-      for init_block in initial_tape.tape[0]+initial_tape.tape[1]:
+      for init_block in initial_tape.get_tape()[0]+initial_tape.get_tape()[1]:
         if isinstance(init_block.num, Algebraic_Expression):
           x = init_block.num.variable_restricted()
           var_list.append(x)
@@ -1094,7 +1133,6 @@ class Proof_System(object):
   def apply_diff_rule(self, rule, start_config):
     ## Unpack input
     new_state, new_tape, new_loop_num = start_config
-    new_tape = new_tape.copy()  # Make a clean copy that we can edit here.
 
     ## Calculate number of repetitions allowable and other tape-based info.
     num_reps = None
@@ -1110,7 +1148,7 @@ class Proof_System(object):
     large_delta = False
     for dir in range(2):
       for i, (init_block, diff_block, new_block) in enumerate(zip(
-          rule.initial_tape.tape[dir], rule.diff_tape.tape[dir], new_tape.tape[dir])):
+          rule.initial_tape.get_tape()[dir], rule.diff_tape.get_tape()[dir], new_tape.get_tape()[dir])):
         # The constant term in init_block.num represents the minimum
         # required value.
         if isinstance(init_block.num, Algebraic_Expression):
@@ -1234,7 +1272,7 @@ class Proof_System(object):
     return_tape = new_tape.copy()
     for dir in range(2):
       for i, (diff_block, return_block) in enumerate(zip(
-        rule.diff_tape.tape[dir], return_tape.tape[dir])):
+        rule.diff_tape.get_tape()[dir], return_tape.tape[dir])):
         if return_block.num is not math.inf:
           if dir == limit_dir and i == limit_index:
             return_block.num = limit_final
@@ -1268,7 +1306,7 @@ class Proof_System(object):
 
     # Unpack input
     start_state, start_tape, start_loop_num = start_config
-    current_list = [block.num for block in start_tape.tape[0] + start_tape.tape[1]]
+    current_list = [block.num for block in start_tape.get_tape()[0] + start_tape.get_tape()[1]]
     assert len(current_list) == len(rule.var_list)
 
     if self.exp_meta_linear_rules:
@@ -1337,7 +1375,7 @@ class Proof_System(object):
   def apply_exponential_rule(self, rule, start_config):
     # Unpack input
     start_state, start_tape, start_loop_num = start_config
-    current_list = [block.num for block in start_tape.tape[0] + start_tape.tape[1]]
+    current_list = [block.num for block in start_tape.get_tape()[0] + start_tape.get_tape()[1]]
     assert len(current_list) == len(rule.var_list)
 
     if not config_fits_min(rule.var_list, rule.min_list, current_list):
@@ -1373,7 +1411,7 @@ class Proof_System(object):
     large_delta = True  # Not edited in this function.
     # Current list of all block exponents. We will update it in place repeatedly
     # rather than creating new tapes.
-    current_list = [block.num for block in start_tape.tape[0] + start_tape.tape[1]]
+    current_list = [block.num for block in start_tape.get_tape()[0] + start_tape.get_tape()[1]]
 
     # If this general rule is infinite.
     if rule.infinite and config_fits_min(rule.var_list, rule.min_list, current_list):
@@ -0,0 +1,303 @@
+#
+# Reblock.py
+#
+"""
+Dynamic re-blocking: convert a running Simulator to a different
+Block_Macro_Machine block size without restarting.
+
+The block size chosen by Block_Finder at the start of a simulation is not
+always the best one later on. With --reblock-loops, the Simulator
+periodically checks whether it is mostly making macro moves or the tape has
+grown a lot and if another block size would compress the current tape much
+better, it converts the live tape to that block size.
+
+The Simulator also falls back to a smaller block size when a macro
+transition takes too many base steps (see fall_back()).
+"""
+
+import math
+
+from Macro import Tape
+from Macro import Trans_Cache
+from Macro import Turing_Machine
+from Macro.Tape import INF
+
+
+# Consider block sizes up to this multiple of the current block size.
+MAX_BLOCK_SIZE_FACTOR = 2
+# Only switch if the new block size compresses the tape to at most this
+# fraction of the current size.
+MIN_GAIN = 0.75
+
+
+def split_machine(machine):
+  """Returns (base_machine, block_size, backsymbol) for a machine built as
+  [Backsymbol_Macro_Machine of] [Block_Macro_Machine of] Simple_Machine.
+  Or None if machine is not of this form."""
+  backsymbol = isinstance(machine, Turing_Machine.Backsymbol_Macro_Machine)
+  if backsymbol:
+    machine = machine.base_machine
+  block_size = 1
+  if isinstance(machine, Turing_Machine.Block_Macro_Machine):
+    block_size = machine.block_size
+    machine = machine.base_machine
+  if not isinstance(machine, Turing_Machine.Simple_Machine):
+    return None
+  return machine, block_size, backsymbol
+
+def build_machine(old_machine, block_size : int, options):
+  """Macro machine like `old_machine` (with the same settings) but with block
+  size `block_size`."""
+  base_machine, _, backsymbol = split_machine(old_machine)
+  # Use old machines' max_sim_steps_per_symbol where possible.
+  macro_machines = [old_machine]
+  if backsymbol:
+    macro_machines.insert(0, old_machine.base_machine)
+  max_sim_steps = [machine.max_sim_steps_per_symbol
+                   for machine in macro_machines
+                   if isinstance(machine, Turing_Machine.Macro_Machine)]
+
+  machine = base_machine
+  if block_size != 1:
+    machine = Turing_Machine.Block_Macro_Machine(
+      machine, block_size,
+      max_sim_steps_per_symbol=max_sim_steps[0] if max_sim_steps else 10_000,
+      max_ttable_cells=options.max_ttable_cells,
+      eager_ttable=options.eager_ttable,
+      retry_sim_steps=options.macro_retry_steps)
+  if backsymbol:
+    machine = Turing_Machine.Backsymbol_Macro_Machine(
+      machine, max_sim_steps_per_symbol=old_machine.max_sim_steps_per_symbol,
+      max_ttable_cells=options.max_ttable_cells,
+      retry_sim_steps=options.macro_retry_steps)
+  return machine
+
+
+def min_period(cells : tuple) -> int:
+  """Length of shortest `word` such that `cells` is `word` repeated."""
+  n = len(cells)
+  for period in range(1, n):
+    if n % period == 0 and cells == cells[:period] * (n // period):
+      return period
+  return n
+
+def reblock_runs(runs, block_size : int, blank):
+  """Convert one half of a tape into blocks of size `block_size`.
+
+  `runs` is a list of (cells, num) pairs listed outward from the head, where
+  `cells` are base symbols (also listed outward from the head) and the last
+  run is infinitely repeated blanks. Returns a list of [cells, num] blocks in
+  the same format or None if some large repeated run cannot be represented
+  with this block size."""
+  blocks = []
+  def add_block(cells, num):
+    if blocks and blocks[-1][0] == cells:
+      blocks[-1][1] += num
+    else:
+      blocks.append([cells, num])
+
+  # Cells not yet part of a complete block.
+  pending = ()
+  for cells, num in runs:
+    if num is INF:
+      assert cells == (blank,) * len(cells), cells
+      if pending:
+        add_block(pending + (blank,) * (block_size - len(pending)), 1)
+      blocks.append([(blank,) * block_size, INF])
+      return blocks
+
+    period = min_period(cells)
+    num *= len(cells) // period
+    cells = cells[:period]
+    # Number of cells needed to complete the pending block.
+    need = block_size - len(pending) if pending else 0
+    if num * period < need + 2 * block_size:
+      # Short run: Just expand it out.
+      stream = pending + cells * int(num)
+      num_full = len(stream) - len(stream) % block_size
+      for start in range(0, num_full, block_size):
+        add_block(stream[start:start + block_size], 1)
+      pending = stream[num_full:]
+    else:
+      if block_size % period:
+        return None
+      if need:
+        add_block(pending + (cells * (need // period + 1))[:need], 1)
+      # Rotate cells so that they start at a block boundary.
+      shift = need % period
+      cells = cells[shift:] + cells[:shift]
+      num_cells = num * period - need
+      add_block(cells * (block_size // period), num_cells // block_size)
+      num_rest = int(num_cells % block_size)
+      pending = (cells * (num_rest // period + 1))[:num_rest]
+  raise ValueError("Half tape does not end with infinite blanks")
+
+def reblock_tape(sim, block_size : int):
+  """Convert sim's tape and state to block size `block_size`. Returns
+  (half_tapes, back_cells) where half_tapes are lists of [cells, num] (see
+  reblock_runs()) and back_cells is the new back symbol (for
+  Backsymbol_Macro_Machines, otherwise None). Returns None if not possible."""
+  split = split_machine(sim.machine)
+  if split is None:
+    return None
+  base_machine, _, backsymbol = split
+  state = sim.state
+  if isinstance(state, Turing_Machine.Backsymbol_Macro_Machine_State):
+    state = state.base_state
+  if isinstance(state, Turing_Machine.OffsetStartState):
+    return None
+
+  def to_cells(symbol, dir):
+    """Cells of a symbol listed outward from head, on the `dir` side."""
+    cells = tuple(symbol) if isinstance(symbol, tuple) else (symbol,)
+    return cells[::-1] if dir == Turing_Machine.LEFT else cells
+
+  half_tapes = [None, None]
+  for dir in range(2):
+    runs = [(to_cells(block.symbol, dir), block.num)
+            for block in reversed(sim.tape.get_tape()[dir])]
+    if backsymbol and dir != sim.dir:
+      # The back symbol is directly behind the head.
+      runs.insert(0, (to_cells(sim.state.back_symbol, dir), 1))
+    half_tapes[dir] = reblock_runs(runs, block_size, base_machine.init_symbol)
+    if half_tapes[dir] is None:
+      return None
+
+  back_cells = None
+  if backsymbol:
+    back_half = half_tapes[not sim.dir]
+    back_cells = back_half[0][0]
+    if back_half[0][1] is not INF:
+      back_half[0][1] -= 1
+      if back_half[0][1] == 0:
+        back_half.pop(0)
+  return half_tapes, back_cells
+
+def compressed_cost(half_tapes, block_size : int) -> int:
+  """Size of tape (in base cells) when compressed with this block size (as in
+  Block_Finder.compression_efficiency())."""
+  return block_size * (len(half_tapes[0]) + len(half_tapes[1]))
+
+
+def reblock(sim, block_size : int) -> bool:
+  """Convert `sim` to simulate with block size `block_size` from now on.
+  Step counts are preserved, but the prover starts over with no rules.
+  Returns False (and does nothing) if this is not possible."""
+  reblocked = reblock_tape(sim, block_size)
+  if reblocked is None:
+    return False
+  half_tapes, back_cells = reblocked
+
+  machine = sim.reblock_machines.get(block_size)
+  if machine is None:
+    machine = build_machine(sim.machine, block_size, sim.options)
+    disk_cache = getattr(sim.machine.trans_table, "disk_cache", None)
+    if disk_cache:
+      Trans_Cache.attach_cache(machine, disk_cache.cache)
+    sim.reblock_machines[block_size] = machine
+  _, old_block_size, backsymbol = split_machine(sim.machine)
+  sim.reblock_machines[old_block_size] = sim.machine
+
+  block_machine = machine.base_machine if backsymbol else machine
+  def to_symbol(cells, dir):
+    if dir == Turing_Machine.LEFT:
+      cells = cells[::-1]
+    if block_size == 1:
+      return cells[0]
+    return Turing_Machine.intern_value(
+      block_machine.symbols, Turing_Machine.Block_Symbol(cells),
+      block_machine.trans_table.max_size)
+
+  new_tape = Tape.Chain_Tape()
+  new_tape.dir = sim.tape.dir
+  new_tape.options = sim.tape.options
+  new_tape.tape = [[Tape.Repeated_Symbol(to_symbol(cells, dir), num)
+                    for cells, num in reversed(half_tapes[dir])]
+                   for dir in range(2)]
+
+  state = sim.state
+  if backsymbol:
+    state = Turing_Machine.Backsymbol_Macro_Machine_State(
+      state.base_state, to_symbol(back_cells, not sim.dir))
+
+  # Make sure lazy quasihalt info refers to the transitions we actually used.
+  sim.fold_trans_last_used()
+  sim.machine = machine
+  sim.tape = new_tape
+  sim.state = state
+  sim.chain_cycles = {}
+  if sim.prover:
+    sim.prover.switch_machine(machine)
+  sim.num_reblocks += 1
+  return True
+
+def maybe_reblock(sim) -> bool:
+  """Check if compression has degraded since the last check and if so
+  whether another block size would be much better. Called by Simulator every
+  --reblock-loops loops. Returns True if we switched block size."""
+  stats = (sim.num_macro_moves, sim.num_chain_moves, sim.num_rule_moves,
+           sim.tape.compressed_size())
+  last_stats = sim.reblock_stats
+  sim.reblock_stats = stats
+  if last_stats is None:
+    return False
+  num_macro = stats[0] - last_stats[0]
+  num_chain_rule = stats[1] + stats[2] - last_stats[1] - last_stats[2]
+  if not (num_macro > num_chain_rule or stats[3] > 2 * last_stats[3]):
+    return False
+
+  split = split_machine(sim.machine)
+  if split is None:
+    return False
+  _, cur_block_size, _ = split
+  max_block_size = min(MAX_BLOCK_SIZE_FACTOR * cur_block_size,
+                       sim.max_reblock_size)
+  best_block_size = best_block_size_below(
+    sim, max_block_size, MIN_GAIN * cur_block_size * sim.tape.compressed_size(),
+    skip=cur_block_size)
+  if best_block_size is None:
+    return False
+  if sim.verbose:
+    print(sim.verbose_prefix, "Reblocking from block size", cur_block_size,
+          "to", best_block_size)
+  if not reblock(sim, best_block_size):
+    return False
+  sim.reblock_stats = (sim.num_macro_moves, sim.num_chain_moves,
+                       sim.num_rule_moves, sim.tape.compressed_size())
+  return True
+
+def best_block_size_below(sim, max_block_size, max_cost, skip = None):
+  """Block size <= max_block_size (other than `skip`) which compresses sim's
+  current tape best (and with cost < max_cost) or None."""
+  best_cost = max_cost
+  best_block_size = None
+  for block_size in range(1, int(max_block_size) + 1):
+    if block_size != skip:
+      reblocked = reblock_tape(sim, block_size)
+      if reblocked:
+        cost = compressed_cost(reblocked[0], block_size)
+        if cost < best_cost:
+          best_cost = cost
+          best_block_size = block_size
+  return best_block_size
+
+def fall_back(sim) -> bool:
+  """Switch to a smaller block size because a macro transition took too
+  many base steps (is OVER_STEPS_IN_MACRO) with the current one. Never
+  switches back up to this block size. Returns False if not possible."""
+  split = split_machine(sim.machine)
+  if split is None:
+    return False
+  _, cur_block_size, _ = split
+  sim.max_reblock_size = cur_block_size - 1
+  best_block_size = best_block_size_below(sim, sim.max_reblock_size, math.inf)
+  if best_block_size is None:
+    return False
+  if sim.verbose:
+    print(sim.verbose_prefix, "Macro transition took too many steps, "
+          "falling back from block size", cur_block_size, "to",
+          best_block_size)
+  if not reblock(sim, best_block_size):
+    return False
+  sim.reblock_stats = None
+  return True
@@ -6,16 +6,20 @@ Turing Machine Simulator with considerable acceleration due to tape
 compression, chain moves and a proof system.
 """
 
+import copy
 import math
 import optparse
 from optparse import OptionParser, OptionGroup
+import os
+import pickle
 import sys
 import time
 
-from Algebraic_Expression import Algebraic_Expression
+from Algebraic_Expression import Algebraic_Expression, Variable
 from Exp_Int import ExpInt
 from Halting_Lib import big_int_approx_str, big_int_approx_and_full_str
 from Macro import Proof_System
+from Macro import Reblock
 from Macro import Tape
 from Macro import Turing_Machine
 import io_pb2
@@ -38,6 +42,21 @@ def add_option_group(parser : OptionParser):
   group.add_option("-p", "--no-prover", dest="prover",
                    action="store_false", default=True,
                    help="Turn OFF proof system.")
+  group.add_option("--reblock-loops", type=int, default=0, metavar="LOOPS",
+                   help="Every LOOPS loops, check if compression has degraded "
+                   "and if so, switch to a better block size (without "
+                   "restarting). 0 to disable. [Default: %default]")
+  group.add_option("--no-block-fallback", dest="block_fallback",
+                   action="store_false", default=True,
+                   help="Don't switch to a smaller block size when a macro "
+                   "transition takes too many base steps (even after "
+                   "retrying, see --macro-retry-steps).")
+  group.add_option("--max-chain-period", type=int, default=4, metavar="K",
+                   help="Also take chain moves over a repeated symbol when "
+                   "up to K macro transitions in a row cycle back to the "
+                   "same state (without changing direction). Has no effect "
+                   "unless --no-prover is given. 1 to disable. "
+                   "[Default: %default]")
   group.add_option("--html-format", action="store_true",
                    help="Print tape in an HTML format.")
   group.add_option("--full-reps", action="store_true",
@@ -52,6 +71,13 @@ def create_default_options() -> OptionParser:
   options, args = parser.parse_args([])
   return options
 
+# Simulator.run_fast() only checks the time limit this often.
+TIME_CHECK_LOOPS = 16
+# Fold Simulator.trans_last_used into states_last_seen once it gets this big.
+MAX_TRANS_LAST_USED = 1 << 16
+# Forget Simulator.chain_cycles once it gets this big.
+MAX_CHAIN_CYCLES = 1 << 16
+
 class Simulator(object):
   """Turing machine simulator using chain-tape optimization."""
   def __init__(self,
@@ -89,6 +115,31 @@ class Simulator(object):
     # Operation state (e.g. running, halted, proven-infinite, ...)
     self.op_state = Turing_Machine.RUNNING
     self.op_details = ()
+    # Simulator state right before an undefined transition was applied (see
+    # macro_step()). Only saved if save_undefined_snapshot is set (by callers
+    # which will resume() from it).
+    self.undefined_snapshot = None
+    self.save_undefined_snapshot = False
+    # Dynamic re-blocking (see Reblock.py). Only done in base simulators.
+    self.reblock_loops = options.reblock_loops if is_base_simulator else 0
+    self.next_reblock_loop = self.reblock_loops
+    # Stats at last reblock check and macro machines for each block size used.
+    self.reblock_stats = None
+    self.reblock_machines = {}
+    # Switch to a smaller block size if a macro transition takes too many
+    # steps (see Reblock.fall_back()). Block sizes above max_reblock_size
+    # have already failed this way.
+    self.block_fallback = is_base_simulator and options.block_fallback
+    self.max_reblock_size = math.inf
+    # Periodic chain moves (see periodic_chain_move()). The prover's
+    # generalized simulations must take the same moves as we do, so they are
+    # only used without it.
+    if is_base_simulator and not options.prover:
+      self.max_chain_period = options.max_chain_period
+    else:
+      self.max_chain_period = 1
+    # (symbol, state, dir) -> (cycle of transitions, num_base_steps) or None
+    self.chain_cycles = {}
 
     # Stats
     self.start_time = time.time()
@@ -96,17 +147,47 @@ class Simulator(object):
     self.num_macro_moves = 0
     self.num_chain_moves = 0
     self.num_rule_moves = 0
+    self.num_reblocks = 0
+    self.num_block_fallbacks = 0
     if self.compute_steps:
       self.steps_from_macro = 0
       self.steps_from_chain = 0
       self.steps_from_rule = 0
-      # Last step that we visited each state.
-      self.states_last_seen = {}
+      # Last step that we visited each state (see `states_last_seen`).
+      self._states_last_seen = {}
+      # Rather than updating _states_last_seen after every move, we only
+      # record the last time each macro transition was used:
+      #   id(trans) -> (num_loops, step_num at start of trans, trans)
+      self.trans_last_used = {}
     else:
       self.steps_from_macro = None
       self.steps_from_chain = None
       self.steps_from_rule = None
-      self.states_last_seen = None
+      self._states_last_seen = None
+      self.trans_last_used = None
+
+  @property
+  def states_last_seen(self):
+    """Dict of last step that we visited each state (or None if we are not
+    keeping track of it)."""
+    self.fold_trans_last_used()
+    return self._states_last_seen
+
+  @states_last_seen.setter
+  def states_last_seen(self, value):
+    self._states_last_seen = value
+    self.trans_last_used = None if value is None else {}
+
+  def fold_trans_last_used(self) -> None:
+    """Update _states_last_seen from trans_last_used (in order of use)."""
+    if self.trans_last_used:
+      states_last_seen = self._states_last_seen
+      # Note: Periodic chain moves use several transitions in one loop.
+      for _, base_step, trans in sorted(self.trans_last_used.values(),
+                                        key=lambda used: used[:2]):
+        for state, trans_last_seen in trans.states_last_seen.items():
+          states_last_seen[state] = base_step + trans_last_seen
+      self.trans_last_used.clear()
 
   def run(self, steps):
     self.seek(self.step_num + steps)
@@ -121,8 +202,8 @@ class Simulator(object):
     self.loop_seek(self.num_loops + loops)
 
   def loop_seek(self, cutoff):
-    while self.num_loops < cutoff and self.op_state == Turing_Machine.RUNNING:
-      self.step()
+    if cutoff > self.num_loops:
+      self.run_fast(max_loops = cutoff)
 
   # TODO: true_loop_run which captures cost of prover, etc. also.
 
@@ -140,42 +221,165 @@ class Simulator(object):
       # Log the configuration in the prover and apply rule if possible.
       prover_result = self.prover.log_and_apply(
         self.tape, self.state, self.num_loops-1)
+      if self.apply_prover_result(prover_result):
+        return
+    self.macro_step()
 
-      # Proof system says that machine will repeat forever
-      if prover_result.condition == Proof_System.INF_REPEAT:
-        self.op_state = Turing_Machine.INF_REPEAT
-        self.inf_reason = io_pb2.INF_PROOF_SYSTEM
-        if prover_result.states_last_seen:
-          self.inf_recur_states = list(prover_result.states_last_seen.keys())
+  def apply_prover_result(self, prover_result) -> bool:
+    """Apply result of Proof_System.log_and_apply(). Returns True if it
+    completed this step (otherwise a macro_step() is needed)."""
+    # Proof system says that machine will repeat forever
+    if prover_result.condition == Proof_System.INF_REPEAT:
+      self.op_state = Turing_Machine.INF_REPEAT
+      self.inf_reason = io_pb2.INF_PROOF_SYSTEM
+      if prover_result.states_last_seen:
+        self.inf_recur_states = list(prover_result.states_last_seen.keys())
+      else:
+        self.inf_recur_states = None
+      self.verbose_print()
+      return True
+    # Proof system says that we can apply a rule
+    elif prover_result.condition == Proof_System.APPLY_RULE:
+      if self.is_base_simulator and prover_result.states_last_seen:
+        assert not isinstance(list(prover_result.states_last_seen.values())[0], Algebraic_Expression), prover_result.states_last_seen
+
+      self.tape = prover_result.new_tape
+      self.num_rule_moves += 1
+      if prover_result.num_base_steps is None:
+        self.compute_steps = False
+      if self.compute_steps:
+        if self.trans_last_used is not None and prover_result.states_last_seen:
+          self.fold_trans_last_used()
+          for state, prover_last_seen in prover_result.states_last_seen.items():
+            self._states_last_seen[state] = (
+              self.step_num + prover_last_seen)
         else:
-          self.inf_recur_states = None
-        self.verbose_print()
-        return
-      # Proof system says that we can apply a rule
-      elif prover_result.condition == Proof_System.APPLY_RULE:
-        if self.is_base_simulator and prover_result.states_last_seen:
-          assert not isinstance(list(prover_result.states_last_seen.values())[0], Algebraic_Expression), prover_result.states_last_seen
-
-        self.tape = prover_result.new_tape
-        self.num_rule_moves += 1
-        if prover_result.num_base_steps is None:
-          self.compute_steps = False
-        if self.compute_steps:
-          if self.states_last_seen is not None and prover_result.states_last_seen:
-            for state, prover_last_seen in prover_result.states_last_seen.items():
-              self.states_last_seen[state] = (
-                self.step_num + prover_last_seen)
+          # Cancel self.states_last_seen if we hit a rule that doesn't support it.
+          self.states_last_seen = None
+        self.step_num += prover_result.num_base_steps
+        self.steps_from_rule += prover_result.num_base_steps
+      self.verbose_print()
+      return True
+    return False
+
+  def run_fast(self, max_loops : int, max_tape_blocks : float = math.inf,
+               time_limit = None) -> bool:
+    """Run step() until we stop running, reach `max_loops` total loops (0 for
+    no limit), the tape grows beyond `max_tape_blocks` blocks or `time_limit`
+    times out. Returns True iff we timed out.
+
+    Gives identical results to looping over step(), but faster: the common
+    macro and chain moves are inlined with attributes hoisted into locals
+    and the time limit is only checked every TIME_CHECK_LOOPS loops."""
+    RUNNING = Turing_Machine.RUNNING
+    NOTHING_TO_DO = Proof_System.NOTHING_TO_DO
+    if not max_loops:
+      max_loops = math.inf
+    get_trans_object = self.machine.get_trans_object
+    log_and_apply = self.prover.log_and_apply if self.prover else None
+    periodic_chains = (self.max_chain_period > 1)
+    time_countdown = TIME_CHECK_LOOPS
+
+    check_tape_size = (max_tape_blocks != math.inf)
+
+    while (self.num_loops < max_loops and self.op_state == RUNNING and
+           not (check_tape_size and
+                self.tape.compressed_size() > max_tape_blocks)):
+      if self.verbose:
+        self.step()
+      else:
+        compute_steps = self.compute_steps
+        if compute_steps:
+          self.old_step_num = self.step_num
+        self.num_loops += 1
+        tape = self.tape
+        state = self.state
+        if log_and_apply is None or (
+            (prover_result := log_and_apply(tape, state, self.num_loops - 1)
+             ).condition == NOTHING_TO_DO or
+            not self.apply_prover_result(prover_result)):
+          dir = self.dir
+          trans = get_trans_object(tape.get_top_symbol(), state, dir)
+          if trans.condition != RUNNING:
+            # Rare (terminal) cases.
+            self.macro_step(trans)
+            # We may have fallen back to a smaller block size.
+            get_trans_object = self.machine.get_trans_object
+            log_and_apply = self.prover.log_and_apply if self.prover else None
+          elif trans.state_out == state and trans.dir_out == dir:
+            # Chain move
+            num_reps = tape.apply_chain_move(trans.symbol_out)
+            self.op_details = trans.condition_details
+            if num_reps == math.inf:
+              self.op_state = Turing_Machine.INF_REPEAT
+              self.inf_reason = io_pb2.INF_CHAIN_STEP
+              self.inf_recur_states = list(trans.states_last_seen.keys())
+            else:
+              self.num_chain_moves += 1
+              if compute_steps:
+                num_base_steps = trans.num_base_steps
+                trans_last_used = self.trans_last_used
+                if trans_last_used is not None:
+                  trans_last_used[id(trans)] = (
+                    self.num_loops,
+                    self.step_num + num_base_steps * (num_reps - 1), trans)
+                self.step_num += num_base_steps * num_reps
+                self.steps_from_chain += num_base_steps * num_reps
+          elif (periodic_chains and trans.dir_out == dir and
+                self.periodic_chain_move(trans)):
+            pass
           else:
-            # Cancel self.states_last_seen if we hit a rule that doesn't support it.
-            self.states_last_seen = None
-          self.step_num += prover_result.num_base_steps
-          self.steps_from_rule += prover_result.num_base_steps
-        self.verbose_print()
-        return
-    # Get current symbol
-    cur_symbol = self.tape.get_top_symbol()
-    # Lookup TM transition rule
-    trans = self.machine.get_trans_object(cur_symbol, self.state, self.dir)
+            # Simple move
+            dir = trans.dir_out
+            tape.apply_single_move(trans.symbol_out, dir)
+            self.op_details = trans.condition_details
+            self.state = trans.state_out
+            self.dir = dir
+            self.num_macro_moves += 1
+            if compute_steps:
+              trans_last_used = self.trans_last_used
+              if trans_last_used is not None:
+                trans_last_used[id(trans)] = (self.num_loops, self.step_num,
+                                              trans)
+              self.step_num += trans.num_base_steps
+              self.steps_from_macro += trans.num_base_steps
+
+      time_countdown -= 1
+      if time_countdown <= 0:
+        time_countdown = TIME_CHECK_LOOPS
+        if time_limit is not None and time_limit.timed_out:
+          return True
+        # Evicted (and re-created) macro transitions are distinct objects.
+        if (self.trans_last_used and
+            len(self.trans_last_used) > MAX_TRANS_LAST_USED):
+          self.fold_trans_last_used()
+        if self.reblock_loops and self.num_loops >= self.next_reblock_loop:
+          self.next_reblock_loop = self.num_loops + self.reblock_loops
+          if self.op_state == RUNNING and Reblock.maybe_reblock(self):
+            get_trans_object = self.machine.get_trans_object
+            log_and_apply = self.prover.log_and_apply if self.prover else None
+    # Note: Macro transitions can stop with TIME_OUT.
+    return time_limit is not None and time_limit.timed_out
+
+  def macro_step(self, trans = None):
+    """Second half of step(): Apply a single macro transition or chain move
+    (called once the prover has declined to apply a rule). `trans` is the
+    current transition, if already looked up."""
+    if trans is None:
+      # Get current symbol
+      cur_symbol = self.tape.get_top_symbol()
+      # Lookup TM transition rule
+      trans = self.machine.get_trans_object(cur_symbol, self.state, self.dir)
+    if (trans.condition == Turing_Machine.OVER_STEPS_IN_MACRO and
+        self.block_fallback and Reblock.fall_back(self)):
+      # Continue with the smaller block size next loop.
+      self.num_block_fallbacks += 1
+      return
+    if (trans.condition == Turing_Machine.UNDEFINED and
+        self.save_undefined_snapshot):
+      # Save our state right before applying the undefined transition so that
+      # TMs which define this transition can continue from here.
+      self.undefined_snapshot = self.copy()
     self.op_state = trans.condition
     self.op_details = trans.condition_details
     # Apply transition
@@ -195,14 +399,17 @@ class Simulator(object):
       # Don't need to change state or direction
       self.num_chain_moves += 1
       if self.compute_steps:
-        if self.states_last_seen is not None:
-          for state, trans_last_seen in trans.states_last_seen.items():
-            self.states_last_seen[state] = (
-              # Within the last iteration of the chain step.
-              self.step_num + trans.num_base_steps * (num_reps - 1)
-              + trans_last_seen)
+        if self.trans_last_used is not None:
+          self.trans_last_used[id(trans)] = (
+            # Within the last iteration of the chain step.
+            self.num_loops,
+            self.step_num + trans.num_base_steps * (num_reps - 1), trans)
         self.step_num += trans.num_base_steps * num_reps
         self.steps_from_chain += trans.num_base_steps * num_reps
+    elif (self.max_chain_period > 1 and trans.dir_out == self.dir and
+          self.op_state == Turing_Machine.RUNNING and
+          self.periodic_chain_move(trans)):
+      pass
     # Simple move
     elif self.op_state != Turing_Machine.OVER_STEPS_IN_MACRO:
       self.tape.apply_single_move(trans.symbol_out, trans.dir_out)
@@ -210,14 +417,150 @@ class Simulator(object):
       self.dir = trans.dir_out
       self.num_macro_moves += 1
       if self.compute_steps:
-        if self.states_last_seen is not None:
-          for state, trans_last_seen in trans.states_last_seen.items():
-            self.states_last_seen[state] = self.step_num + trans_last_seen
+        if self.trans_last_used is not None:
+          self.trans_last_used[id(trans)] = (self.num_loops, self.step_num,
+                                             trans)
         self.step_num += trans.num_base_steps
         self.steps_from_macro += trans.num_base_steps
     if self.op_state != Turing_Machine.UNDEFINED:
       self.verbose_print()
 
+  def periodic_chain_move(self, trans) -> bool:
+    """Generalized chain move: If the macro transitions starting with `trans`
+    (which keeps direction, but changes state) read the block at the head
+    over and over, cycling back to the current state after a few symbols,
+    then jump over as many full cycles as fit in the block at once. Returns
+    True iff we did."""
+    block = self.tape.get_top_block()
+    num = block.num
+    if num is not Tape.INF and not (type(num) is int and num >= 2):
+      return False
+    key = (block.symbol, self.state, self.dir)
+    if key in self.chain_cycles:
+      chain_cycle = self.chain_cycles[key]
+    else:
+      if len(self.chain_cycles) > MAX_CHAIN_CYCLES:
+        self.chain_cycles.clear()
+      chain_cycle = self.chain_cycles[key] = self.find_chain_cycle(trans, *key)
+    if chain_cycle is None:
+      return False
+    cycle, cycle_steps = chain_cycle
+    period = len(cycle)
+
+    self.op_details = trans.condition_details
+    if num is Tape.INF:
+      # We cycle through these states forever moving in one direction.
+      self.op_state = Turing_Machine.INF_REPEAT
+      self.inf_reason = io_pb2.INF_CHAIN_STEP
+      self.inf_recur_states = list({state: None for cycle_trans in cycle
+                                    for state in cycle_trans.states_last_seen})
+      return True
+    num_cycles = num // period
+    if not num_cycles:
+      return False
+    self.tape.apply_chain_move(trans.symbol_out, num_cycles * period)
+    self.num_chain_moves += 1
+    if self.compute_steps:
+      if self.trans_last_used is not None:
+        # All within the last cycle.
+        base_step = self.step_num + cycle_steps * (num_cycles - 1)
+        for cycle_trans in cycle:
+          self.trans_last_used[id(cycle_trans)] = (
+            self.num_loops, base_step, cycle_trans)
+          base_step += cycle_trans.num_base_steps
+      self.step_num += cycle_steps * num_cycles
+      self.steps_from_chain += cycle_steps * num_cycles
+    return True
+
+  def find_chain_cycle(self, trans, symbol, state, dir):
+    """Returns (cycle, num_base_steps) where cycle is the list of macro
+    transitions (starting with `trans`) which repeatedly read `symbol` moving
+    in direction `dir` starting in `state` until we return to `state` and
+    num_base_steps is their total. Or None if they do not return to `state`
+    within max_chain_period transitions or they do not all write the same
+    symbol (so that the written symbols compress into a single block)."""
+    cycle = [trans]
+    while trans.state_out != state:
+      if len(cycle) >= self.max_chain_period:
+        return None
+      trans = self.machine.get_trans_object(symbol, trans.state_out, dir)
+      if (trans.condition != Turing_Machine.RUNNING or trans.dir_out != dir or
+          trans.symbol_out != cycle[0].symbol_out):
+        return None
+      cycle.append(trans)
+    return cycle, sum(trans.num_base_steps for trans in cycle)
+
+  def copy(self):
+    """Copy of this simulator which can continue independently (except that
+    the prover is shared, see `resume()`)."""
+    new_sim = copy.copy(self)
+    new_sim.tape = self.tape.copy()
+    new_sim.reblock_machines = dict(self.reblock_machines)
+    if self._states_last_seen is not None:
+      new_sim._states_last_seen = dict(self._states_last_seen)
+      new_sim.trans_last_used = dict(self.trans_last_used)
+    return new_sim
+
+  def save_checkpoint(self, filename : str) -> None:
+    """Atomically save the complete simulation state to `filename`: tape,
+    counters, prover rules and past configs and macro transition tables
+    (see load_checkpoint())."""
+    checkpoint = {
+      "simulator": self,
+      "elapsed_time_s": time.time() - self.start_time,
+      # Rules refer to Variables by id, new ones must not reuse them.
+      "num_vars": Variable.num_vars,
+    }
+    # trans_last_used is keyed by id(), which does not survive pickling.
+    self.fold_trans_last_used()
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as outfile:
+      pickle.dump(checkpoint, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+      outfile.flush()
+      os.fsync(outfile.fileno())
+    os.replace(temp_filename, filename)
+
+  def resume(self, machine : Turing_Machine.Turing_Machine):
+    """Return a new simulator continuing from `undefined_snapshot` (see
+    macro_step()) but simulating `machine`.
+
+    `machine` must behave identically to self.machine except on the undefined
+    transition reached. Macro transitions which did not reach that transition
+    are reused. The caller is responsible for checking that the prover never
+    encountered it either (see Proof_System.reached_undefined)."""
+    snapshot = self.undefined_snapshot
+    new_sim = snapshot.copy()
+    new_sim.machine = machine
+    new_sim.undefined_snapshot = None
+    # Those were for the old machine.
+    new_sim.reblock_machines = {}
+    new_sim.chain_cycles = {}
+    new_sim.start_time = time.time()
+    if snapshot.prover:
+      new_sim.prover = snapshot.prover.copy(machine)
+    # Transfer macro transitions that remain valid for the new machine.
+    old_machine = snapshot.machine
+    while isinstance(machine, (Turing_Machine.Block_Macro_Machine,
+                               Turing_Machine.Backsymbol_Macro_Machine)):
+      assert type(machine) == type(old_machine), (machine, old_machine)
+      for args, trans in old_machine.trans_table.items():
+        if trans.condition not in (Turing_Machine.UNDEFINED,
+                                   Turing_Machine.TIME_OUT):
+          machine.trans_table[args] = trans
+      machine = machine.base_machine
+      old_machine = old_machine.base_machine
+    return new_sim
+
+  def num_macro_retries(self) -> int:
+    """Number of macro transitions which took too many steps, but finished
+    when retried (see Turing_Machine.Macro_Machine.sim_base)."""
+    machines = {}
+    for machine in [self.machine] + list(self.reblock_machines.values()):
+      while isinstance(machine, Turing_Machine.Macro_Machine):
+        machines[id(machine)] = machine
+        machine = machine.base_machine
+    return sum(machine.num_rescued for machine in machines.values())
+
   def get_nonzeros(self):
     """Get Busy Beaver score, number of non-zero symbols on tape."""
     return self.tape.get_nonzeros(self.machine.eval_symbol,
@@ -247,6 +590,22 @@ class Simulator(object):
       print("Failed proofs:", self.prover.num_failed_proofs)
       print(f"Prover num past configs: {len(self.prover.past_configs):_}")
     print("Tape copies:", Tape.Chain_Tape.num_copies)
+    if self.num_reblocks:
+      print("Reblocks:", self.num_reblocks)
+    if self.num_block_fallbacks:
+      print("Block size fallbacks:", self.num_block_fallbacks)
+    num_macro_retries = self.num_macro_retries()
+    if num_macro_retries:
+      print("Macro transitions retried:", num_macro_retries)
+    machine = self.machine
+    while isinstance(machine, Turing_Machine.Macro_Machine):
+      if isinstance(machine.trans_table, Turing_Machine.LRU_Trans_Table):
+        print(f"{type(machine).__name__} ttable:",
+              machine.trans_table.stats_str())
+      if getattr(machine, "eager_table", None):
+        print(f"{type(machine).__name__} eager ttable: "
+              f"{len(machine.eager_table):_} cells")
+      machine = getattr(machine, "base_machine", None)
 
   def verbose_print(self):
     if self.verbose:
@@ -260,6 +619,15 @@ class Simulator(object):
         else:
           print("")
 
+def load_checkpoint(filename : str) -> Simulator:
+  """Load Simulator saved by Simulator.save_checkpoint()."""
+  with open(filename, "rb") as infile:
+    checkpoint = pickle.load(infile)
+  Variable.num_vars = max(Variable.num_vars, checkpoint["num_vars"])
+  sim = checkpoint["simulator"]
+  sim.start_time = time.time() - checkpoint["elapsed_time_s"]
+  return sim
+
 def template(title, steps, loops):
   """Pretty print row of the steps table."""
   if steps is not None:
@@ -22,6 +22,8 @@ def reverse(in_list):
 
 class Repeated_Symbol(object):
   """Slice of tape with repetitions."""
+  __slots__ = ("symbol", "num", "id")
+
   def __init__(self, symbol, number_of_repetitions, id = None):
     self.symbol = symbol
     self.num = number_of_repetitions
@@ -50,25 +52,76 @@ class Repeated_Symbol(object):
   def copy(self):
     return Repeated_Symbol(self.symbol, self.num, self.id)
 
+  def __reduce__(self):
+    return (_unpickle_repeated_symbol, (self.symbol, self.num, self.id))
+
+def _unpickle_repeated_symbol(symbol, num, id):
+  # INF is compared by identity, so restore it (not a new inf float).
+  if isinstance(num, float) and num == INF:
+    num = INF
+  return Repeated_Symbol(symbol, num, id)
+
 class Chain_Tape(object):
-  """Stores the turing machine tape with repetition compression."""
+  """Stores the turing machine tape with repetition compression.
+
+  Copies are copy-on-write: `copy()` shares the half-tapes (and their
+  Repeated_Symbols) and they are only duplicated once one of the sharing
+  tapes modifies them. Accessing `tape` (the [left, right] half-tapes)
+  directly counts as a modification, since callers often edit blocks in place.
+  Use `get_tape()` for read-only access.
+  """
+  __slots__ = ("dir", "_tape", "_refs", "options")
+
   # Total number of times tapes are copied. Copies are expensive.
+  # Note: Only counts actual copies (not shared copy-on-write ones).
   num_copies = 0
   def init(self, init_symbol, init_dir, options):
     self.dir = init_dir
-    self.tape = [[], []]
-    self.tape[0].append(Repeated_Symbol(init_symbol, INF))
-    self.tape[1].append(Repeated_Symbol(init_symbol, INF))
+    self.tape = [[Repeated_Symbol(init_symbol, INF)],
+                 [Repeated_Symbol(init_symbol, INF)]]
     self.options = options
 
+  @property
+  def tape(self):
+    self._own()
+    return self._tape
+
+  @tape.setter
+  def tape(self, tape):
+    self._release()
+    self._tape = tape
+    # Number of Chain_Tapes sharing self._tape (see copy()).
+    self._refs = [1]
+
+  def get_tape(self):
+    """[left, right] half-tapes (read-only, unlike tape)."""
+    return self._tape
+
+  def _release(self):
+    """Stop sharing our half-tapes."""
+    if getattr(self, "_refs", None):
+      self._refs[0] -= 1
+
+  def __del__(self):
+    # Copies which are discarded without being modified must stop sharing,
+    # otherwise the remaining tapes would copy on their next write.
+    self._release()
+
+  def _own(self):
+    """Make sure that our half-tapes are not shared (before modifying them)."""
+    if self._refs[0] > 1:
+      Chain_Tape.num_copies += 1
+      self.tape = [[x.copy() for x in self._tape[0]],
+                   [x.copy() for x in self._tape[1]]]
+
   def compressed_size(self):
     """Get compressed length of tape."""
-    return len(self.tape[0]) + len(self.tape[1])
+    return len(self._tape[0]) + len(self._tape[1])
 
   def __eq__(self, other):
     return (isinstance(other, self.__class__) and
             other.dir      == self.dir        and
-            other.tape     == self.tape)
+            other._tape    == self._tape)
 
   def __repr__(self):
     return self.print_with_state(None)
@@ -76,10 +129,10 @@ class Chain_Tape(object):
   def print_with_state(self, state):
     left_tape = " ".join(sym.to_string(self.options.html_format,
                                        self.options.full_reps)
-                         for sym in self.tape[0])
+                         for sym in self._tape[0])
     right_tape = " ".join(sym.to_string(self.options.html_format,
                                         self.options.full_reps)
-                          for sym in reverse(self.tape[1]))
+                          for sym in reverse(self._tape[1]))
 
     if state is None:
       state_str = "-"
@@ -98,12 +151,11 @@ class Chain_Tape(object):
 
 
   def copy(self):
-    Chain_Tape.num_copies += 1
     new = Chain_Tape()
     new.dir = self.dir
-    s0 = [x.copy() for x in self.tape[0]]
-    s1 = [x.copy() for x in self.tape[1]]
-    new.tape = [s0, s1]
+    new._tape = self._tape
+    new._refs = self._refs
+    self._refs[0] += 1
     new.options = self.options
     return new
 
@@ -111,22 +163,24 @@ class Chain_Tape(object):
     """Return number of nonzero symbols on the tape."""
     n = state_value
     for dir in range(2):
-      for block in self.tape[dir]:
+      for block in self._tape[dir]:
         if block.num is not INF:
           n += eval_symbol(block.symbol)*block.num
     return n
 
   def get_top_block(self):
-    return self.tape[self.dir][-1]
+    """Current block (read-only, unlike tape[dir][-1])."""
+    return self._tape[self.dir][-1]
 
   def get_top_symbol(self):
     """Simply returns the current symbol"""
-    return self.tape[self.dir][-1].symbol
+    return self._tape[self.dir][-1].symbol
 
   def apply_single_move(self, new_symbol, new_dir):
     """Apply a single macro step. Delete old symbol, push new one."""
+    self._own()
     ## Delete old symbol
-    half_tape = self.tape[self.dir]
+    half_tape = self._tape[self.dir]
     top = half_tape[-1]
     if top.num is not INF:  # Don't decrement infinity
       # If not infinity, decrement (delete one symbol)
@@ -135,7 +189,7 @@ class Chain_Tape(object):
       if top.num == 0:
         half_tape.pop()
     ## Push new symbol
-    half_tape = self.tape[not new_dir]
+    half_tape = self._tape[not new_dir]
     top = half_tape[-1]
     # If it is identical to the top symbol, combine them.
     if top.symbol == new_symbol:
@@ -147,17 +201,25 @@ class Chain_Tape(object):
     # Update direction
     self.dir = new_dir
 
-  def apply_chain_move(self, new_symbol):
-    """Apply a chain step which replaces an entire string of symbols.
-    Returns the number of symbols replaced."""
-    # Pop off old sequence
-    num = self.tape[self.dir][-1].num
-    # Can't pop off infinite symbols, TM will never halt
-    if num is INF:
-      return INF
-    self.tape[self.dir].pop()
+  def apply_chain_move(self, new_symbol, num = None):
+    """Apply a chain step which replaces an entire string of symbols (or only
+    the first `num` of them). Returns the number of symbols replaced."""
+    if num is None:
+      # Pop off old sequence
+      num = self._tape[self.dir][-1].num
+      # Can't pop off infinite symbols, TM will never halt
+      if num is INF:
+        return INF
+      self._own()
+      self._tape[self.dir].pop()
+    else:
+      self._own()
+      half_tape = self._tape[self.dir]
+      half_tape[-1].num -= num
+      if half_tape[-1].num == 0:
+        half_tape.pop()
     # Push on new one behind us
-    half_tape = self.tape[not self.dir]
+    half_tape = self._tape[not self.dir]
     top = half_tape[-1]
     if top.symbol == new_symbol:
       if top.num is not INF:
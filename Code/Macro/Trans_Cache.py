@@ -0,0 +1,274 @@
+#
+# Trans_Cache.py
+#
+"""
+Persistent (on-disk) cache of evaluated macro machine transitions, shared
+across runs and processes.
+
+Re-simulating the same TMs with the same block sizes (ex: successive filter
+passes over a holdout file) recomputes the same macro transitions each time.
+With --trans-cache-dir, LRU_Trans_Table misses first check a sqlite database
+in that directory before simulating.
+
+Transitions are stored as JSON (not pickles), so a cache directory shared
+with other users cannot be used to run arbitrary code.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+
+from Macro import Turing_Machine
+
+
+# Name of sqlite database within --trans-cache-dir. (Older, pickle-based
+# caches used "macro_trans.sqlite".)
+DB_FILENAME = "macro_trans_json.sqlite"
+# Buffer up this many new transitions before writing them to disk.
+WRITE_BATCH_SIZE = 1_000
+
+# Canonical Run_Condition objects.
+_CONDITIONS = {condition: condition for condition in (
+  Turing_Machine.RUNNING, Turing_Machine.HALT, Turing_Machine.INF_REPEAT,
+  Turing_Machine.UNDEFINED, Turing_Machine.TIME_OUT,
+  Turing_Machine.OVER_STEPS_IN_MACRO)}
+
+
+class Trans_Cache:
+  """sqlite database of Transitions (as JSON) keyed by bytes.
+
+  Safe for concurrent use by multiple processes (sqlite WAL mode). Holds at
+  most (approximately) `max_entries` transitions, evicting the oldest ones
+  when full."""
+  def __init__(self, filename : str, max_entries : int):
+    self.filename = filename
+    self.max_entries = max_entries
+    # Wait (rather than fail) if another process is writing.
+    self.db = sqlite3.connect(filename, timeout=60)
+    self.db.execute("PRAGMA journal_mode=WAL")
+    self.db.execute("PRAGMA synchronous=NORMAL")
+    with self.db:
+      self.db.execute("CREATE TABLE IF NOT EXISTS trans ("
+                      "id INTEGER PRIMARY KEY, "
+                      "key BLOB UNIQUE NOT NULL, "
+                      "trans BLOB NOT NULL)")
+    # New (encoded) transitions not yet written to disk.
+    self.pending = {}
+    self.num_hits = 0
+    self.num_misses = 0
+    self.num_writes = 0
+
+  def get(self, key : bytes):
+    """Return cached Transition for `key` or None."""
+    data = self.pending.get(key)
+    if data is None:
+      row = self.db.execute("SELECT trans FROM trans WHERE key = ?",
+                            (key,)).fetchone()
+      if row:
+        data = row[0]
+    trans = decode_trans(data) if data is not None else None
+    if trans is None:
+      self.num_misses += 1
+    else:
+      self.num_hits += 1
+    return trans
+
+  def put(self, key : bytes, trans : Turing_Machine.Transition) -> None:
+    """Cache `trans` (unless it contains values we cannot encode)."""
+    try:
+      self.pending[key] = encode_trans(trans)
+    except TypeError:
+      return
+    if len(self.pending) >= WRITE_BATCH_SIZE:
+      self.flush()
+
+  def flush(self) -> None:
+    """Write pending transitions to disk and enforce max_entries."""
+    if not self.pending:
+      return
+    with self.db:
+      self.db.executemany(
+        "INSERT OR IGNORE INTO trans (key, trans) VALUES (?, ?)",
+        list(self.pending.items()))
+      # ids are increasing, so this evicts the oldest transitions.
+      self.db.execute("DELETE FROM trans WHERE id <= "
+                      "(SELECT MAX(id) FROM trans) - ?", (self.max_entries,))
+    self.num_writes += len(self.pending)
+    self.pending.clear()
+
+  def close(self) -> None:
+    if self.db:
+      self.flush()
+      self.db.close()
+      self.db = None
+
+  def stats_str(self) -> str:
+    return (f"hits {self.num_hits:_} / misses {self.num_misses:_} / "
+            f"writes {self.num_writes:_}")
+
+
+class Machine_Trans_Cache:
+  """View of a Trans_Cache for one specific macro machine. Plugged into
+  LRU_Trans_Table.disk_cache."""
+  def __init__(self, cache : Trans_Cache, machine_key : bytes):
+    self.cache = cache
+    self.machine_key = machine_key
+    self.num_hits = 0
+    self.num_misses = 0
+
+  def get(self, args):
+    key = self.trans_key(args)
+    if key is None:
+      return None
+    trans = self.cache.get(key)
+    if trans is None:
+      self.num_misses += 1
+    else:
+      self.num_hits += 1
+    return trans
+
+  def put(self, args, trans : Turing_Machine.Transition) -> None:
+    # Time outs depend on the run, not the machine.
+    if trans.condition != Turing_Machine.TIME_OUT:
+      key = self.trans_key(args)
+      if key is not None:
+        self.cache.put(key, trans)
+
+  def trans_key(self, args):
+    """Unambiguous bytes key for (symbol, state, dir) or None if uncachable."""
+    parts = tuple(_key_part(arg) for arg in args)
+    if None in parts:
+      return None
+    return self.machine_key + repr(parts).encode()
+
+  def stats_str(self) -> str:
+    return f"disk hits {self.num_hits:_} / disk misses {self.num_misses:_}"
+
+
+def _encode_value(value):
+  """JSON-able form of a macro symbol/state or (nested) tuple of ints.
+  Raises TypeError for anything else."""
+  if isinstance(value, Turing_Machine.Backsymbol_Macro_Machine_State):
+    return ["Back", _encode_value(value.base_state),
+            _encode_value(value.back_symbol)]
+  elif isinstance(value, Turing_Machine.Block_Symbol):
+    return ["Block"] + [int(x) for x in value]
+  elif isinstance(value, Turing_Machine.Simple_Machine_State):
+    return ["State", int(value)]
+  elif isinstance(value, (tuple, list)):
+    return ["Tuple"] + [_encode_value(x) for x in value]
+  elif isinstance(value, int) and not isinstance(value, bool):
+    return value
+  raise TypeError(f"Cannot encode {value!r} in Trans_Cache")
+
+def _decode_value(value):
+  """Inverse of _encode_value()."""
+  if isinstance(value, int):
+    return value
+  tag, *items = value
+  if tag == "Back":
+    return Turing_Machine.Backsymbol_Macro_Machine_State(
+      _decode_value(items[0]), _decode_value(items[1]))
+  elif tag == "Block":
+    return Turing_Machine.Block_Symbol(items)
+  elif tag == "State":
+    return Turing_Machine.Simple_Machine_State(items[0])
+  elif tag == "Tuple":
+    return tuple(_decode_value(x) for x in items)
+  raise ValueError(f"Bad Trans_Cache value {value!r}")
+
+def encode_trans(trans : Turing_Machine.Transition) -> bytes:
+  """Serialize `trans` as JSON. Raises TypeError if not possible."""
+  return json.dumps([
+    trans.condition, _encode_value(trans.symbol_out),
+    _encode_value(trans.state_out), trans.dir_out, trans.num_base_steps,
+    [[_encode_value(state), step]
+     for state, step in trans.states_last_seen.items()],
+    _encode_value(tuple(trans.condition_details))],
+    separators=(",", ":")).encode()
+
+def decode_trans(data : bytes) -> Turing_Machine.Transition:
+  """Inverse of encode_trans()."""
+  (condition, symbol_out, state_out, dir_out, num_base_steps,
+   states_last_seen, condition_details) = json.loads(data)
+  return Turing_Machine.Transition(
+    # Conditions are sometimes compared by identity (ex: Proof_System).
+    condition = _CONDITIONS[condition],
+    symbol_out = _decode_value(symbol_out),
+    state_out = _decode_value(state_out),
+    dir_out = dir_out, num_base_steps = num_base_steps,
+    states_last_seen = {_decode_value(state): step
+                        for state, step in states_last_seen},
+    condition_details = _decode_value(condition_details))
+
+
+def _key_part(value):
+  """Convert a macro symbol/state into plain (printable) ints and tuples."""
+  if isinstance(value, Turing_Machine.Backsymbol_Macro_Machine_State):
+    base_state = _key_part(value.base_state)
+    back_symbol = _key_part(value.back_symbol)
+    if base_state is None:
+      return None
+    return ("Back", base_state, back_symbol)
+  elif isinstance(value, tuple):  # Block_Symbol
+    return tuple(int(x) for x in value)
+  elif isinstance(value, Turing_Machine.OffsetStartState):
+    # Only used for the first transition, not worth caching.
+    return None
+  else:
+    return int(value)
+
+
+def _machine_desc(machine):
+  """Description of everything (besides its arguments) that a macro
+  machine's transitions depend upon."""
+  if isinstance(machine, Turing_Machine.Block_Macro_Machine):
+    return _machine_desc(machine.base_machine) + (
+      ("Block", machine.block_size, machine.max_sim_steps_per_symbol,
+       machine.retry_sim_steps),)
+  elif isinstance(machine, Turing_Machine.Backsymbol_Macro_Machine):
+    return _machine_desc(machine.base_machine) + (
+      ("Back", machine.max_sim_steps_per_symbol, machine.retry_sim_steps),)
+  else:
+    assert isinstance(machine, Turing_Machine.Simple_Machine), machine
+    return (tuple((trans.condition, trans.symbol_out, int(trans.state_out),
+                   trans.dir_out)
+                  for row in machine.trans_table for trans in row),)
+
+
+# One Trans_Cache per process per cache directory. (sqlite connections must
+# not be shared with forked child processes, so key by pid.)
+_caches = {}
+
+def open_cache(cache_dir : str, max_entries : int) -> Trans_Cache:
+  key = (cache_dir, os.getpid())
+  if key not in _caches:
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = Trans_Cache(os.path.join(cache_dir, DB_FILENAME), max_entries)
+    atexit.register(cache.close)
+    _caches[key] = cache
+  return _caches[key]
+
+def flush_all() -> None:
+  """Write out pending transitions of all caches opened by this process.
+  For processes which exit without running atexit handlers (ex: forked
+  workers)."""
+  pid = os.getpid()
+  for (_, cache_pid), cache in _caches.items():
+    if cache_pid == pid:
+      cache.flush()
+
+def attach(machine, cache_dir : str, max_entries : int) -> None:
+  """Use the Trans_Cache in `cache_dir` for `machine` and all the macro
+  machines it is built upon."""
+  attach_cache(machine, open_cache(cache_dir, max_entries))
+
+def attach_cache(machine, cache : Trans_Cache) -> None:
+  """Use `cache` for `machine` and all the macro machines it is built upon."""
+  while isinstance(machine, Turing_Machine.Macro_Machine):
+    machine_key = hashlib.sha256(
+      repr(_machine_desc(machine)).encode()).digest()
+    machine.trans_table.disk_cache = Machine_Trans_Cache(cache, machine_key)
+    machine = machine.base_machine
@@ -5,15 +5,28 @@ Abstract Turing Machine model with basic NxM TM and Macro-Machine derivatives
 from __future__ import annotations
 
 from typing import Any
+import collections
 import dataclasses
 from dataclasses import dataclass
-from functools import total_ordering
-from optparse import OptionParser, OptionGroup
+from optparse import OptionParser, OptionGroup, OptionValueError
+import itertools
+import operator
 import string
 
+try:
+  import numpy as np
+except ImportError:
+  # Only needed for --eager-ttable (see eager_block_trans_table).
+  np = None
+
 from Time_Limit import TimeLimit
 
 
+def _set_eager_ttable(option, opt_str, value, parser) -> None:
+  if np is None:
+    raise OptionValueError(f"{opt_str} requires numpy (pip install numpy)")
+  parser.values.eager_ttable = True
+
 def add_option_group(parser):
   """Add Turing_Machine options group to an OptParser parser object."""
   assert isinstance(parser, OptionParser)
@@ -26,9 +39,47 @@ def add_option_group(parser):
   group.add_option("-b", "--no-backsymbol", dest="backsymbol",
                    action="store_false", default=True,
                    help="Turn OFF backsymbol macro machine.")
+  group.add_option("--max-ttable-cells", type=int, metavar="CELLS",
+                   default=MAX_TTABLE_CELLS,
+                   help="Max number of transitions cached by each macro "
+                   "machine. Least recently used ones are evicted beyond "
+                   "this. [Default: %default]")
+  group.add_option("--eager-ttable", action="callback", dest="eager_ttable",
+                   default=False, callback=_set_eager_ttable,
+                   help="Precompute the entire Block macro machine "
+                   "transition table at once (if it has at most "
+                   f"{MAX_EAGER_TTABLE_CELLS:_} cells). Requires numpy.")
+  group.add_option("--macro-retry-steps", type=int, metavar="STEPS",
+                   default=MACRO_RETRY_STEPS,
+                   help="If simulating a macro transition takes more than "
+                   "its max steps (ex: --max-steps-per-macro), retry it "
+                   "allowing up to STEPS base steps before giving up. 0 to "
+                   "disable. [Default: %default]")
+  group.add_option("--trans-cache-dir", metavar="DIR",
+                   help="Directory for a persistent macro transition cache "
+                   "shared by all runs (and processes) using it.")
+  group.add_option("--trans-cache-max-entries", type=int, metavar="NUM",
+                   default=TRANS_CACHE_MAX_ENTRIES,
+                   help="Max number of transitions kept in --trans-cache-dir "
+                   "(oldest are evicted first). "
+                   "[Default: %default]")
 
   parser.add_option_group(group)
 
+# Default size of macro machine transition tables (LRU_Trans_Table).
+MAX_TTABLE_CELLS = 100_000
+# Default max base steps when retrying macro transitions which took too many
+# steps (see Macro_Machine.sim_base).
+MACRO_RETRY_STEPS = 1_000_000
+# Default size of persistent macro transition cache (Trans_Cache).
+TRANS_CACHE_MAX_ENTRIES = 10_000_000
+# Max size of Block macro machine transition tables computed with
+# --eager-ttable (eager_block_trans_table).
+MAX_EAGER_TTABLE_CELLS = 1 << 14
+# How often sim_limited() checks its time limit (TimeLimit.timed_out reads
+# the clock).
+TIME_CHECK_LOOPS = 1 << 10
+
 # Some type aliases
 Symbol = int
 Dir = int
@@ -102,6 +153,12 @@ def sim_limited(tm, state, start_tape, pos : int, dir : Dir,
                 max_loops : int) -> Transition:
   """Simulate TM on a limited tape segment.
   Can detect HALT and INF_REPEAT. Used by Macro Machines."""
+  if isinstance(tm, Simple_Machine) and isinstance(state, int):
+    compiled = tm.compiled()
+    if compiled:
+      return compiled.sim_limited(state, start_tape, pos, dir, max_loops,
+                                  tm.time_limit)
+
   # num_base_steps in the bottom level Simple_Machine.
   num_base_steps = 0
   # num_loops is the # steps simulated in this function.
@@ -117,13 +174,17 @@ def sim_limited(tm, state, start_tape, pos : int, dir : Dir,
   next_config_save = 128
 
   # Simulate Machine on macro symbol
-  while not tm.time_limit.timed_out:
+  time_limit = tm.time_limit
+  timed_out = time_limit.timed_out
+  while not timed_out:
     symbol = tape[pos]
     trans = tm.get_trans_object(symbol, state, dir)
     for state, base_last_seen in trans.states_last_seen.items():
       states_last_seen[state] = num_base_steps + base_last_seen
     num_base_steps += trans.num_base_steps
     num_loops += 1
+    if num_loops % TIME_CHECK_LOOPS == 0:
+      timed_out = time_limit.timed_out
     tape[pos] = trans.symbol_out
     state = trans.state_out
     dir = trans.dir_out
@@ -164,7 +225,7 @@ def sim_limited(tm, state, start_tape, pos : int, dir : Dir,
       condition_details = tuple()
       break
 
-  if tm.time_limit.timed_out:
+  if time_limit.timed_out:
     condition = TIME_OUT
     condition_details = tuple()
 
@@ -177,6 +238,227 @@ def sim_limited(tm, state, start_tape, pos : int, dir : Dir,
     num_base_steps=num_base_steps, states_last_seen=states_last_seen)
 
 
+class Compiled_Machine:
+  """Simple_Machine transition table as flat int lists indexed by
+  `state * num_symbols + symbol`. Used by sim_limited() to simulate without
+  Transition lookups or dict merges on every base step."""
+  def __init__(self, tm) -> None:
+    self.num_states = tm.num_states
+    self.num_symbols = tm.num_symbols
+    self.transs = [trans for row in tm.trans_table for trans in row]
+    # Output states are premultiplied by num_symbols, so the next index is
+    # just `index_out + symbol`.
+    self.index_outs = [int(trans.state_out) * self.num_symbols
+                       for trans in self.transs]
+    self.symbol_outs = [trans.symbol_out for trans in self.transs]
+    self.dir_outs = [trans.dir_out for trans in self.transs]
+    self.pos_deltas = [(-1, 1, 0)[trans.dir_out] for trans in self.transs]
+    self.stops = [trans.condition != RUNNING for trans in self.transs]
+    self.tables = (self.index_outs, self.symbol_outs, self.dir_outs,
+                   self.pos_deltas, self.stops)
+
+  @staticmethod
+  def can_compile(tm) -> bool:
+    """Does every transition fit the compiled representation? (Symbols are
+    stored in a bytearray and each transition must be a single base step.)"""
+    if tm.num_symbols > 256:
+      return False
+    for state_in, row in enumerate(tm.trans_table):
+      for trans in row:
+        if not (trans.num_base_steps == 1 and
+                trans.states_last_seen == {state_in: 0} and
+                trans.dir_out in (LEFT, RIGHT, STAY) and
+                0 <= trans.symbol_out < tm.num_symbols and
+                (trans.condition != RUNNING or
+                 0 <= trans.state_out < tm.num_states)):
+          return False
+    return True
+
+  def sim_limited(self, state, start_tape, pos : int, dir : Dir,
+                  max_loops : int, time_limit) -> Transition:
+    """Same as sim_limited() (same checks in the same order and the same
+    Transition result) on the compiled TM."""
+    num_symbols = self.num_symbols
+    index_outs, symbol_outs, dir_outs, pos_deltas, stops = self.tables
+    tape = bytearray(start_tape)
+    size = len(tape)
+    # Last loop each state was seen (keyed by `state * num_symbols`).
+    last_seen = {}
+    index = int(state) * num_symbols
+    num_loops = 0
+    # Last transition (index into self.transs) simulated.
+    cell = None
+    condition = None
+
+    # Brent's loop detection (as in sim_limited). The snapshot tape is an
+    # immutable copy which we only compare when the cheap fields match.
+    # (pos is never -2, so nothing matches until the first snapshot.)
+    old_index = old_dir = old_pos = -2
+    old_tape = None
+    next_config_save = 128
+    # Only check time_limit every TIME_CHECK_LOOPS loops (as in sim_limited).
+    next_time_check = TIME_CHECK_LOOPS
+    next_event = next_config_save
+
+    timed_out = time_limit.timed_out
+    while not timed_out:
+      cell = index + tape[pos]
+      last_seen[index] = num_loops
+      num_loops += 1
+      tape[pos] = symbol_outs[cell]
+      index = index_outs[cell]
+      dir = dir_outs[cell]
+      pos += pos_deltas[cell]
+
+      if (pos == old_pos and index == old_index and dir == old_dir and
+          tape == old_tape):
+        condition = INF_REPEAT
+        condition_details = (pos,)
+        break
+      if num_loops >= next_event:
+        if num_loops >= next_config_save:
+          old_index, old_dir, old_pos = index, dir, pos
+          old_tape = bytes(tape)
+          next_config_save *= 2
+        if num_loops >= next_time_check:
+          timed_out = time_limit.timed_out
+          next_time_check += TIME_CHECK_LOOPS
+        next_event = (next_config_save if next_config_save < next_time_check
+                      else next_time_check)
+
+      if num_loops > max_loops:
+        condition = OVER_STEPS_IN_MACRO
+        condition_details = (num_loops,)
+        break
+
+      if stops[cell]:
+        trans = self.transs[cell]
+        condition = trans.condition
+        condition_details = tuple(trans.condition_details) + (pos,)
+        break
+
+      if not (0 <= pos < size):
+        condition = RUNNING
+        condition_details = tuple()
+        break
+
+    if time_limit.timed_out:
+      condition = TIME_OUT
+      condition_details = tuple()
+
+    if cell is not None:
+      state = self.transs[cell].state_out
+    return Transition(
+      condition=condition, condition_details=condition_details,
+      symbol_out=list(tape), state_out=state, dir_out=dir,
+      num_base_steps=num_loops,
+      states_last_seen={index // num_symbols: step
+                        for index, step in last_seen.items()})
+
+
+def eager_block_trans_table(tm, block_size : int, max_loops : int):
+  """Compute the Transitions for every (block, state, dir) of a Block macro
+  machine over Simple_Machine `tm` at once with numpy.
+
+  Equivalent to calling sim_limited() on each input, but all inputs are
+  simulated in lockstep over dense arrays. Returns a dict keyed like
+  Block_Macro_Machine.trans_table (with tuple blocks) or None if we ran out
+  of time."""
+  num_states, num_symbols = tm.num_states, tm.num_symbols
+  base_ttable = tm.trans_table
+  def ttable_array(attr):
+    return np.array([[getattr(trans, attr) for trans in row]
+                     for row in base_ttable], dtype=np.int64)
+  symbol_outs = ttable_array("symbol_out")
+  state_outs = ttable_array("state_out")
+  dir_outs = ttable_array("dir_out")
+  pos_deltas = np.array([-1, 1, 0])[dir_outs]
+  is_running = np.array([[trans.condition == RUNNING for trans in row]
+                         for row in base_ttable])
+
+  # One lane per (block, state, dir), in that (lexicographic) order.
+  blocks = list(itertools.product(range(num_symbols), repeat=block_size))
+  num_lanes = len(blocks) * num_states * 2
+  tape = np.repeat(np.array(blocks, dtype=np.int64), num_states * 2, axis=0)
+  state = np.tile(np.repeat(np.arange(num_states), 2), len(blocks))
+  dir = np.tile([LEFT, RIGHT], len(blocks) * num_states)
+  pos = np.where(dir == RIGHT, 0, block_size - 1)
+  states_last_seen = np.full((num_lanes, num_states), -1)
+  num_steps = np.zeros(num_lanes, dtype=np.int64)
+  # Final (condition, condition_details) for each lane.
+  results = [None] * num_lanes
+
+  lanes = np.arange(num_lanes)
+  def finish(done, results_done):
+    """Record results for lanes[done] and stop simulating them."""
+    nonlocal lanes, symbol_in, state_in
+    for lane, result in zip(lanes[done].tolist(), results_done):
+      results[lane] = result
+    keep = ~done
+    lanes, symbol_in, state_in = lanes[keep], symbol_in[keep], state_in[keep]
+
+  # Same loop detection (Brent's algorithm) as in sim_limited(). Since all
+  # lanes run in lockstep, they all save their configs on the same steps.
+  old_tape = old_state = old_dir = old_pos = None
+  next_config_save = 128
+  num_loops = 0
+  while lanes.size:
+    if tm.time_limit.timed_out:
+      return None
+    lane_pos = pos[lanes]
+    symbol_in = tape[lanes, lane_pos]
+    state_in = state[lanes]
+    states_last_seen[lanes, state_in] = num_loops
+    tape[lanes, lane_pos] = symbol_outs[state_in, symbol_in]
+    state[lanes] = state_outs[state_in, symbol_in]
+    dir[lanes] = dir_outs[state_in, symbol_in]
+    pos[lanes] += pos_deltas[state_in, symbol_in]
+    num_loops += 1
+    num_steps[lanes] = num_loops
+
+    # Checks are in the same order as sim_limited().
+    if old_tape is not None:
+      done = ((state[lanes] == old_state[lanes]) &
+              (dir[lanes] == old_dir[lanes]) &
+              (pos[lanes] == old_pos[lanes]) &
+              (tape[lanes] == old_tape[lanes]).all(axis=1))
+      finish(done, [(INF_REPEAT, (p,)) for p in pos[lanes[done]].tolist()])
+    if num_loops >= next_config_save:
+      old_tape, old_state = tape.copy(), state.copy()
+      old_dir, old_pos = dir.copy(), pos.copy()
+      next_config_save *= 2
+
+    if num_loops > max_loops:
+      finish(np.ones(lanes.size, dtype=bool),
+             [(OVER_STEPS_IN_MACRO, (num_loops,))] * lanes.size)
+
+    done = ~is_running[state_in, symbol_in]
+    finish(done, [
+      (base_ttable[st][sym].condition,
+       tuple(base_ttable[st][sym].condition_details) + (p,))
+      for st, sym, p in zip(state_in[done].tolist(), symbol_in[done].tolist(),
+                            pos[lanes[done]].tolist())])
+
+    lane_pos = pos[lanes]
+    finish((lane_pos < 0) | (lane_pos >= block_size),
+           [(RUNNING, tuple())] * lanes.size)
+
+  trans_table = {}
+  for lane, (tape_out, state_out, dir_out, steps, last_seen) in enumerate(zip(
+      tape.tolist(), state.tolist(), dir.tolist(), num_steps.tolist(),
+      states_last_seen.tolist())):
+    block_index, state_dir = divmod(lane, num_states * 2)
+    state_in, dir_in = divmod(state_dir, 2)
+    condition, condition_details = results[lane]
+    trans_table[blocks[block_index], state_in, dir_in] = Transition(
+      condition=condition, condition_details=condition_details,
+      symbol_out=tape_out, state_out=Simple_Machine_State(state_out),
+      dir_out=dir_out, num_base_steps=steps,
+      states_last_seen={st: step for st, step in enumerate(last_seen)
+                        if step >= 0})
+  return trans_table
+
+
 class Turing_Machine(object):
   """
   Abstract base for all specific Turing Machines
@@ -287,6 +569,15 @@ class Simple_Machine(Turing_Machine):
     # Note: Simple_Machine ignores dir_in.
     return self.trans_table[state_in][symbol_in]
 
+  def compiled(self) -> Compiled_Machine | None:
+    """Compiled_Machine for this TM or None if it cannot be compiled. Rebuilt
+    whenever trans_table is modified."""
+    if getattr(self, "_compiled_ttable", None) != self.trans_table:
+      self._compiled_ttable = [list(row) for row in self.trans_table]
+      self._compiled = (Compiled_Machine(self)
+                        if Compiled_Machine.can_compile(self) else None)
+    return self._compiled
+
   def ttable_str(self) -> str:
     if self.num_states < 25 and self.num_symbols < 10:
       row_strs = []
@@ -352,10 +643,92 @@ def tm_from_quintuples(quints, states, symbols) -> Simple_Machine:
   return Simple_Machine(ttable, states, symbols)
 
 
-class Macro_Machine(Turing_Machine): pass
+class Macro_Machine(Turing_Machine):
+  # Max base steps when retrying transitions that go over
+  # max_sim_steps_per_symbol (0 to give up right away).
+  retry_sim_steps = 0
+  # Number of such retries and how many of them finished.
+  num_retries = 0
+  num_rescued = 0
+
+  def sim_base(self, state, start_tape, pos : int, dir : Dir) -> Transition:
+    """sim_limited() on base_machine, retrying with retry_sim_steps if it
+    takes more than max_sim_steps_per_symbol steps.
+
+    sim_limited() detects every repeat within the tape segment, so the
+    retry is guaranteed to finish if retry_sim_steps is large compared to
+    the number of configurations of the segment (see max_steps)."""
+    trans = sim_limited(self.base_machine, state=state, start_tape=start_tape,
+                        pos=pos, dir=dir,
+                        max_loops=self.max_sim_steps_per_symbol)
+    if (trans.condition == OVER_STEPS_IN_MACRO and
+        self.retry_sim_steps > self.max_sim_steps_per_symbol):
+      self.num_retries += 1
+      trans = sim_limited(self.base_machine, state=state,
+                          start_tape=start_tape, pos=pos, dir=dir,
+                          max_loops=self.retry_sim_steps)
+      if trans.condition != OVER_STEPS_IN_MACRO:
+        self.num_rescued += 1
+    return trans
+
+def intern_value(table : dict, value, max_size : int):
+  """Return the canonical copy of `value` from `table` (adding it if new).
+  Interned macro symbols and states compare (and hash in dict lookups) by
+  identity first, which is much faster than comparing equal copies."""
+  if len(table) >= max_size:
+    # Only an optimization, so it's safe to start over.
+    table.clear()
+  return table.setdefault(value, value)
+
+class LRU_Trans_Table(collections.OrderedDict):
+  """Lazily evaluated macro transition table which holds at most `max_size`
+  transitions, evicting the least recently used one when full."""
+  def __init__(self, max_size : int):
+    super().__init__()
+    self.max_size = max_size
+    self.num_hits = 0
+    self.num_misses = 0
+    self.num_evictions = 0
+    # Optional persistent cache consulted on misses (see Trans_Cache.attach).
+    self.disk_cache = None
+
+  def lookup(self, args, eval_trans) -> Transition:
+    """Return cached transition for `args` or evaluate (and cache) it via
+    `eval_trans(*args)`."""
+    trans = self.get(args)
+    if trans is not None:
+      self.num_hits += 1
+      self.move_to_end(args)
+      return trans
+    self.num_misses += 1
+    if self.disk_cache is not None:
+      trans = self.disk_cache.get(args)
+      if trans is None:
+        trans = eval_trans(*args)
+        self.disk_cache.put(args, trans)
+    else:
+      trans = eval_trans(*args)
+    if len(self) >= self.max_size:
+      self.popitem(last = False)
+      self.num_evictions += 1
+    self[args] = trans
+    return trans
+
+  def __reduce__(self):
+    # OrderedDict.__reduce__ would call LRU_Trans_Table() without max_size.
+    # The disk cache cannot be pickled (it must be re-attached).
+    state = dict(vars(self), disk_cache = None)
+    return (type(self), (self.max_size,), state, None, iter(self.items()))
+
+  def stats_str(self) -> str:
+    return (f"{len(self):_} cells / hits {self.num_hits:_} / "
+            f"misses {self.num_misses:_} / evictions {self.num_evictions:_}"
+            + (f" / {self.disk_cache.stats_str()}" if self.disk_cache else ""))
 
 class Block_Symbol(tuple):
   """Wrapper for block symbols that defines a concise-printer."""
+  __slots__ = ()
+
   def __repr__(self):
     # TODO: this assumes single digit sub-symbols
     return "".join((str(x) for x in self))
@@ -371,20 +744,24 @@ class OffsetStartState:
 
 class Block_Macro_Machine(Macro_Machine):
   """A derivative Turing Machine which simulates another machine clumping k-symbols together into a block-symbol"""
-  MAX_TTABLE_CELLS = 100000
-
   def __init__(self, base_machine, block_size, offset=None,
-               max_sim_steps_per_symbol=10_000):
+               max_sim_steps_per_symbol=10_000,
+               max_ttable_cells=MAX_TTABLE_CELLS, eager_ttable=False,
+               retry_sim_steps=0):
     assert block_size > 0
     self.block_size = block_size
     self.base_machine = base_machine
     self.num_states = base_machine.num_states
     self.num_symbols = base_machine.num_symbols ** block_size
     # A lazy evaluation hashed macro transition table
-    self.trans_table = {}
+    self.trans_table = LRU_Trans_Table(max_ttable_cells)
+    # Interned Block_Symbols (see intern_value).
+    self.symbols = {}
     self.init_dir = base_machine.init_dir
     # initial symbol is (0, 0, 0, ..., 0) not just 0
-    self.init_symbol = Block_Symbol((base_machine.init_symbol,) * block_size)
+    self.init_symbol = intern_value(
+      self.symbols, Block_Symbol((base_machine.init_symbol,) * block_size),
+      max_ttable_cells)
 
     if offset:
       assert 0 < offset < block_size, offset
@@ -395,10 +772,32 @@ class Block_Macro_Machine(Macro_Machine):
     # Maximum number of base-steps per macro-step evaluation w/o repeat
     # #positions (within block) * #states * #macro_symbols (base symbols ** block_size)
     self.max_steps = block_size * self.num_states * self.num_symbols
-    self.max_cells = Block_Macro_Machine.MAX_TTABLE_CELLS
     self.max_sim_steps_per_symbol = max_sim_steps_per_symbol
+    self.retry_sim_steps = retry_sim_steps
     self.time_limit = base_machine.time_limit
 
+    # Complete precomputed transition table (see eager_block_trans_table).
+    # Empty unless eager_ttable and the table is small enough.
+    self.eager_table = {}
+    if (eager_ttable and np is not None and
+        isinstance(base_machine, Simple_Machine) and
+        self.num_symbols * self.num_states * 2 <= MAX_EAGER_TTABLE_CELLS):
+      self.eager_table = self.convert_eager_table(eager_block_trans_table(
+        base_machine, block_size, max_sim_steps_per_symbol) or {})
+
+  def convert_eager_table(self, eager_table : dict) -> dict:
+    """Convert blocks in eager_block_trans_table() result to Block_Symbols.
+    Transitions which need a retry (see sim_base) are left out so that they
+    are evaluated lazily."""
+    max_size = len(eager_table) + self.trans_table.max_size
+    return {(intern_value(self.symbols, Block_Symbol(block), max_size),
+             Simple_Machine_State(state), dir) :
+            trans.replace(symbol_out = intern_value(
+              self.symbols, Block_Symbol(trans.symbol_out), max_size))
+            for (block, state, dir), trans in eager_table.items()
+            if not (trans.condition == OVER_STEPS_IN_MACRO and
+                    self.retry_sim_steps)}
+
   def eval_symbol(self, macro_symbol):
     return sum(map(self.base_machine.eval_symbol, macro_symbol))
 
@@ -409,11 +808,10 @@ class Block_Macro_Machine(Macro_Machine):
     return self.base_machine.list_base_states()
 
   def get_trans_object(self, *args) -> Transition:
-    if args not in self.trans_table:
-      if len(self.trans_table) >= self.max_cells:
-        self.trans_table.clear()
-      self.trans_table[args] = self.eval_trans(*args)
-    return self.trans_table[args]
+    trans = self.eager_table.get(args)
+    if trans is not None:
+      return trans
+    return self.trans_table.lookup(args, self.eval_trans)
 
   def eval_trans(self, macro_symbol_in, macro_state_in, macro_dir_in):
     # One-off check for dealing with initial offset.
@@ -427,21 +825,36 @@ class Block_Macro_Machine(Macro_Machine):
       assert macro_dir_in == LEFT, macro_dir_in
       pos = self.block_size - 1
 
-    trans = sim_limited(self.base_machine,
-                        state=macro_state_in, dir=macro_dir_in,
-                        start_tape=macro_symbol_in, pos=pos,
-                        max_loops=self.max_sim_steps_per_symbol)
+    trans = self.sim_base(state=macro_state_in, dir=macro_dir_in,
+                          start_tape=macro_symbol_in, pos=pos)
 
     # Convert symbol into the correct format.
-    return trans.replace(symbol_out = Block_Symbol(trans.symbol_out))
+    symbol_out = intern_value(self.symbols, Block_Symbol(trans.symbol_out),
+                              self.trans_table.max_size)
+    return trans.replace(symbol_out = symbol_out)
 
 
-@total_ordering
-class Backsymbol_Macro_Machine_State:
-  def __init__(self, base_state, back_symbol):
+class _Backsymbol_State_Tag:
+  """First element of every Backsymbol_Macro_Machine_State tuple."""
+
+class Backsymbol_Macro_Machine_State(tuple):
+  """(base_state, back_symbol) pair. A tuple so that hashing and comparison
+  (which happen on every macro transition lookup and prover config) are done
+  in C rather than Python.
+
+  The tuple starts with a private tag, so that a state never compares equal
+  to a Block_Symbol (or plain tuple) with the same contents."""
+  __slots__ = ()
+
+  def __new__(cls, base_state, back_symbol):
     assert isinstance(base_state, (Simple_Machine_State, OffsetStartState)), base_state
-    self.base_state  = base_state
-    self.back_symbol = back_symbol
+    return tuple.__new__(cls, (_Backsymbol_State_Tag, base_state, back_symbol))
+
+  def __getnewargs__(self):
+    return (self.base_state, self.back_symbol)
+
+  base_state = property(operator.itemgetter(1))
+  back_symbol = property(operator.itemgetter(2))
 
   def print_with_dir(self, dir):
     if dir == LEFT:
@@ -452,27 +865,16 @@ class Backsymbol_Macro_Machine_State:
   def __repr__(self):
     return "(%s,%s)" % (self.base_state,self.back_symbol)
 
-  # These must be defined so that we can check that two states are equal,
-  # not equal, or use them as keys into a dictionary.
-  def __eq__(self, other):
-    return (self.base_state == other.base_state and
-            self.back_symbol == other.back_symbol)
-
-  # Define __lt__ so that we can sort backstates.
-  def __lt__(self, other):
-    return (self.base_state, self.back_symbol) < (other.base_state, other.back_symbol)
-
-  def __hash__(self):
-    return hash((self.base_state, self.back_symbol))
-
 class Backsymbol_Macro_Machine(Macro_Machine):
-  MAX_TTABLE_CELLS = 100000
-  def __init__(self, base_machine, max_sim_steps_per_symbol = 1_000):
+  def __init__(self, base_machine, max_sim_steps_per_symbol = 1_000,
+               max_ttable_cells = MAX_TTABLE_CELLS, retry_sim_steps = 0):
     self.base_machine = base_machine
     self.num_states = base_machine.num_states
     self.num_symbols = base_machine.num_symbols
     # A lazy evaluation hashed macro transition table
-    self.trans_table = {}
+    self.trans_table = LRU_Trans_Table(max_ttable_cells)
+    # Interned Backsymbol_Macro_Machine_States (see intern_value).
+    self.states = {}
     # States of macro machine are old states and symbol behind state
     self.init_state = Backsymbol_Macro_Machine_State(base_machine.init_state,
                                                      base_machine.init_symbol)
@@ -481,8 +883,8 @@ class Backsymbol_Macro_Machine(Macro_Machine):
     # Maximum number of base-steps per macro-step evaluation w/o repeat
     # #positions (2) * #states * #symbols_in_front * #symbols_behind
     self.max_steps = 2 * self.num_states * self.num_symbols**2
-    self.max_cells = Backsymbol_Macro_Machine.MAX_TTABLE_CELLS
     self.max_sim_steps_per_symbol = max_sim_steps_per_symbol
+    self.retry_sim_steps = retry_sim_steps
     self.time_limit = base_machine.time_limit
 
   def eval_symbol(self, symbol):
@@ -495,11 +897,7 @@ class Backsymbol_Macro_Machine(Macro_Machine):
     return self.base_machine.list_base_states()
 
   def get_trans_object(self, *args) -> Transition:
-    if args not in self.trans_table:
-      if len(self.trans_table) >= self.max_cells:
-        self.trans_table.clear()
-      self.trans_table[args] = self.eval_trans(*args)
-    return self.trans_table[args]
+    return self.trans_table.lookup(args, self.eval_trans)
 
   def eval_trans(self, macro_symbol_in, macro_state_in, macro_dir_in):
     if macro_dir_in == RIGHT:
@@ -510,10 +908,8 @@ class Backsymbol_Macro_Machine(Macro_Machine):
       tape = [macro_symbol_in, macro_state_in.back_symbol]
       pos = 0
 
-    trans = sim_limited(self.base_machine,
-                        state=macro_state_in.base_state, dir=macro_dir_in,
-                        start_tape=tape, pos=pos,
-                        max_loops=self.max_sim_steps_per_symbol)
+    trans = self.sim_base(state=macro_state_in.base_state, dir=macro_dir_in,
+                          start_tape=tape, pos=pos)
 
     # sim_limited just leaves the final tape in `trans.symbol_out`, we
     # need to split out the backsymbol and printed_symbol ourselves.
@@ -528,7 +924,9 @@ class Backsymbol_Macro_Machine(Macro_Machine):
       backsymbol, symbol_out = final_tape
 
     # Update symbol_out and state_out to be backsymbol-style.
-    state_out = Backsymbol_Macro_Machine_State(trans.state_out, backsymbol)
+    state_out = intern_value(
+      self.states, Backsymbol_Macro_Machine_State(trans.state_out, backsymbol),
+      self.trans_table.max_size)
     return trans.replace(symbol_out = symbol_out, state_out = state_out)
 
 
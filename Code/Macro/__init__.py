@@ -39,4 +39,8 @@ Block_Finder
     It runs two passes, first finding the block size that compresses the tape
     best. Then running simulations at various multiples of that size and seeing
     which is the most effective.
+
+Trans_Cache
+    Optional persistent (sqlite) cache of macro machine transitions shared by
+    all runs and processes pointed at the same --trans-cache-dir.
 """
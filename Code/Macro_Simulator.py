@@ -13,7 +13,7 @@ import Halting_Lib
 import IO
 from IO import TM_Record
 import Lin_Recur_Detect
-from Macro import Turing_Machine, Simulator, Block_Finder
+from Macro import Turing_Machine, Simulator, Block_Finder, Reblock, Trans_Cache
 import Reverse_Engineer_Filter
 
 import io_pb2
@@ -48,94 +48,274 @@ def add_option_group(parser):
                    help="Don't try CTL optimization.")
   group.add_option("--no-sim", dest="run_sim", action="store_false", default=True,
                    help="Don't even run Macro/Simulator (ex: only run Lin_Recur).")
+  group.add_option("--adaptive-order", action="store_true", default=False,
+                   help="While enumerating, reorder (and skip) filters based "
+                   "upon how many TMs they decide per second. Results depend "
+                   "on timing, so are not reproducible. [Default: fixed order]")
 
   parser.add_option_group(group)
 
   Simulator.add_option_group(parser)
   Block_Finder.add_option_group(parser)
 
-def run_options(tm_record : TM_Record,
-                options, time_limit=None) -> None:
-  """Run the Accelerated Turing Machine Simulator, running a few simple filters
-  first and using intelligent blockfinding."""
-  base_tm = tm_record.tm()
-  if time_limit is not None:
-    base_tm.time_limit = time_limit
-  ## Test for quickly for infinite machine
-  with IO.Timer(tm_record.proto):
-    if options.reverse_engineer:
-      with IO.Timer(tm_record.proto.filter.reverse_engineer):
-        tm_record.proto.filter.reverse_engineer.tested = True
-        if Reverse_Engineer_Filter.is_infinite(base_tm):
-          tm_record.proto.filter.reverse_engineer.success = True
-          Halting_Lib.set_not_halting(tm_record.proto.status, io_pb2.INF_REVERSE_ENGINEER)
-          # Note: quasihalting result is not computable when using Reverse_Engineer filter.
-          tm_record.proto.status.quasihalt_status.is_decided = False
-          return
-        else:
-          tm_record.proto.filter.reverse_engineer.success = False
-
-    if options.lin_steps:
-      lr_info = tm_record.proto.filter.lin_recur
-      lr_info.parameters.max_steps = options.lin_steps
-      lr_info.parameters.find_min_start_step = options.lin_min
-      Lin_Recur_Detect.filter(base_tm, lr_info, tm_record.proto.status)
-      if tm_record.proto.status.halt_status.is_decided:
-        # Return if halt status has been decided (either inf or halting).
-        # LR filter is meant to detect halting, but it does run the TM for 100
-        # steps or so, so it will detect many halting machines.
-        return
-
-    if options.run_sim:
+class Continuation:
+  """State of a TM right before it reached an undefined transition.
+
+  While enumerating, all children of a TM (which fill in the undefined
+  transition) share the exact same history up to that point, so they can
+  resume from here rather than re-simulating from step 0.
+  """
+  def __init__(self):
+    # Lin_Recur_Detect search state if the TM halted during Lin Recur detection.
+    self.lin_recur = None
+    # Lin Recur result if it ran to completion without halting.
+    self.lin_recur_result = None
+    # Simulator (with undefined_snapshot set) if TM halted during simulate_machine().
+    self.sim = None
+    self.block_size = None
+    self.backsymbol = None
+
+# Filter stages run by run_options() (in default order). "sim" (Block_Finder +
+# Macro Machine simulation) is always run last since it is the most general
+# (and slowest) decider.
+STAGES = ["reverse_engineer", "lin_recur", "ctl", "sim"]
+
+class Adaptive_Order:
+  """Keep track of how many TMs each filter stage decides per CPU second
+  (during an enumeration) and use that to choose the order to run stages in.
+
+  Stages are run in decreasing order of decisions / second (which minimizes
+  expected time per TM if stages are independent). Stages which almost never
+  succeed are skipped, except for 1 in EXPLORE_FREQ TMs (so that we notice if
+  they become useful later in the enumeration).
+  """
+  # Number of times each stage must be tried before we reorder based on it.
+  MIN_TRIALS = 100
+  # Skip stages which decide less than this fraction of the TMs they are run on.
+  MIN_SUCCESS_RATE = 0.001
+  EXPLORE_FREQ = 100
+
+  def __init__(self):
+    self.num_trials = {stage: 0 for stage in STAGES}
+    self.num_successes = {stage: 0 for stage in STAGES}
+    self.time_s = {stage: 0.0 for stage in STAGES}
+    self.num_tms = 0
+
+  def decisions_per_s(self, stage) -> float:
+    return self.num_successes[stage] / max(self.time_s[stage], 1e-9)
+
+  def success_rate(self, stage) -> float:
+    return self.num_successes[stage] / max(self.num_trials[stage], 1)
+
+  def order(self, stages : list[str]) -> list[str]:
+    """Choose order (and subset) of `stages` to run on the next TM."""
+    self.num_tms += 1
+    explore = (self.num_tms % self.EXPLORE_FREQ == 0)
+    return [stage for stage in self._sorted(stages)
+            if explore or not self._is_skipped(stage)]
+
+  def _sorted(self, stages : list[str]) -> list[str]:
+    filters = [stage for stage in stages if stage != "sim"]
+    if all(self.num_trials[stage] >= self.MIN_TRIALS for stage in filters):
+      filters.sort(key=self.decisions_per_s, reverse=True)
+    if "sim" in stages:
+      filters.append("sim")
+    return filters
+
+  def _is_skipped(self, stage : str) -> bool:
+    return (stage != "sim" and self.num_trials[stage] >= self.MIN_TRIALS and
+            self.success_rate(stage) < self.MIN_SUCCESS_RATE)
+
+  def record(self, stage : str, success : bool, time_s : float) -> None:
+    self.num_trials[stage] += 1
+    self.num_successes[stage] += success
+    self.time_s[stage] += time_s
+
+  def __str__(self):
+    stats = []
+    for stage in self._sorted([stage for stage in STAGES if self.num_trials[stage]]):
+      stats.append(f"{stage} {self.decisions_per_s(stage):_.0f}/s "
+                   f"({self.success_rate(stage):.1%} of {self.num_trials[stage]:_})"
+                   + (" [skipped]" if self._is_skipped(stage) else ""))
+    return "Stage order: " + ", ".join(stats)
+
+
+class _Filter_Run:
+  """Filter stages applied to a single TM by run_options(). Each stage method
+  returns True if it decided the TM."""
+
+  def __init__(self, tm_record : TM_Record, options, base_tm, parent,
+               continuation, save_continuation):
+    self.tm_record = tm_record
+    self.options = options
+    self.base_tm = base_tm
+    self.parent = parent
+    self.continuation = continuation
+    self.save_continuation = save_continuation
+    self.block_size = None
+
+  def reverse_engineer(self) -> bool:
+    with IO.Timer(self.tm_record.proto.filter.reverse_engineer):
+      self.tm_record.proto.filter.reverse_engineer.tested = True
+      if Reverse_Engineer_Filter.is_infinite(self.base_tm):
+        self.tm_record.proto.filter.reverse_engineer.success = True
+        Halting_Lib.set_not_halting(self.tm_record.proto.status, io_pb2.INF_REVERSE_ENGINEER)
+        # Note: quasihalting result is not computable when using Reverse_Engineer filter.
+        self.tm_record.proto.status.quasihalt_status.is_decided = False
+        return True
+      else:
+        self.tm_record.proto.filter.reverse_engineer.success = False
+        return False
+
+  def lin_recur(self) -> bool:
+    parent = self.parent
+    lr_info = self.tm_record.proto.filter.lin_recur
+    lr_info.parameters.max_steps = self.options.lin_steps
+    lr_info.parameters.find_min_start_step = self.options.lin_min
+    if parent and parent.lin_recur_result:
+      # Parent ran Lin Recur detection to completion without reaching its
+      # undefined transition, so we would get exactly the same result.
+      lr_info.result.CopyFrom(parent.lin_recur_result)
+      self.continuation.lin_recur_result = parent.lin_recur_result
+    else:
+      self.continuation.lin_recur = Lin_Recur_Detect.filter(
+        self.base_tm, lr_info, self.tm_record.proto.status,
+        resume_from=(parent.lin_recur if parent else None))
+      if not self.tm_record.proto.status.halt_status.is_decided:
+        self.continuation.lin_recur_result = lr_info.result
+    # Return if halt status has been decided (either inf or halting).
+    # LR filter is meant to detect halting, but it does run the TM for 100
+    # steps or so, so it will detect many halting machines.
+    return self.tm_record.proto.status.halt_status.is_decided
+
+  def get_block_size(self) -> int:
+    if self.block_size is None:
       # If no explicit block-size given, use heuristics to find one.
-      block_size = options.block_size
-      if not block_size:
-        if options.max_loops:
-          bf_loops = options.max_loops // 100
+      self.block_size = self.options.block_size
+      if not self.block_size:
+        if self.options.max_loops:
+          bf_loops = self.options.max_loops // 100
         else:
           bf_loops = 100
 
-        bf_info = tm_record.proto.filter.block_finder
+        bf_info = self.tm_record.proto.filter.block_finder
         bf_info.parameters.compression_search_loops = bf_loops
         bf_info.parameters.mult_sim_loops = bf_loops
-        bf_info.parameters.max_block_mult = options.max_block_mult
-        bf_info.parameters.block_mult = options.block_mult
-        bf_info.parameters.max_block_size = options.max_block_size
-        Block_Finder.block_finder(base_tm, options,
+        bf_info.parameters.max_block_mult = self.options.max_block_mult
+        bf_info.parameters.block_mult = self.options.block_mult
+        bf_info.parameters.max_block_size = self.options.max_block_size
+        Block_Finder.block_finder(self.base_tm, self.options,
                                   bf_info.parameters, bf_info.result)
-        block_size = bf_info.result.best_block_size
-
-      machine = base_tm
-      # Do not create a 1-Block Macro-Machine (just use base machine)
-      if block_size != 1:
-        machine = Turing_Machine.Block_Macro_Machine(
-          machine, block_size, max_sim_steps_per_symbol=options.max_steps_per_macro)
-      if options.backsymbol:
-        machine = Turing_Machine.Backsymbol_Macro_Machine(
-          machine, max_sim_steps_per_symbol=options.max_steps_per_macro)
-
-      if options.ctl:
-        if options.max_loops:
-          ctl_init_step = options.max_loops // 10
-        else:
-          ctl_init_step = 1000
+        self.block_size = bf_info.result.best_block_size
+    return self.block_size
 
-        if CTL_Filter.filter(tm_record, "CTL2", block_size, offset=0,
-                             cutoff=ctl_init_step, use_backsymbol=True):
-          return
+  def ctl(self) -> bool:
+    if self.options.max_loops:
+      ctl_init_step = self.options.max_loops // 10
+    else:
+      ctl_init_step = 1000
+
+    return CTL_Filter.filter(self.tm_record, "CTL2", self.get_block_size(),
+                             offset=0, cutoff=ctl_init_step,
+                             use_backsymbol=True)
+
+  def sim(self) -> bool:
+    block_size = self.get_block_size()
+    machine = self.base_tm
+    # Do not create a 1-Block Macro-Machine (just use base machine)
+    if block_size != 1:
+      machine = Turing_Machine.Block_Macro_Machine(
+        machine, block_size, max_sim_steps_per_symbol=self.options.max_steps_per_macro,
+        max_ttable_cells=self.options.max_ttable_cells,
+        eager_ttable=self.options.eager_ttable,
+        retry_sim_steps=self.options.macro_retry_steps)
+    if self.options.backsymbol:
+      machine = Turing_Machine.Backsymbol_Macro_Machine(
+        machine, max_sim_steps_per_symbol=self.options.max_steps_per_macro,
+        max_ttable_cells=self.options.max_ttable_cells,
+        retry_sim_steps=self.options.macro_retry_steps)
+    if self.options.trans_cache_dir:
+      Trans_Cache.attach(machine, self.options.trans_cache_dir,
+                         self.options.trans_cache_max_entries)
+
+    # Finally: Do the actual Macro Machine / Chain simulation.
+    parent = self.parent
+    sim_info = self.tm_record.proto.filter.simulator
+    sim_info.parameters.block_size = block_size
+    sim_info.parameters.has_blocksymbol_macro = self.options.backsymbol
+    resume_sim = None
+    if (parent and parent.sim and parent.block_size == block_size and
+        parent.backsymbol == self.options.backsymbol):
+      resume_sim = parent.sim
+    sim = simulate_machine(machine, self.options, sim_info,
+                           self.tm_record.proto.status, resume_sim=resume_sim,
+                           save_undefined_snapshot=self.save_continuation)
+    # Note: Children resume with their own block size, which will not match
+    # sim.machine after reblocking.
+    if (sim.undefined_snapshot and not sim.num_reblocks and
+        not (sim.prover and sim.prover.reached_undefined)):
+      self.continuation.sim = sim
+      self.continuation.block_size = block_size
+      self.continuation.backsymbol = self.options.backsymbol
+    return self.tm_record.proto.status.halt_status.is_decided
 
-      # Finally: Do the actual Macro Machine / Chain simulation.
-      sim_info = tm_record.proto.filter.simulator
-      sim_info.parameters.block_size = block_size
-      sim_info.parameters.has_blocksymbol_macro = options.backsymbol
-      simulate_machine(machine, options, sim_info, tm_record.proto.status)
+
+def run_options(tm_record : TM_Record,
+                options, time_limit=None,
+                adaptive_order : Adaptive_Order | None = None,
+                save_continuation : bool = False) -> None:
+  """Run the Accelerated Turing Machine Simulator, running a few simple filters
+  first and using intelligent blockfinding.
+
+  Filters are run in the order in STAGES unless `adaptive_order` is given
+  (see Adaptive_Order).
+
+  If `tm_record.continuation` is set (by the parent TM in an enumeration) we
+  resume from there when possible. If `save_continuation` is set and this TM
+  reaches an undefined transition we save our own continuation (for our
+  children) into `tm_record`."""
+  base_tm = tm_record.tm()
+  if time_limit is not None:
+    base_tm.time_limit = time_limit
+  parent = tm_record.continuation
+  continuation = tm_record.continuation = Continuation()
+  run = _Filter_Run(tm_record, options, base_tm, parent, continuation,
+                    save_continuation)
+
+  stages = []
+  if options.reverse_engineer:
+    stages.append("reverse_engineer")
+  if options.lin_steps:
+    stages.append("lin_recur")
+  if options.run_sim:
+    if options.ctl:
+      stages.append("ctl")
+    stages.append("sim")
+  if adaptive_order:
+    stages = adaptive_order.order(stages)
+
+  with IO.Timer(tm_record.proto):
+    for stage in stages:
+      start_time = time.time()
+      success = getattr(run, stage)()
+      if adaptive_order:
+        adaptive_order.record(stage, success, time.time() - start_time)
+      if success:
+        return
 
 def simulate_machine(machine : Turing_Machine.Turing_Machine,
                      options,
                      sim_info : io_pb2.SimulatorInfo,
-                     bb_status : io_pb2.BBStatus) -> None:
+                     bb_status : io_pb2.BBStatus,
+                     resume_sim : Simulator.Simulator | None = None,
+                     save_undefined_snapshot : bool = False,
+                     ) -> Simulator.Simulator:
   """Simulate a TM using the Macro Machine / Chain Simulator.
-  Save the results into `sim_info`."""
+  Save the results into `sim_info`.
+
+  If `resume_sim` is set, continue from its `undefined_snapshot` (see
+  Simulator.resume()) instead of starting from a blank tape. If
+  `save_undefined_snapshot` is set, save one for our own children."""
   with IO.Timer(sim_info.result):
     sim_info.parameters.max_loops = options.max_loops
     sim_info.parameters.max_time_sec = options.time
@@ -143,25 +323,32 @@ def simulate_machine(machine : Turing_Machine.Turing_Machine,
     sim_info.parameters.use_prover = options.prover
     sim_info.parameters.use_limited_rules = options.limited_rules
     sim_info.parameters.use_recursive_rules = options.recursive
+    sim_info.parameters.reblock_loops = options.reblock_loops
 
     # TODO: For now, we can't compute steps when evaluating Linear_Rules
     if options.exp_linear_rules:
       options.compute_steps = False
-    sim = Simulator.Simulator(machine, options)
+    if resume_sim:
+      sim = resume_sim.resume(machine)
+    else:
+      sim = Simulator.Simulator(machine, options)
+    sim.save_undefined_snapshot = save_undefined_snapshot
 
     ## Run the simulator
     try:
       start_time = time.time()
       timeout = False
 
-      while ((sim_info.parameters.max_loops == 0 or
-              sim.num_loops < sim_info.parameters.max_loops) and
-             sim.op_state == Turing_Machine.RUNNING and
-             sim.tape.compressed_size() <= sim_info.parameters.max_tape_blocks):
-        sim.step()
+      if resume_sim:
+        # Finish the step on which the parent reached its undefined transition.
+        sim.macro_step()
         if machine.time_limit.timed_out:
           timeout = True
-          break
+
+      if not timeout:
+        timeout = sim.run_fast(sim_info.parameters.max_loops,
+                               sim_info.parameters.max_tape_blocks,
+                               machine.time_limit)
 
     finally:
       # Set these stats even if timeout (exception) is raised.
@@ -169,6 +356,12 @@ def simulate_machine(machine : Turing_Machine.Turing_Machine,
       sim_info.result.num_macro_moves = sim.num_macro_moves
       sim_info.result.num_chain_moves = sim.num_chain_moves
       sim_info.result.num_rule_moves = sim.num_rule_moves
+      sim_info.result.num_macro_retries = sim.num_macro_retries()
+      sim_info.result.num_block_fallbacks = sim.num_block_fallbacks
+      sim_info.result.num_reblocks = sim.num_reblocks
+      machine_parts = Reblock.split_machine(sim.machine)
+      if machine_parts:
+        sim_info.result.final_block_size = machine_parts[1]
 
       if sim.step_num > 0:
         sim_info.result.log10_num_steps = int(math.log10(sim.step_num))
@@ -239,3 +432,5 @@ def simulate_machine(machine : Turing_Machine.Turing_Machine,
 
     else:
       raise Exception(sim.op_state, tm.ttable_str(), sim)
+
+  return sim
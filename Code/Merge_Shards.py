@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+"""
+Merge the outputs of `Enumerate.py --shard=K/N` runs and verify that they
+cover the TNF tree exactly once.
+
+Checks that no TM appears in more than one shard and (if --serial is given)
+that the shards contain exactly the same TMs and result counts as a serial
+(unsharded) enumeration.
+"""
+
+import argparse
+import collections
+from pathlib import Path
+import sys
+
+import IO
+
+
+def categorize(tm_record) -> str:
+  status = tm_record.proto.status
+  if not status.halt_status.is_decided:
+    return "unknown"
+  elif status.halt_status.is_halting:
+    return "halt"
+  elif status.quasihalt_status.is_quasihalting:
+    return "qhalt"
+  else:
+    return "infinite"
+
+def read_tms(filenames : list[Path], writer=None):
+  """Returns (counts by category, counts by TM) for all records in files."""
+  category_counts = collections.Counter()
+  tm_counts = collections.Counter()
+  for filename in filenames:
+    with IO.Proto.Reader(filename) as reader:
+      for tm_record in reader:
+        category_counts[categorize(tm_record)] += 1
+        tm_counts[tm_record.proto.tm.SerializeToString()] += 1
+        if writer:
+          writer.write_record(tm_record)
+  return category_counts, tm_counts
+
+def print_counts(name : str, category_counts) -> None:
+  total = sum(category_counts.values())
+  print(f"{name}: {total:_} TMs - " +
+        " ".join(f"{category} {category_counts[category]:_}"
+                 for category in ["halt", "qhalt", "infinite", "unknown"]))
+
+def merge_shards(shard_files : list[Path], outfile : Path | None,
+                 serial_file : Path | None) -> bool:
+  """Merge shard_files into outfile (if not None). Returns True if all
+  verifications passed."""
+  if outfile:
+    with IO.Proto.Writer(outfile) as writer:
+      shard_categories, shard_tms = read_tms(shard_files, writer)
+  else:
+    shard_categories, shard_tms = read_tms(shard_files)
+  print_counts("Shards", shard_categories)
+
+  success = True
+  duplicates = [tm for tm, count in shard_tms.items() if count > 1]
+  if duplicates:
+    print(f"ERROR: {len(duplicates):_} TMs appear in multiple shards")
+    success = False
+
+  if serial_file:
+    serial_categories, serial_tms = read_tms([serial_file])
+    print_counts("Serial", serial_categories)
+    if serial_categories != shard_categories:
+      print("ERROR: Shard counts do not match serial counts")
+      success = False
+    missing = serial_tms.keys() - shard_tms.keys()
+    extra = shard_tms.keys() - serial_tms.keys()
+    if missing or extra:
+      print(f"ERROR: {len(missing):_} TMs missing from shards, "
+            f"{len(extra):_} TMs not in serial run")
+      success = False
+
+  if success:
+    print("Verified")
+  return success
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("shard_files", type=Path, nargs="+")
+  parser.add_argument("--outfile", type=Path,
+                      help="Write all records from all shards to this file.")
+  parser.add_argument("--serial", type=Path,
+                      help="Verify shards against this serial enumeration.")
+  args = parser.parse_args()
+
+  if not merge_shards(args.shard_files, args.outfile, args.serial):
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
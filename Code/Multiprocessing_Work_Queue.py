@@ -0,0 +1,163 @@
+"""
+Work_Queue shared between several worker processes on one machine (using the
+multiprocessing library).
+
+Each worker keeps a local LIFO stack of jobs (so that it performs a memory
+efficient depth first search of its own subtree) and only donates jobs to the
+shared queue when some other worker is idle. Finished TM_Records are sent back
+to a single writer process (see `Result_Writer`) which does all output.
+"""
+
+import queue
+
+from IO.TM_Record import TM_Job, TM_Record
+import Work_Queue
+
+
+# Number of finished records to batch up before sending them to the writer.
+RESULT_BATCH_SIZE = 100
+# Seconds to block on the shared queue before re-checking for termination.
+POLL_TIME_S = 0.05
+
+
+def encode_job(job : TM_Job) -> tuple:
+  """Convert TM_Job into a small picklable tuple (dropping the in-memory
+  continuation)."""
+  return (job.ttable, job.num_symbols, job.max_transitions, job.only_reversible)
+
+def decode_job(job : tuple) -> TM_Job:
+  return TM_Job(*job)
+
+
+class Multiprocessing_Work_Queue(Work_Queue.Work_Queue):
+  """Work queue shared by all worker processes.
+
+  All state shared between processes lives in multiprocessing primitives
+  (created by `create()`), so this object can be passed as an argument to
+  multiprocessing.Process.
+  """
+
+  def __init__(self, shared_jobs, num_outstanding, num_waiting, inputs_done):
+    # Jobs available to any worker (encoded with `encode_job`).
+    self.shared_jobs = shared_jobs
+    # Number of jobs pushed which have not finished yet (including jobs
+    # currently being simulated). When this reaches 0 (and all inputs have
+    # been pushed) the enumeration is complete.
+    self.num_outstanding = num_outstanding
+    # Number of workers currently waiting for a job.
+    self.num_waiting = num_waiting
+    # Set once the main process has pushed all input TMs.
+    self.inputs_done = inputs_done
+
+    # Local (per-process) LIFO stack.
+    self.local_queue = []
+    # Are we currently processing a job (popped from this queue)?
+    self.has_current_job = False
+
+    # Stats
+    self.jobs_popped = 0
+    self.jobs_pushed = 0
+    self.jobs_shared = 0
+
+  @staticmethod
+  def create(context):
+    """Create a new queue using multiprocessing context `context`."""
+    return Multiprocessing_Work_Queue(
+      shared_jobs = context.Queue(),
+      num_outstanding = context.Value("q", 0),
+      num_waiting = context.Value("i", 0),
+      inputs_done = context.Event())
+
+  def _add_outstanding(self, delta):
+    with self.num_outstanding.get_lock():
+      self.num_outstanding.value += delta
+
+  def pop_job(self):
+    # Any call to pop_job() means that the previous job (and all pushes of
+    # its children) are finished.
+    if self.has_current_job:
+      self._add_outstanding(-1)
+      self.has_current_job = False
+
+    if self.local_queue:
+      job = self.local_queue.pop()
+    else:
+      job = self._pop_shared()
+      if job is None:
+        return None
+
+    self.has_current_job = True
+    self.jobs_popped += 1
+    return job
+
+  def _pop_shared(self):
+    """Wait until a job is available in the shared queue or all work is done."""
+    with self.num_waiting.get_lock():
+      self.num_waiting.value += 1
+    try:
+      while True:
+        try:
+          return decode_job(self.shared_jobs.get(timeout=POLL_TIME_S))
+        except queue.Empty:
+          if self.inputs_done.is_set() and self.num_outstanding.value == 0:
+            return None
+    finally:
+      with self.num_waiting.get_lock():
+        self.num_waiting.value -= 1
+
+  def push_job(self, job):
+    self.push_jobs([job])
+
+  def push_jobs(self, jobs):
+    self._add_outstanding(len(jobs))
+    self.jobs_pushed += len(jobs)
+    self.local_queue.extend(jobs)
+    self._share_extra()
+
+  def push_shared_job(self, job):
+    """Push job directly into the shared queue (used by main process to
+    distribute input TMs)."""
+    self._add_outstanding(1)
+    self.jobs_pushed += 1
+    self.shared_jobs.put(encode_job(job))
+
+  def _share_extra(self):
+    """If other workers are idle, give them jobs from the bottom of our stack
+    (these are the shallowest and thus likely largest subtrees)."""
+    num_share = min(self.num_waiting.value, len(self.local_queue) - 1)
+    if num_share > 0:
+      for job in self.local_queue[:num_share]:
+        self.shared_jobs.put(encode_job(job))
+      del self.local_queue[:num_share]
+      self.jobs_shared += num_share
+
+  def num_unfinished(self):
+    return self.num_outstanding.value
+
+  def print_stats(self):
+    print(f"Jobs popped {self.jobs_popped:_} / pushed {self.jobs_pushed:_} "
+          f"/ shared {self.jobs_shared:_}")
+
+
+class Result_Writer:
+  """Writer used by worker processes. Sends serialized TMRecords to the writer
+  process (in batches) rather than writing them to disk itself."""
+
+  def __init__(self, result_queue):
+    self.result_queue = result_queue
+    self.batch = []
+
+  def write_record(self, tm_record : TM_Record) -> None:
+    self.batch.append(tm_record.proto.SerializeToString())
+    if len(self.batch) >= RESULT_BATCH_SIZE:
+      self.flush()
+
+  def flush(self):
+    if self.batch:
+      self.result_queue.put(self.batch)
+      self.batch = []
+
+  def close(self):
+    """Flush remaining records and notify the writer that this worker is done."""
+    self.flush()
+    self.result_queue.put(None)
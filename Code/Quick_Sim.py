@@ -5,9 +5,10 @@ formats.
 """
 
 from optparse import OptionParser
+import sys
 import time
 
-from Macro import Turing_Machine, Simulator, Block_Finder
+from Macro import Turing_Machine, Simulator, Block_Finder, Trans_Cache
 import Exp_Int
 import Halting_Lib
 from Halting_Lib import big_int_approx_and_full_str
@@ -15,9 +16,8 @@ import IO
 import io_pb2
 
 
-def run(machine, block_size, back, prover, recursive, options):
-  # Construct Machine (Backsymbol-k-Block-Macro-Machine)
-
+def build_machine(machine, block_size, back, options):
+  """Construct Machine (Backsymbol-k-Block-Macro-Machine)"""
   # If no explicit block-size given, use heuristics to find one.
   if not block_size:
     bf_info = io_pb2.BlockFinderInfo()
@@ -34,46 +34,61 @@ def run(machine, block_size, back, prover, recursive, options):
   if block_size != 1:
     machine = Turing_Machine.Block_Macro_Machine(
       machine, block_size,
-      max_sim_steps_per_symbol=options.max_steps_in_block)
+      max_sim_steps_per_symbol=options.max_steps_in_block,
+      max_ttable_cells=options.max_ttable_cells,
+      eager_ttable=options.eager_ttable,
+      retry_sim_steps=options.macro_retry_steps)
   if back:
     machine = Turing_Machine.Backsymbol_Macro_Machine(machine,
-      max_sim_steps_per_symbol=options.max_steps_in_backsymbol)
+      max_sim_steps_per_symbol=options.max_steps_in_backsymbol,
+      max_ttable_cells=options.max_ttable_cells,
+      retry_sim_steps=options.macro_retry_steps)
+  return machine
 
+def run(machine, block_size, back, prover, recursive, options):
   global sim  # For debugging, especially with --manual
-  sim = Simulator.Simulator(machine, options)
+  if options.restore:
+    # Note: Machine, simulator and prover parameters all come from the
+    # checkpoint. Only the options for how we run and print are new.
+    sim = Simulator.load_checkpoint(options.restore)
+    machine = sim.machine
+    sim.verbose = options.verbose_simulator
+    if sim.prover:
+      sim.prover.verbose = options.verbose_prover
+  else:
+    machine = build_machine(machine, block_size, back, options)
+    sim = Simulator.Simulator(machine, options)
+  if options.trans_cache_dir:
+    Trans_Cache.attach(machine, options.trans_cache_dir,
+                       options.trans_cache_max_entries)
 
   if options.manual:
     return  # Lets us run the machine manually. Must be run as python -i Quick_Sim.py
   try:
-    if options.quiet or options.verbose:  # Note verbose prints inside sim.step()
-      if options.verbose:
-        sim.verbose_print()
-
-      total_loops = 0
-
-      while (sim.op_state == Turing_Machine.RUNNING and
-             (options.max_loops == 0 or total_loops < options.max_loops)):
-        sim.step()
-        total_loops += 1
-    else:
-      total_loops = 0
-      last_print_time = time.time()
+    last_print_time = last_checkpoint_time = time.time()
+    if options.verbose:  # Note verbose prints inside sim.step()
+      sim.verbose_print()
+    elif not options.quiet:
       sim.print_self()
 
-      while (sim.op_state == Turing_Machine.RUNNING and
-             (options.max_loops == 0 or total_loops < options.max_loops)):
-        chunk = 1_000
-        if options.max_loops:
-          chunk = min(chunk, options.max_loops - total_loops)
-        sim.loop_run(chunk)
-        total_loops += chunk
-
-        cur_time = time.time()
-        if cur_time - last_print_time >= options.print_time:
-          sim.print_self()
-          last_print_time = cur_time
-          if options.freeze_prover:
-            sim.prover.frozen = True
+    while (sim.op_state == Turing_Machine.RUNNING and
+           (options.max_loops == 0 or sim.num_loops < options.max_loops)):
+      cutoff = sim.num_loops + 1_000
+      if options.max_loops:
+        cutoff = min(cutoff, options.max_loops)
+      sim.run_fast(cutoff)
+
+      cur_time = time.time()
+      if (not (options.quiet or options.verbose) and
+          cur_time - last_print_time >= options.print_time):
+        sim.print_self()
+        last_print_time = cur_time
+        if options.freeze_prover:
+          sim.prover.frozen = True
+      if (options.checkpoint_every and
+          cur_time - last_checkpoint_time >= options.checkpoint_every):
+        sim.save_checkpoint(options.checkpoint)
+        last_checkpoint_time = time.time()
   finally:
     sim.print_self()
 
@@ -106,20 +121,20 @@ def run(machine, block_size, back, prover, recursive, options):
     print()
     print("Over base steps in a single Macro step")
     print("Info:", sim.op_details)
-  elif total_loops >= options.max_loops:
+  elif sim.num_loops >= options.max_loops:
     print()
-    if total_loops == options.max_loops:
+    if sim.num_loops == options.max_loops:
       print("Maximum number of loops (%d) reached" % (options.max_loops,))
     else:
-      print("Maximum number of loops (%d) exceeded (%d)" % (options.max_loops,total_loops))
+      print("Maximum number of loops (%d) exceeded (%d)" % (options.max_loops,sim.num_loops))
   else:
     print()
     print("Unexpected sim exit condition:", sim.op_state, sim.op_details)
 
-  if options.print_macro_ttable and isinstance(machine, Turing_Machine.Macro_Machine):
+  if options.print_macro_ttable and isinstance(sim.machine, Turing_Machine.Macro_Machine):
     macro_states = set()
     macro_symbols = set()
-    for (macro_symbol_in, macro_state_in, macro_dir_in) in machine.trans_table.keys():
+    for (macro_symbol_in, macro_state_in, macro_dir_in) in sim.machine.trans_table.keys():
       macro_states.add( (macro_state_in, macro_dir_in) )
       macro_symbols.add(macro_symbol_in)
 
@@ -140,8 +155,8 @@ def run(machine, block_size, back, prover, recursive, options):
     num_trans = 0
     for x, (macro_state_in, dir_in) in enumerate(macro_states):
       for y, macro_symbol_in in enumerate(macro_symbols):
-        if (macro_symbol_in, macro_state_in, dir_in) in machine.trans_table:
-          trans = machine.trans_table[(macro_symbol_in, macro_state_in, dir_in)]
+        if (macro_symbol_in, macro_state_in, dir_in) in sim.machine.trans_table:
+          trans = sim.machine.trans_table[(macro_symbol_in, macro_state_in, dir_in)]
           state_dir_out_str = trans.state_out.print_with_dir(trans.dir_out)
           if trans.dir_out == Turing_Machine.RIGHT:
             table[x+1][y+1] = "%s %s> [%d]" % (trans.symbol_out, state_dir_out_str, trans.num_base_steps)
@@ -168,7 +183,7 @@ def table_to_str(table):
   return t_str
 
 
-if __name__ == "__main__":
+def main(args):
   # Parse command line options.
   usage = "usage: %prog [options] tm"
   parser = OptionParser(usage=usage)
@@ -202,6 +217,19 @@ if __name__ == "__main__":
   parser.add_option("--latex", action="store_true",
                     help="Print score in LaTeX math format")
 
+  parser.add_option("--checkpoint", metavar="FILE",
+                    help="Save complete simulator state to FILE every "
+                    "--checkpoint-every seconds (defaults to --restore FILE).")
+  parser.add_option("--checkpoint-every", type=float, default=0.0,
+                    metavar="SECS",
+                    help="How often to save --checkpoint (0 for never). "
+                    "[Default: %default]")
+  parser.add_option("--restore", metavar="FILE",
+                    help="Continue simulation from a --checkpoint FILE "
+                    "(instead of simulating a TM file from the start). "
+                    "Machine, simulator and prover options are all taken "
+                    "from the checkpoint.")
+
   parser.add_option("--manual", action="store_true",
                     help="Don't run any simulation, just set up simulator "
                     "and quit. (Run as python -i Quick_Sim.py to interactively "
@@ -210,7 +238,7 @@ if __name__ == "__main__":
   Simulator.add_option_group(parser)
   Block_Finder.add_option_group(parser)
 
-  (options, args) = parser.parse_args()
+  (options, args) = parser.parse_args(args)
 
   options.verbose_block_finder = True
   if options.quiet:
@@ -222,6 +250,16 @@ if __name__ == "__main__":
 
 
 
+  if options.restore:
+    if args:
+      parser.error("Machine file cannot be used with --restore")
+    if not options.checkpoint:
+      options.checkpoint = options.restore
+    run(None, None, None, None, None, options)
+    return
+
+  if options.checkpoint_every and not options.checkpoint:
+    parser.error("--checkpoint-every requires --checkpoint")
   if len(args) != 1:
     parser.error("Must have at least one argument, machine_file")
   machine = IO.get_tm(args[0])
@@ -236,3 +274,6 @@ if __name__ == "__main__":
 
   run(machine, options.block_size, options.backsymbol, options.prover,
                options.recursive, options)
+
+if __name__ == "__main__":
+  main(sys.argv[1:])
@@ -8,11 +8,11 @@ import argparse
 from pathlib import Path
 
 import IO
-from Macro import Simulator, Turing_Machine
+from Macro import Simulator, Trans_Cache, Turing_Machine
 import Macro_Simulator
 
 
-def re_sim(tm_record):
+def re_sim(tm_record, trans_cache_dir=None, trans_cache_max_entries=None):
   sim_params = tm_record.proto.filter.simulator.parameters
   sim_result = tm_record.proto.filter.simulator.result
 
@@ -21,11 +21,14 @@ def re_sim(tm_record):
     tm = Turing_Machine.Block_Macro_Machine(tm, sim_params.block_size)
   if sim_params.has_blocksymbol_macro:
     tm = Turing_Machine.Backsymbol_Macro_Machine(tm)
+  if trans_cache_dir:
+    Trans_Cache.attach(tm, trans_cache_dir, trans_cache_max_entries)
 
   # TODO: Replace this all with a function that just takes sim_params and produces sim_results?
   options = Simulator.create_default_options()
   options.max_loops = sim_params.max_loops
   options.tape_limit = sim_params.max_tape_blocks
+  options.reblock_loops = sim_params.reblock_loops
   # Time is non-deterministic ... also this is not actually used by simulate_machine
   options.time = 0.0
   options.recursive = True
@@ -48,12 +51,23 @@ def main():
   parser = argparse.ArgumentParser()
   parser.add_argument("infile", type=Path)
   parser.add_argument("outfile", type=Path)
+  parser.add_argument("--trans-cache-dir", type=Path,
+                      help="Persistent macro transition cache directory.")
+  parser.add_argument("--trans-cache-max-entries", type=int,
+                      default=Turing_Machine.TRANS_CACHE_MAX_ENTRIES)
   args = parser.parse_args()
 
   with IO.Proto.Writer(args.outfile) as writer:
     with IO.Reader(args.infile) as reader:
       for tm_record in reader:
-        tm_record = re_sim(tm_record)
+        tm_record = re_sim(tm_record, args.trans_cache_dir,
+                           args.trans_cache_max_entries)
         writer.write_record(tm_record)
 
+  if args.trans_cache_dir:
+    cache = Trans_Cache.open_cache(args.trans_cache_dir,
+                                   args.trans_cache_max_entries)
+    cache.flush()
+    print("Macro transition cache:", cache.stats_str())
+
 main()
@@ -3,27 +3,19 @@
 # Restart_Enumerate.py
 #
 """
-Simple code to restart TM enumeration started be "Enumerate.py".
+Simple code to restart TM enumeration started by "Enumerate.py --checkpoint".
+
+Equivalent to "Enumerate.py --resume checkpoint_filename".
 """
 
 import sys
-import pickle
-from Enumerate import *
-from IO import IO
 
-try:
-  checkpoint_fn = sys.argv[1]
-  output_fn = sys.argv[2]
-except:
-  print("Usage: Restart_Enumerate.py checkpoint_filename output_filename")
-  sys.exit(1)
+import Enumerate
 
-enumerator = pickle.load( open(checkpoint_fn, "r") )
-outfile = open(output_fn, "ab")
-enumerator.io = IO(None, outfile, None)
-enumerator.pout = sys.stdout
 
-# TODO(shawn): Automatically clear duplicate machines?
-outfile.write("\nRestarted - Some machines will be duplicated.\n")
+if __name__ == "__main__":
+  if len(sys.argv) != 2:
+    print("Usage: Restart_Enumerate.py checkpoint_filename")
+    sys.exit(1)
 
-enumerator.continue_enum()
+  Enumerate.main(["--resume", sys.argv[1]])
@@ -1,4 +1,3 @@
-import collections
 import copy
 
 from Macro import Turing_Machine
@@ -19,12 +18,31 @@ def blank_tm_enum(num_states : int, num_symbols : int,
 
 class TM_Enum:
   """Collection of TM (Turing_Machine.Simple_Machine) and enumeration
-  information (config and state needed to perform Brady's TNF algorithm)."""
+  information (config and state needed to perform Brady's TNF algorithm).
+
+  The transition table is stored packed in a bytearray (3 bytes per
+  transition: symbol_out + 1, dir_out, state_out + 1; all 0 for undefined) so
+  that children are cheap to create. The Simple_Machine (and its Transition
+  objects) is only built when `tm` is accessed (Ex: to simulate it)."""
 
   def __init__(self, tm : Turing_Machine.Simple_Machine,
                *, allow_no_halt : bool, max_transitions : int | None = None,
                only_reversible : bool = False):
-    self.tm = tm
+    self.num_states = tm.num_states
+    self.num_symbols = tm.num_symbols
+    self.ttable = bytearray(3 * self.num_states * self.num_symbols)
+    # TNF metadata (maintained incrementally as transitions are set).
+    self.max_state = 0
+    self.max_symbol = 0
+    self.num_def_trans = 0
+    for state in range(self.num_states):
+      for symbol in range(self.num_symbols):
+        trans = tm.get_trans_object(state_in = state, symbol_in = symbol)
+        if trans.condition != Turing_Machine.UNDEFINED:
+          self._set_packed(state, symbol, trans.symbol_out, trans.dir_out,
+                           trans.state_out)
+    self._tm = tm
+
     # Are we enumerating only reversible TMs?
     # https://wiki.bbchallenge.org/wiki/Reversible_Turing_Machine
     self.only_reversible = only_reversible
@@ -36,45 +54,91 @@ class TM_Enum:
     else:
       self.max_transitions = tm.num_states * tm.num_symbols - 1
 
+  @classmethod
+  def from_ttable(cls, ttable : bytes, num_symbols : int,
+                  *, max_transitions : int, only_reversible : bool = False):
+    """Rebuild a TM_Enum from a packed transition table (`self.ttable`).
+    The Simple_Machine is only built if `tm` is accessed."""
+    self = cls.__new__(cls)
+    self.num_states = len(ttable) // (3 * num_symbols)
+    self.num_symbols = num_symbols
+    self.ttable = bytearray(ttable)
+    symbols_out = self.ttable[0::3]
+    self.max_state = max(0, max(self.ttable[2::3]) - 1)
+    self.max_symbol = max(0, max(symbols_out) - 1)
+    self.num_def_trans = len(symbols_out) - symbols_out.count(0)
+    self._tm = None
+    self.only_reversible = only_reversible
+    self.write_once = False
+    self.max_transitions = max_transitions
+    return self
+
+  @property
+  def tm(self) -> Turing_Machine.Simple_Machine:
+    if self._tm is None:
+      quints = []
+      for i, (symbol_out, dir_out, state_out) in enumerate(self.iter_trans_ints()):
+        if symbol_out >= 0:
+          state_in, symbol_in = divmod(i, self.num_symbols)
+          quints.append((state_in, symbol_in, symbol_out, dir_out, state_out))
+      self._tm = Turing_Machine.tm_from_quintuples(
+        quints, states = list(range(self.num_states)),
+        symbols = list(range(self.num_symbols)))
+    return self._tm
+
+  def iter_trans_ints(self):
+    """Yield (symbol_out, dir_out, state_out) for each transition (in
+    state-major order). Undefined transitions are (-1, 0, -1)."""
+    ttable = self.ttable
+    for i in range(0, len(ttable), 3):
+      yield ttable[i] - 1, ttable[i + 1], ttable[i + 2] - 1
+
+  def is_defined(self, state_in, symbol_in) -> bool:
+    return self.ttable[3 * (state_in * self.num_symbols + symbol_in)] != 0
+
+  def _set_packed(self, state_in, symbol_in, symbol_out, dir_out, state_out):
+    i = 3 * (state_in * self.num_symbols + symbol_in)
+    if self.ttable[i] == 0:
+      self.num_def_trans += 1
+    self.ttable[i] = symbol_out + 1
+    self.ttable[i + 1] = dir_out
+    self.ttable[i + 2] = state_out + 1
+    self.max_state = max(self.max_state, state_out)
+    self.max_symbol = max(self.max_symbol, symbol_out)
+
   def set_trans(self, *, state_in, symbol_in, symbol_out, dir_out, state_out):
-    self.tm.trans_table[state_in][symbol_in] = Turing_Machine.Transition(
-      condition=Turing_Machine.RUNNING, condition_details=None,
-      symbol_out = symbol_out, dir_out = dir_out,
-      state_out = Turing_Machine.Simple_Machine_State(state_out),
-      # For base TMs, single trans is always 1 step and only uses one state.
-      num_base_steps=1, states_last_seen={state_in: 0})
+    self._set_packed(state_in, symbol_in, symbol_out, dir_out, state_out)
+    if self._tm is not None:
+      self._tm.trans_table[state_in][symbol_in] = Turing_Machine.Transition(
+        condition=Turing_Machine.RUNNING, condition_details=None,
+        symbol_out = symbol_out, dir_out = dir_out,
+        state_out = Turing_Machine.Simple_Machine_State(state_out),
+        # For base TMs, single trans is always 1 step and only uses one state.
+        num_base_steps=1, states_last_seen={state_in: 0})
 
   def set_halt_trans(self, *, state_in, symbol_in):
     # Standard halt transition is -> 1RZ
-    self.tm.trans_table[state_in][symbol_in] = Turing_Machine.Transition(
-      condition=Turing_Machine.HALT, condition_details=[(symbol_in, state_in)],
-      symbol_out=1, dir_out=Turing_Machine.RIGHT,
-      state_out=Turing_Machine.Simple_Machine_State(-1),  # Halt
-      # For base TMs, single trans is always 1 step and only uses one state.
-      num_base_steps=1, states_last_seen={state_in: 0})
+    self._set_packed(state_in, symbol_in, 1, Turing_Machine.RIGHT, -1)
+    if self._tm is not None:
+      self._tm.trans_table[state_in][symbol_in] = Turing_Machine.Transition(
+        condition=Turing_Machine.HALT, condition_details=[(symbol_in, state_in)],
+        symbol_out=1, dir_out=Turing_Machine.RIGHT,
+        state_out=Turing_Machine.Simple_Machine_State(-1),  # Halt
+        # For base TMs, single trans is always 1 step and only uses one state.
+        num_base_steps=1, states_last_seen={state_in: 0})
+
+  def _child(self, *, state_in, symbol_in, symbol_out, dir_out, state_out):
+    """Create a copy of this TM_Enum with one more transition set."""
+    child = copy.copy(self)
+    child.ttable = bytearray(self.ttable)
+    child._tm = None
+    child._set_packed(state_in, symbol_in, symbol_out, dir_out, state_out)
+    return child
 
   def enum_children(self, state_in, symbol_in):
     """Enumerate TM_Enum "children" of this node by filling in all possible
     values for transition `state_in` `symbol_in` allowed by TNF."""
-    # Evaluate a few metrics
-    max_state = 0
-    max_symbol = 0
-    num_def_trans = 0
-    # state_trans[state_out] = set of all (symbol_out, dir) pairs for this state_out
-    state_dirs = {}
-    state_symbols = collections.defaultdict(set)
-    for state in range(self.tm.num_states):
-      for symbol in range(self.tm.num_symbols):
-        trans = self.tm.get_trans_object(state_in = state,
-                                         symbol_in = symbol)
-        if trans.condition != Turing_Machine.UNDEFINED:
-          num_def_trans += 1
-          max_state = max(max_state, trans.state_out)
-          max_symbol = max(max_symbol, trans.symbol_out)
-          state_dirs[trans.state_out] = trans.dir_out
-          state_symbols[trans.state_out].add(trans.symbol_out)
-
-    if num_def_trans > 0:
+    if self.num_def_trans > 0:
       num_dirs = 2
     else:
       # If no transitions are defined yet, always force first trans to be to
@@ -83,8 +147,18 @@ class TM_Enum:
 
     # TNF algorithm allows us to use up to 1 more than the max state (and symbol)
     # seen so far (maxing out at the total number of states/symbols for this TM).
-    num_states = min(self.tm.num_states, max_state + 2)
-    num_symbols = min(self.tm.num_symbols, max_symbol + 2)
+    num_states = min(self.num_states, self.max_state + 2)
+    num_symbols = min(self.num_symbols, self.max_symbol + 2)
+
+    if self.only_reversible:
+      # state_dirs[state_out] = dir used by all transitions to state_out
+      # state_symbols[state_out] = set of all symbol_outs for this state_out
+      state_dirs = {}
+      state_symbols = {}
+      for symbol_out, dir_out, state_out in self.iter_trans_ints():
+        if symbol_out >= 0:
+          state_dirs[state_out] = dir_out
+          state_symbols.setdefault(state_out, set()).add(symbol_out)
 
     def is_valid_trans(symbol_out, dir_out, state_out) -> bool:
       if self.write_once:
@@ -106,7 +180,7 @@ class TM_Enum:
     # Enumerate
     # If this is the last undefined transition (and not allow_no_halt) then
     # there's nothing left to do, this trans can only be a halting trans.
-    if num_def_trans < self.max_transitions:
+    if self.num_def_trans < self.max_transitions:
       for state_out in range(num_states):
         for symbol_out in range(num_symbols):
           # If only one dir available, default to RIGHT.
@@ -115,8 +189,6 @@ class TM_Enum:
               # Skip adding any transition that is not reversible (if we are only
               # enumerating reversible TMs).
               continue
-            new_tm_enum = copy.deepcopy(self)
-            new_tm_enum.set_trans(
+            yield self._child(
               state_in = state_in, symbol_in = symbol_in,
               symbol_out = symbol_out, dir_out = dir_out, state_out = state_out)
-            yield new_tm_enum
@@ -1,30 +1,37 @@
-import threading
+import time
 
 class TimeLimit:
-    """Explicit timeout token. Created by Enumerate, propagated through the machine hierarchy."""
+    """Explicit timeout token. Created by Enumerate, propagated through the machine hierarchy.
+
+    Implemented as a deadline on the monotonic clock which is checked
+    cooperatively by `timed_out` (rather than a timer thread per TM). Every
+    `timed_out` call reads the clock, so inner simulation loops should only
+    check it every so often (ex: Simulator.TIME_CHECK_LOOPS).
+    """
+
     def __init__(self):
         self._timed_out = False
-        self._timer = None
+        self._deadline = None
 
     def start(self, seconds):
         """Start a timer to expire this limit after `seconds`. No-op if seconds == 0.0."""
         if seconds != 0.0:
-            self._timer = threading.Timer(seconds, self.expire)
-            self._timer.start()
+            self._deadline = time.monotonic() + seconds
 
     def cancel(self):
         """Cancel the timer if one was started."""
-        if self._timer is not None:
-            self._timer.cancel()
+        self._deadline = None
 
     def expire(self):
         self._timed_out = True
 
     @property
     def timed_out(self):
+        if (self._deadline is not None and not self._timed_out and
+                time.monotonic() >= self._deadline):
+            self._timed_out = True
         return self._timed_out
 
     def __deepcopy__(self, memo):
-        # threading.Timer holds a contextvars.Context that can't be pickled in
-        # Python 3.14+. Child TMs get fresh time limits when they're simulated.
+        # Child TMs get fresh time limits when they're simulated.
         return TimeLimit()
@@ -1,4 +1,4 @@
-import sys, time, collections
+import sys, time, collections, os, struct, tempfile
 
 class Work_Queue(object):
   """A generic interface for sending and receiving work."""
@@ -18,10 +18,26 @@ class Work_Queue(object):
     """Add several jobs into the queue at once."""
     raise NotImplemented
 
+  def list_jobs(self):
+    """Return all jobs currently in the queue (without removing them). Pushing
+    them (in this order) into an empty queue recreates this queue."""
+    raise NotImplemented
+
   def print_stats(self):
     """Hook for printing stats, default implementation does nothing."""
     pass
 
+  def close(self):
+    """Release any resources held (ex: temporary files). Remaining jobs are
+    lost. Default implementation does nothing."""
+    pass
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
 class Basic_LIFO_Work_Queue(Work_Queue):
   """Single process implementation of Work_Queue using stack-order."""
 
@@ -49,6 +65,9 @@ class Basic_LIFO_Work_Queue(Work_Queue):
 
     return self.queue.extend(jobs)
 
+  def list_jobs(self):
+    return list(self.queue)
+
   def save_stats(self):
     self.size_queue = len(self.queue)
     self.min_queue  = min(self.min_queue, self.size_queue)
@@ -83,3 +102,173 @@ class Basic_FIFO_Work_Queue(Work_Queue):
 
   def push_jobs(self, jobs):
     return self.queue.extend(jobs)
+
+  def list_jobs(self):
+    return list(self.queue)
+
+
+class Spilling_Work_Queue(Work_Queue):
+  """Single process Work_Queue which only keeps a bounded number of jobs in
+  memory. Extra jobs are spilled to segment files on local disk (using the
+  same length-delimited format as IO.Proto.Writer) and streamed back in order
+  when needed.
+
+  Jobs are converted to/from bytes with the `encode` and `decode` functions.
+  Supports both stack-order (`lifo=True`) and queue-order.
+  """
+
+  def __init__(self, *, lifo, max_in_memory, encode, decode, spill_dir=None):
+    self.lifo = lifo
+    self.max_in_memory = max_in_memory
+    # Number of jobs written to each segment file.
+    self.segment_size = max(max_in_memory // 2, 1)
+    self.encode = encode
+    self.decode = decode
+    self.spill_dir = spill_dir
+    self.temp_dir = None
+
+    # Jobs are ordered (oldest to newest):
+    #   head, segment being read, segments, tail
+    # In LIFO mode only tail and segments are used.
+    self.head = collections.deque()
+    self.reader = None  # (file, segment, num jobs left in file)
+    self.segments = collections.deque()
+    self.tail = []
+    self.num_segments_created = 0
+
+    # Stats
+    self.num_jobs = 0
+    self.max_num_jobs = 0
+    self.num_jobs_spilled = 0
+    self.num_bytes_spilled = 0
+    self.num_jobs_unspilled = 0
+
+  def pop_job(self):
+    if self.lifo:
+      if not self.tail and self.segments:
+        self.tail = list(self._read_segment(self.segments.pop()))
+      if not self.tail:
+        return None
+      job = self.tail.pop()
+
+    else:
+      if self.head:
+        job = self.head.popleft()
+      elif self.reader or self.segments:
+        job = self._read_next()
+      elif self.tail:
+        self.head.extend(self.tail)
+        self.tail = []
+        job = self.head.popleft()
+      else:
+        return None
+
+    self.num_jobs -= 1
+    return job
+
+  def push_job(self, job):
+    self.push_jobs([job])
+
+  def push_jobs(self, jobs):
+    self.tail.extend(jobs)
+    self.num_jobs += len(jobs)
+    self.max_num_jobs = max(self.max_num_jobs, self.num_jobs)
+
+    if self.lifo:
+      # Spill the oldest jobs in memory (bottom of the stack).
+      while len(self.tail) > self.max_in_memory:
+        self.segments.append(self._write_segment(self.tail[:self.segment_size]))
+        del self.tail[:self.segment_size]
+    elif len(self.head) + len(self.tail) > self.max_in_memory:
+      # All spilled jobs are older than the tail, so we must spill all of it.
+      self.segments.append(self._write_segment(self.tail))
+      self.tail = []
+
+  def list_jobs(self):
+    jobs = list(self.head)
+    if self.reader:
+      infile, segment, num_left = self.reader
+      jobs.extend(self._read_segment(segment, delete=False)[-num_left:])
+    for segment in self.segments:
+      jobs.extend(self._read_segment(segment, delete=False))
+    jobs.extend(self.tail)
+    return jobs
+
+  def close(self):
+    """Delete all segment files (and the temporary directory)."""
+    if self.reader:
+      self.reader[0].close()
+      self.reader = None
+    self.segments.clear()
+    if self.temp_dir:
+      self.temp_dir.cleanup()
+      self.temp_dir = None
+
+  def _write_segment(self, jobs):
+    if not self.temp_dir:
+      self.temp_dir = tempfile.TemporaryDirectory(prefix="Work_Queue_",
+                                                  dir=self.spill_dir)
+    filename = os.path.join(self.temp_dir.name,
+                            f"segment_{self.num_segments_created}.pb")
+    self.num_segments_created += 1
+    with open(filename, "wb") as outfile:
+      for job in jobs:
+        job_bytes = self.encode(job)
+        outfile.write(struct.pack("<L", len(job_bytes)))
+        outfile.write(job_bytes)
+        self.num_bytes_spilled += 4 + len(job_bytes)
+    self.num_jobs_spilled += len(jobs)
+    return (filename, len(jobs))
+
+  def _read_job(self, infile):
+    job_len, = struct.unpack("<L", infile.read(4))
+    return self.decode(infile.read(job_len))
+
+  def _read_segment(self, segment, delete=True):
+    """Read all jobs from a segment."""
+    filename, num_jobs = segment
+    with open(filename, "rb") as infile:
+      jobs = [self._read_job(infile) for _ in range(num_jobs)]
+    if delete:
+      os.remove(filename)
+      self.num_jobs_unspilled += num_jobs
+    return jobs
+
+  def _read_next(self):
+    """Read next job from the oldest segment (streaming rather than loading
+    the whole segment into memory)."""
+    if not self.reader:
+      segment = self.segments.popleft()
+      filename, num_jobs = segment
+      self.reader = (open(filename, "rb"), segment, num_jobs)
+    infile, segment, num_left = self.reader
+    job = self._read_job(infile)
+    self.num_jobs_unspilled += 1
+    if num_left > 1:
+      self.reader = (infile, segment, num_left - 1)
+    else:
+      infile.close()
+      os.remove(segment[0])
+      self.reader = None
+    return job
+
+  def get_stats(self):
+    return {
+      "num_jobs": self.num_jobs,
+      "max_num_jobs": self.max_num_jobs,
+      "num_jobs_in_memory": len(self.head) + len(self.tail),
+      "num_segments": len(self.segments) + bool(self.reader),
+      "num_jobs_spilled": self.num_jobs_spilled,
+      "num_jobs_unspilled": self.num_jobs_unspilled,
+      "num_bytes_spilled": self.num_bytes_spilled,
+    }
+
+  def print_stats(self):
+    stats = self.get_stats()
+    print(f"Work queue: {stats['num_jobs']:_} jobs "
+          f"(max {stats['max_num_jobs']:_}, "
+          f"{stats['num_jobs_in_memory']:_} in memory, "
+          f"{stats['num_segments']:_} segments on disk) - "
+          f"spilled {stats['num_jobs_spilled']:_} jobs "
+          f"({stats['num_bytes_spilled']:_} bytes), "
+          f"read back {stats['num_jobs_unspilled']:_}")
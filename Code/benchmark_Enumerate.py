@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: TMs enumerated per second (with default per-TM time limit).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import Enumerate
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--states", type=int, default=3)
+  parser.add_argument("--symbols", type=int, default=2)
+  parser.add_argument("--repeat", type=int, default=3)
+  parser.add_argument("enum_args", nargs="*",
+                      help="Extra arguments passed to Enumerate.py.")
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as temp_dir:
+    outfile = os.path.join(temp_dir, "out.pb")
+    for _ in range(args.repeat):
+      start_time = time.time()
+      Enumerate.main([f"--states={args.states}", f"--symbols={args.symbols}",
+                      f"--outfile={outfile}", "--force", "--no-output"]
+                     + args.enum_args)
+      elapsed_s = time.time() - start_time
+      with Enumerate.IO.Proto.Reader(outfile) as reader:
+        num_tms = sum(1 for _ in reader)
+      print(f"{args.states}x{args.symbols}: {num_tms:_} TMs in {elapsed_s:.2f}s "
+            f"= {num_tms / elapsed_s:_.0f} TMs/s")
+
+if __name__ == "__main__":
+  main()
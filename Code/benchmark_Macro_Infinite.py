@@ -1,25 +1,97 @@
 #!/usr/bin/env python3
+"""
+Benchmark: sim_limited() (the inner loop of macro transitions) on repeating,
+halting and escaping tape segments.
+"""
 
+import argparse
+import itertools
+import os
 import time
 
 import IO
 from Macro import Turing_Machine
 
 
-# Simple repeating machine.
-tm = IO.parse_tm("0RA1LA")
-for block_size in range(2, 21):
-  macro_machine = Turing_Machine.Block_Macro_Machine(tm, block_size)
-  macro_symbol = Turing_Machine.Block_Symbol((0, 1) + (0,) * (block_size - 2))
+MACHINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, "Machines")
 
-  print("Starting", block_size)
-  start_time = time.time()
-  trans = macro_machine.get_trans_object(macro_symbol,
-                                         macro_machine.init_state,
-                                         Turing_Machine.RIGHT)
-  end_time = time.time()
-  print("Finished", block_size, end_time - start_time)
 
-  assert trans.condition in (Turing_Machine.INF_REPEAT,), trans.__dict__
+def repeat_cases():
+  """Simple repeating machine on blocks of increasing size."""
+  tm = IO.parse_tm("0RA1LA")
+  for block_size in range(2, 21):
+    macro_machine = Turing_Machine.Block_Macro_Machine(tm, block_size)
+    macro_symbol = Turing_Machine.Block_Symbol((0, 1) + (0,) * (block_size - 2))
+    yield (f"repeat {block_size}", macro_machine, macro_symbol,
+           Turing_Machine.INF_REPEAT)
 
-print("Success")
+def halt_cases():
+  """Champion machine which halts without leaving a single big block."""
+  tm = IO.load_tm(os.path.join(MACHINES_DIR, "2x4-3932964-2050"), 0)
+  macro_machine = Turing_Machine.Block_Macro_Machine(
+    tm, 4096, offset=2048, max_sim_steps_per_symbol=10_000_000)
+  yield ("halt 2x4", macro_machine, macro_machine.init_symbol,
+         Turing_Machine.HALT)
+
+def escape_cases():
+  """Champion machine running off the end of big blocks."""
+  tm = IO.load_tm(os.path.join(MACHINES_DIR, "5x2-47176870-4098"), 0)
+  for block_size in [1000, 2000, 4000]:
+    macro_machine = Turing_Machine.Block_Macro_Machine(
+      tm, block_size, offset=block_size // 2,
+      max_sim_steps_per_symbol=10_000_000)
+    yield (f"escape {block_size}", macro_machine, macro_machine.init_symbol,
+           Turing_Machine.RUNNING)
+
+def all_trans_cases():
+  """Many short transitions: every transition of a small block size."""
+  tm = IO.load_tm(os.path.join(MACHINES_DIR, "2x4-3932964-2050"), 0)
+  yield "all trans 2x4 block 5", Turing_Machine.Block_Macro_Machine(tm, 5)
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--generic", action="store_true",
+                      help="Do not use Compiled_Machine in sim_limited().")
+  args = parser.parse_args()
+
+  def base_machine(macro_machine):
+    if args.generic:
+      macro_machine.base_machine.compiled = lambda: None
+    return macro_machine
+
+  total_time_s = 0.0
+  for name, macro_machine, macro_symbol, condition in [
+      *repeat_cases(), *halt_cases(), *escape_cases()]:
+    macro_machine = base_machine(macro_machine)
+    start_time = time.time()
+    trans = macro_machine.get_trans_object(macro_symbol,
+                                           macro_machine.init_state,
+                                           Turing_Machine.RIGHT)
+    elapsed_s = time.time() - start_time
+    total_time_s += elapsed_s
+    assert trans.condition == condition, (name, trans.condition)
+    print(f"{name:25s} {elapsed_s:7.3f}s  {trans.num_base_steps:_} steps")
+
+  for name, macro_machine in all_trans_cases():
+    macro_machine = base_machine(macro_machine)
+    base_m = macro_machine.base_machine
+    start_time = time.time()
+    num_trans = 0
+    for cells in itertools.product(range(base_m.num_symbols),
+                                   repeat=macro_machine.block_size):
+      block = Turing_Machine.Block_Symbol(cells)
+      for state in base_m.list_base_states():
+        state = Turing_Machine.Simple_Machine_State(state)
+        for dir in [Turing_Machine.LEFT, Turing_Machine.RIGHT]:
+          macro_machine.eval_trans(block, state, dir)
+          num_trans += 1
+    elapsed_s = time.time() - start_time
+    total_time_s += elapsed_s
+    print(f"{name:25s} {elapsed_s:7.3f}s  {num_trans:_} transitions")
+
+  print(f"{'Total':25s} {total_time_s:7.3f}s")
+
+if __name__ == "__main__":
+  main()
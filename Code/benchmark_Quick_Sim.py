@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Quick_Sim wall time and number of tape copies on champion machines.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from Macro import Tape
+import Quick_Sim
+
+
+MACHINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            os.pardir, "Machines")
+DEFAULT_MACHINES = [
+  "5x2-47176870-4098",
+  "6x2-1",
+  "3x3-e17",
+  "2x5-e704",
+  "4x3-e1426",
+  "6x2-e1762",
+  "6x2-e2879",
+]
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument("machines", nargs="*", default=DEFAULT_MACHINES,
+                      help="Machine files (relative to Machines/).")
+  parser.add_argument("--repeat", type=int, default=1)
+  # All other arguments are passed to Quick_Sim.py
+  args, sim_args = parser.parse_known_args()
+
+  total_time_s = 0.0
+  total_copies = 0
+  for machine in args.machines:
+    for _ in range(args.repeat):
+      Tape.Chain_Tape.num_copies = 0
+      start_time = time.time()
+      with contextlib.redirect_stdout(io.StringIO()):
+        Quick_Sim.main(["--quiet", os.path.join(MACHINES_DIR, machine)]
+                       + sim_args)
+      elapsed_s = time.time() - start_time
+      total_time_s += elapsed_s
+      total_copies += Tape.Chain_Tape.num_copies
+      print(f"{machine:20s} {elapsed_s:7.2f}s  "
+            f"{Tape.Chain_Tape.num_copies:_} tape copies")
+  print(f"{'Total':20s} {total_time_s:7.2f}s  {total_copies:_} tape copies")
+
+if __name__ == "__main__":
+  main()
@@ -334,6 +334,7 @@ class SimulatorParams(google.protobuf.message.Message):
     ONLY_LOG_CONFIGS_AT_EDGE_FIELD_NUMBER: builtins.int
     USE_LIMITED_RULES_FIELD_NUMBER: builtins.int
     USE_RECURSIVE_RULES_FIELD_NUMBER: builtins.int
+    REBLOCK_LOOPS_FIELD_NUMBER: builtins.int
     block_size: builtins.int
     """Macro machine configuration."""
     has_blocksymbol_macro: builtins.bool
@@ -353,6 +354,10 @@ class SimulatorParams(google.protobuf.message.Message):
     """
     use_limited_rules: builtins.bool
     use_recursive_rules: builtins.bool
+    reblock_loops: builtins.int
+    """Check whether to switch block size every this many loops (see
+    --reblock-loops). 0 means never.
+    """
     def __init__(
         self,
         *,
@@ -365,8 +370,9 @@ class SimulatorParams(google.protobuf.message.Message):
         only_log_configs_at_edge: builtins.bool = ...,
         use_limited_rules: builtins.bool = ...,
         use_recursive_rules: builtins.bool = ...,
+        reblock_loops: builtins.int = ...,
     ) -> None: ...
-    def ClearField(self, field_name: typing.Literal["block_size", b"block_size", "has_blocksymbol_macro", b"has_blocksymbol_macro", "max_loops", b"max_loops", "max_tape_blocks", b"max_tape_blocks", "max_time_sec", b"max_time_sec", "only_log_configs_at_edge", b"only_log_configs_at_edge", "use_limited_rules", b"use_limited_rules", "use_prover", b"use_prover", "use_recursive_rules", b"use_recursive_rules"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["block_size", b"block_size", "has_blocksymbol_macro", b"has_blocksymbol_macro", "max_loops", b"max_loops", "max_tape_blocks", b"max_tape_blocks", "max_time_sec", b"max_time_sec", "only_log_configs_at_edge", b"only_log_configs_at_edge", "reblock_loops", b"reblock_loops", "use_limited_rules", b"use_limited_rules", "use_prover", b"use_prover", "use_recursive_rules", b"use_recursive_rules"]) -> None: ...
 
 global___SimulatorParams = SimulatorParams
 
@@ -602,6 +608,10 @@ class SimulatorResult(google.protobuf.message.Message):
     NUM_GEN_RULES_PROVEN_FIELD_NUMBER: builtins.int
     NUM_COLLATZ_RULES_FIELD_NUMBER: builtins.int
     NUM_PROOFS_FAILED_FIELD_NUMBER: builtins.int
+    NUM_MACRO_RETRIES_FIELD_NUMBER: builtins.int
+    NUM_BLOCK_FALLBACKS_FIELD_NUMBER: builtins.int
+    NUM_REBLOCKS_FIELD_NUMBER: builtins.int
+    FINAL_BLOCK_SIZE_FIELD_NUMBER: builtins.int
     elapsed_time_us: builtins.int
     """Stats"""
     num_loops: builtins.int
@@ -627,6 +637,20 @@ class SimulatorResult(google.protobuf.message.Message):
     exponents decreases by more than 1.
     """
     num_proofs_failed: builtins.int
+    num_macro_retries: builtins.int
+    """Number of macro transitions which took more than --max-steps-per-macro
+    base steps, but finished when retried (see --macro-retry-steps).
+    """
+    num_block_fallbacks: builtins.int
+    """Number of times we switched to a smaller block size because a macro
+    transition took too many base steps even after retrying.
+    """
+    num_reblocks: builtins.int
+    """Number of times we switched block size (including block fallbacks)."""
+    final_block_size: builtins.int
+    """Block size in use when the simulation stopped. Differs from
+    SimulatorParams.block_size if we switched block size.
+    """
     @property
     def halt_info(self) -> global___HaltInfo: ...
     @property
@@ -655,9 +679,13 @@ class SimulatorResult(google.protobuf.message.Message):
         num_gen_rules_proven: builtins.int = ...,
         num_collatz_rules: builtins.int = ...,
         num_proofs_failed: builtins.int = ...,
+        num_macro_retries: builtins.int = ...,
+        num_block_fallbacks: builtins.int = ...,
+        num_reblocks: builtins.int = ...,
+        final_block_size: builtins.int = ...,
     ) -> None: ...
     def HasField(self, field_name: typing.Literal["exit_condition", b"exit_condition", "halt_info", b"halt_info", "infinite_info", b"infinite_info", "unknown_info", b"unknown_info"]) -> builtins.bool: ...
-    def ClearField(self, field_name: typing.Literal["elapsed_time_us", b"elapsed_time_us", "exit_condition", b"exit_condition", "halt_info", b"halt_info", "infinite_info", b"infinite_info", "log10_num_steps", b"log10_num_steps", "num_chain_moves", b"num_chain_moves", "num_collatz_rules", b"num_collatz_rules", "num_exponential_rules_proven", b"num_exponential_rules_proven", "num_finite_linear_rules_proven", b"num_finite_linear_rules_proven", "num_gen_rules_proven", b"num_gen_rules_proven", "num_linear_rules_proven", b"num_linear_rules_proven", "num_loops", b"num_loops", "num_macro_moves", b"num_macro_moves", "num_meta_diff_rules_proven", b"num_meta_diff_rules_proven", "num_proofs_failed", b"num_proofs_failed", "num_rule_moves", b"num_rule_moves", "num_rules_proven", b"num_rules_proven", "unknown_info", b"unknown_info"]) -> None: ...
+    def ClearField(self, field_name: typing.Literal["elapsed_time_us", b"elapsed_time_us", "exit_condition", b"exit_condition", "final_block_size", b"final_block_size", "halt_info", b"halt_info", "infinite_info", b"infinite_info", "log10_num_steps", b"log10_num_steps", "num_block_fallbacks", b"num_block_fallbacks", "num_chain_moves", b"num_chain_moves", "num_collatz_rules", b"num_collatz_rules", "num_exponential_rules_proven", b"num_exponential_rules_proven", "num_finite_linear_rules_proven", b"num_finite_linear_rules_proven", "num_gen_rules_proven", b"num_gen_rules_proven", "num_linear_rules_proven", b"num_linear_rules_proven", "num_loops", b"num_loops", "num_macro_moves", b"num_macro_moves", "num_macro_retries", b"num_macro_retries", "num_meta_diff_rules_proven", b"num_meta_diff_rules_proven", "num_proofs_failed", b"num_proofs_failed", "num_reblocks", b"num_reblocks", "num_rule_moves", b"num_rule_moves", "num_rules_proven", b"num_rules_proven", "unknown_info", b"unknown_info"]) -> None: ...
     def WhichOneof(self, oneof_group: typing.Literal["exit_condition", b"exit_condition"]) -> typing.Literal["halt_info", "infinite_info", "unknown_info"] | None: ...
 
 global___SimulatorResult = SimulatorResult
@@ -7,11 +7,13 @@ Unit test for "Enumerate.py".
 """
 
 import Enumerate
+import Merge_Shards
 
 import os
 import subprocess
 import sys
 import unittest
+from unittest import mock
 
 
 regold = False
@@ -54,6 +56,157 @@ class GoldTest(unittest.TestCase):
     # Clean up after ourselves.
     subprocess.call(["rm", "-rf", test_dir])
 
+  def test_workers(self):
+    # Parallel enumeration writes the same records as the serial enumeration
+    # (but in a different order).
+    test_dir = "/tmp/test_Enumerate_workers/"
+    subprocess.call(["rm", "-rf", test_dir])
+    os.makedirs(test_dir)
+    for states, symbols in [(2, 3), (3, 2)]:
+      outfile_pb = os.path.join(test_dir, "out.pb")
+      outfile_txt = os.path.join(test_dir, "out.txt")
+      goldfile = os.path.join(
+          self.root_dir, "Testdata/Enum.%d.%d.out.gold" % (states, symbols))
+      Enumerate.main(["--states=%d" % states,
+                      "--symbols=%d" % symbols,
+                      "--outfile=%s" % outfile_pb,
+                      "--max-loops=10_000",
+                      "--time=0",
+                      "--force",
+                      "--no-output",
+                      "--workers=3",
+                      ])
+      subprocess.call(["python3", "IO_Convert.py", outfile_pb, outfile_txt,
+                       "--outformat=text_old"])
+      with open(goldfile) as f:
+        gold_lines = sorted(f)
+      with open(outfile_txt) as f:
+        out_lines = sorted(f)
+      self.assertEqual(gold_lines, out_lines)
+    subprocess.call(["rm", "-rf", test_dir])
+
+  def test_resume_children(self):
+    # Resuming children from their parent's simulation writes exactly the same
+    # records as simulating each child from scratch.
+    test_dir = "/tmp/test_Enumerate_resume/"
+    subprocess.call(["rm", "-rf", test_dir])
+    os.makedirs(test_dir)
+    outfile_pb = os.path.join(test_dir, "out.pb")
+    # --lin-steps=0 so that most children are resumed in Macro_Simulator.
+    for lin_steps in [0, 127]:
+      outfiles_txt = []
+      for extra_args in [[], ["--no-resume-children"]]:
+        outfile_txt = os.path.join(test_dir, "out%d.txt" % len(outfiles_txt))
+        Enumerate.main(["--states=2",
+                        "--symbols=3",
+                        "--outfile=%s" % outfile_pb,
+                        "--max-loops=10_000",
+                        "--lin-steps=%d" % lin_steps,
+                        "--time=0",
+                        "--force",
+                        "--no-output",
+                        ] + extra_args)
+        subprocess.call(["python3", "IO_Convert.py", outfile_pb, outfile_txt,
+                         "--outformat=text_old"])
+        outfiles_txt.append(outfile_txt)
+      proc = subprocess.run(["diff"] + outfiles_txt)
+      self.assertEqual(0, proc.returncode)
+    subprocess.call(["rm", "-rf", test_dir])
+
+  def test_checkpoint_resume(self):
+    # Kill an enumeration part way through and resume it from the last
+    # checkpoint. Result should be identical to an uninterrupted run.
+    test_dir = "/tmp/test_Enumerate_checkpoint/"
+    subprocess.call(["rm", "-rf", test_dir])
+    os.makedirs(test_dir)
+    outfile_pb = os.path.join(test_dir, "out.pb")
+    outfile_txt = os.path.join(test_dir, "out.txt")
+    checkpoint = os.path.join(test_dir, "out.checkpoint")
+    goldfile = os.path.join(self.root_dir, "Testdata/Enum.3.2.out.gold")
+
+    run_options = Enumerate.Macro_Simulator.run_options
+    num_runs = 0
+    def crashing_run_options(*args):
+      nonlocal num_runs
+      num_runs += 1
+      if num_runs > 1000:
+        raise KeyboardInterrupt
+      return run_options(*args)
+
+    with mock.patch.object(Enumerate.Macro_Simulator, "run_options",
+                           crashing_run_options):
+      with self.assertRaises(KeyboardInterrupt):
+        Enumerate.main(["--states=3",
+                        "--symbols=2",
+                        "--outfile=%s" % outfile_pb,
+                        "--max-loops=10_000",
+                        "--time=0",
+                        "--force",
+                        "--no-output",
+                        "--save-freq=300",
+                        "--checkpoint=%s" % checkpoint,
+                        ])
+    Enumerate.main(["--resume=%s" % checkpoint])
+
+    subprocess.call(["python3", "IO_Convert.py", outfile_pb, outfile_txt,
+                     "--outformat=text_old"])
+    proc = subprocess.run(["diff", goldfile, outfile_txt])
+    self.assertEqual(0, proc.returncode)
+    subprocess.call(["rm", "-rf", test_dir])
+
+  def test_first_pass_time(self):
+    # Deferring TMs which time out in the first pass (and re-running them
+    # with no time limit) writes the same records as the serial enumeration
+    # (but in a different order).
+    test_dir = "/tmp/test_Enumerate_first_pass/"
+    subprocess.call(["rm", "-rf", test_dir])
+    os.makedirs(test_dir)
+    outfile_pb = os.path.join(test_dir, "out.pb")
+    outfile_txt = os.path.join(test_dir, "out.txt")
+    goldfile = os.path.join(self.root_dir, "Testdata/Enum.3.2.out.gold")
+    for extra_args in [["--max-queue-in-memory=4"], ["--workers=3"]]:
+      Enumerate.main(["--states=3",
+                      "--symbols=2",
+                      "--outfile=%s" % outfile_pb,
+                      "--max-loops=10_000",
+                      "--time=0",
+                      "--first-pass-time=0.0001",
+                      "--force",
+                      "--no-output",
+                      ] + extra_args)
+      subprocess.call(["python3", "IO_Convert.py", outfile_pb, outfile_txt,
+                       "--outformat=text_old"])
+      with open(goldfile) as f:
+        gold_lines = sorted(f)
+      with open(outfile_txt) as f:
+        out_lines = sorted(f)
+      self.assertEqual(gold_lines, out_lines, extra_args)
+    subprocess.call(["rm", "-rf", test_dir])
+
+  def test_shards(self):
+    # Union of all shards is exactly the serial enumeration.
+    test_dir = "/tmp/test_Enumerate_shards/"
+    subprocess.call(["rm", "-rf", test_dir])
+    os.makedirs(test_dir)
+    for states, symbols in [(2, 3), (3, 2)]:
+      args = ["--states=%d" % states,
+              "--symbols=%d" % symbols,
+              "--max-loops=10_000",
+              "--time=0",
+              "--force",
+              "--no-output",
+              ]
+      serial_pb = os.path.join(test_dir, "serial.pb")
+      Enumerate.main(args + ["--outfile=%s" % serial_pb])
+      shard_pbs = []
+      for shard in range(3):
+        shard_pbs.append(os.path.join(test_dir, "shard%d.pb" % shard))
+        Enumerate.main(args + ["--outfile=%s" % shard_pbs[-1],
+                               "--shard=%d/3" % shard,
+                               "--shard-depth=3"])
+      self.assertTrue(Merge_Shards.merge_shards(shard_pbs, None, serial_pb))
+    subprocess.call(["rm", "-rf", test_dir])
+
 
 if __name__ == "__main__":
   if "--regold" in sys.argv:
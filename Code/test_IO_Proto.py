@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+"""
+Unit test for "IO/Proto.py".
+"""
+
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import IO
+from IO.TM_Record import TM_Record
+
+
+def make_records(num_records):
+  records = []
+  for i in range(num_records):
+    tm_record = TM_Record(proto = None)
+    tm_record.proto.tm.ttable_str = "1RB1LB_1LA---"
+    tm_record.proto.elapsed_time_us = i
+    records.append(tm_record)
+  return records
+
+
+class BackgroundWriterTest(unittest.TestCase):
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+
+  def tearDown(self):
+    self.temp_dir.cleanup()
+
+  def write(self, writer_class, filename, records):
+    filename = os.path.join(self.temp_dir.name, filename)
+    with writer_class(filename) as writer:
+      for i, tm_record in enumerate(records):
+        writer.write_record(tm_record)
+        if i % 300 == 0:
+          writer.flush()
+    return filename
+
+  def test_same_as_writer(self):
+    records = make_records(1000)
+    for suffix, open_func in [(".pb", open), (".pb.gz", gzip.open)]:
+      expected = self.write(IO.Proto.Writer, "sync" + suffix, records)
+      actual = self.write(IO.Proto.Background_Writer, "bg" + suffix, records)
+      with open_func(expected, "rb") as f:
+        expected_bytes = f.read()
+      with open_func(actual, "rb") as f:
+        self.assertEqual(f.read(), expected_bytes)
+      with IO.Proto.Reader(actual) as reader:
+        self.assertEqual([tm_record.proto.elapsed_time_us
+                          for tm_record in reader], list(range(1000)))
+
+  def test_sync(self):
+    filename = os.path.join(self.temp_dir.name, "out.pb")
+    records = make_records(10)
+    with IO.Proto.Background_Writer(filename) as writer:
+      for tm_record in records:
+        writer.write_record(tm_record)
+      size = writer.sync()
+      self.assertEqual(size, os.path.getsize(filename))
+      self.assertEqual(size, sum(len(IO.Proto.encode_record(tm_record))
+                                 for tm_record in records))
+
+  def test_error(self):
+    filename = os.path.join(self.temp_dir.name, "out.pb")
+    with self.assertRaises(IO.Proto.IO_Error):
+      with IO.Proto.Background_Writer(filename) as writer:
+        with mock.patch.object(writer.outfile, "write",
+                               side_effect=OSError("Disk full")):
+          for tm_record in make_records(1000):
+            writer.write_record(tm_record)
+          writer.sync()
+
+  def test_interrupted_exit(self):
+    # The writer thread is stopped even if the final batch is interrupted.
+    filename = os.path.join(self.temp_dir.name, "out.pb")
+    with mock.patch.object(IO.Proto.Background_Writer, "_put_batch",
+                           side_effect=KeyboardInterrupt):
+      with self.assertRaises(KeyboardInterrupt):
+        with IO.Proto.Background_Writer(filename) as writer:
+          writer.write_record(make_records(1)[0])
+    self.assertFalse(writer.thread.is_alive())
+    self.assertTrue(writer.outfile.closed)
+
+
+if __name__ == "__main__":
+  unittest.main()
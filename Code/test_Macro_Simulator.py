@@ -5,22 +5,48 @@ Unit test for "Macro_Simulator.py"
 
 import Macro_Simulator
 
+import math
 from optparse import OptionParser
 import os
 import sys
+import tempfile
 import unittest
+from unittest import mock
 
+import Direct_Simulator
 import Exp_Int
 import Halting_Lib
 import IO
 from IO import TM_Record
-from Macro import Simulator, Turing_Machine
+from Macro import Block_Finder, Reblock, Simulator, Turing_Machine
 from Macro.Tape import INF
 import TM_Enum
 
 import io_pb2
 
 
+def step_loop(sim, max_loops, max_tape_blocks = math.inf, time_limit = None):
+  """Reference (unoptimized) implementation of Simulator.run_fast()."""
+  while ((max_loops == 0 or sim.num_loops < max_loops) and
+         sim.op_state == Turing_Machine.RUNNING and
+         sim.tape.compressed_size() <= max_tape_blocks):
+    sim.step()
+    if time_limit is not None and time_limit.timed_out:
+      return True
+  return False
+
+def clear_elapsed_times(proto):
+  for field, value in proto.ListFields():
+    if field.name == "elapsed_time_us":
+      proto.ClearField(field.name)
+    elif field.message_type:
+      if field.is_repeated:
+        for sub_proto in value:
+          clear_elapsed_times(sub_proto)
+      else:
+        clear_elapsed_times(value)
+
+
 class MacroSimulatorTest(unittest.TestCase):
   # Test that Macro_Simulator simulates known machines for the correct number
   # of steps and symbols.
@@ -153,6 +179,225 @@ class MacroSimulatorTest(unittest.TestCase):
       self.assertEqual(Halting_Lib.get_big_int(tm_record.proto.status.halt_status.halt_score),
                        expected_score)
 
+  def test_run_fast(self):
+    """Simulator.run_fast() gives identical results to step()."""
+    self.options.max_loops = 10_000
+    for name in ["2x4-3932964-2050", "3x3-e17", "5x2-47176870-4098",
+                 "6x2-1", "6x2-Green", "2x5-e704"]:
+      filename = os.path.join(self.root_dir, "Machines", name)
+      protos = []
+      for run_fast in [Simulator.Simulator.run_fast, step_loop]:
+        tm_record = self.load_tm_record_filename(filename)
+        with mock.patch.object(Simulator.Simulator, "run_fast", run_fast):
+          Macro_Simulator.run_options(tm_record, self.options)
+        clear_elapsed_times(tm_record.proto)
+        protos.append(tm_record.proto)
+      self.assertEqual(protos[0], protos[1], name)
+      self.assertGreater(protos[0].filter.simulator.result.num_loops, 0)
+
+      # Also compare Simulator internals directly.
+      sim_states = []
+      for run_fast in [Simulator.Simulator.run_fast, step_loop]:
+        machine = Turing_Machine.Backsymbol_Macro_Machine(
+          Turing_Machine.Block_Macro_Machine(IO.load_tm(filename, 0), 2))
+        sim = Simulator.Simulator(machine, self.options)
+        run_fast(sim, 2_000)
+        sim_states.append((
+          sim.op_state, sim.num_loops, sim.num_macro_moves,
+          sim.num_chain_moves, sim.num_rule_moves, sim.step_num,
+          sim.steps_from_macro, sim.steps_from_chain, sim.steps_from_rule,
+          sim.states_last_seen, str(sim.state), str(sim.tape)))
+      self.assertEqual(sim_states[0], sim_states[1], name)
+
+  def test_periodic_chain_move(self):
+    """Periodic chain moves give identical results to direct simulation."""
+    self.options.prover = False
+    for name in ["3x3-Bigfoot", "6x2-e21132-Pavel"]:
+      tm = IO.load_tm(os.path.join(self.root_dir, "Machines", name), 0)
+      sim_states = []
+      for max_chain_period, run_fast in [(1, Simulator.Simulator.run_fast),
+                                         (4, Simulator.Simulator.run_fast),
+                                         (4, step_loop)]:
+        self.options.max_chain_period = max_chain_period
+        sim = Simulator.Simulator(
+          Turing_Machine.Backsymbol_Macro_Machine(tm), self.options)
+        run_fast(sim, 3_000)
+        sim_states.append((
+          sim.num_chain_moves, sim.step_num, sim.states_last_seen,
+          str(sim.state), str(sim.tape)))
+      self.assertEqual(sim_states[1], sim_states[2], name)
+      # Periodic chain moves cover more steps in the same number of loops.
+      self.assertGreater(sim_states[1][1], sim_states[0][1], name)
+
+      direct_sim = Direct_Simulator.DirectSimulator(tm)
+      states_last_seen = {}
+      while direct_sim.step_num < sim.step_num:
+        states_last_seen[direct_sim.state] = direct_sim.step_num
+        direct_sim.step()
+      self.assertEqual(sim.states_last_seen, states_last_seen, name)
+      self.assertEqual(sim.get_nonzeros(), direct_sim.tape.count_nonzero(),
+                       name)
+
+  def test_block_finder_workers(self):
+    """Block_Finder gives the same results with parallel mult trials."""
+    for name in ["2x5-e704", "4x3-e1426", "6x2-e2879"]:
+      tm = IO.load_tm(os.path.join(self.root_dir, "Machines", name), 0)
+      results = []
+      for workers in [1, 2]:
+        self.options.block_finder_workers = workers
+        bf_info = io_pb2.BlockFinderInfo()
+        bf_info.parameters.compression_search_loops = 1_000
+        bf_info.parameters.mult_sim_loops = 1_000
+        bf_info.parameters.max_block_mult = 2
+        Block_Finder.block_finder(tm, self.options,
+                                  bf_info.parameters, bf_info.result)
+        bf_info.result.ClearField("elapsed_time_us")
+        results.append(bf_info.result)
+      self.assertEqual(results[0], results[1], name)
+      self.assertGreater(results[0].best_chain_factor, 0, name)
+
+  def test_compression_efficiency(self):
+    """Hash-based compression_efficiency() matches direct comparison."""
+    runs = [(0, 1), (1, 3), (2, 1), (1, 3), (2, 1), (1, 3), (2, 1), (0, 2),
+            (1, 1), (0, 2), (1, 1), (0, 5), (1, 7)]
+    tape = [symbol for symbol, num in runs for _ in range(num)]
+    tape_hashes = Block_Finder.Tape_Hashes(runs)
+    self.assertEqual(tape_hashes.length, len(tape))
+    for k in range(1, len(tape)):
+      expected = len(tape)
+      for i in range(0, len(tape) - 2*k, k):
+        if tape[i:i + k] == tape[i + k:i + 2*k]:
+          expected -= k
+      self.assertEqual(
+        Block_Finder.compression_efficiency(tape_hashes, k), expected, k)
+
+  def test_states_last_seen(self):
+    """Lazily computed states_last_seen matches direct simulation."""
+    self.options.prover = False
+    for name in ["2x4-3932964-2050", "5x2-47176870-4098", "6x2-Green"]:
+      tm = IO.load_tm(os.path.join(self.root_dir, "Machines", name), 0)
+      machine = Turing_Machine.Backsymbol_Macro_Machine(
+        Turing_Machine.Block_Macro_Machine(tm, 2))
+      sim = Simulator.Simulator(machine, self.options)
+      sim.run_fast(300)
+      self.assertGreater(sim.num_chain_moves, 0)
+
+      direct_sim = Direct_Simulator.DirectSimulator(tm)
+      states_last_seen = {}
+      while direct_sim.step_num < sim.step_num:
+        states_last_seen[direct_sim.state] = direct_sim.step_num
+        direct_sim.step()
+      self.assertEqual(sim.states_last_seen, states_last_seen, name)
+
+  def test_over_steps_in_macro(self):
+    """Macro transitions which take too many steps are retried or we fall
+    back to a smaller block size."""
+    self.options.max_loops = 10_000
+    data = [("2x4-3932964-2050", 3932964, 2050),
+            ("5x2-47176870-4098", 47176870, 4098)]
+    # (block_size, max_steps_per_macro, macro_retry_steps, block_fallback)
+    for params in [(None, 3, 100_000, False), (12, 30, 0, True)]:
+      (self.options.block_size, self.options.max_steps_per_macro,
+       self.options.macro_retry_steps, self.options.block_fallback) = params
+      for name, expected_steps, expected_score in data:
+        filename = os.path.join(self.root_dir, "Machines", name)
+        tm_record = self.load_tm_record_filename(filename)
+        Macro_Simulator.run_options(tm_record, self.options)
+        self.assertTrue(tm_record.is_halting(), (name, params))
+        self.assertEqual(Halting_Lib.get_big_int(
+          tm_record.proto.status.halt_status.halt_steps), expected_steps)
+        self.assertEqual(Halting_Lib.get_big_int(
+          tm_record.proto.status.halt_status.halt_score), expected_score)
+        sim_info = tm_record.proto.filter.simulator
+        sim_result = sim_info.result
+        if self.options.macro_retry_steps:
+          self.assertGreater(sim_result.num_macro_retries, 0, name)
+          self.assertEqual(sim_result.final_block_size,
+                           sim_info.parameters.block_size, name)
+        else:
+          self.assertGreater(sim_result.num_block_fallbacks, 0, name)
+          self.assertGreaterEqual(sim_result.num_reblocks,
+                                  sim_result.num_block_fallbacks, name)
+          self.assertLess(sim_result.final_block_size,
+                          sim_info.parameters.block_size, name)
+
+        # Without either, we give up.
+        self.options.macro_retry_steps, self.options.block_fallback = 0, False
+        tm_record = self.load_tm_record_filename(filename)
+        Macro_Simulator.run_options(tm_record, self.options)
+        self.assertTrue(tm_record.proto.filter.simulator.result.unknown_info
+                        .HasField("over_steps_in_macro"), (name, params))
+        self.options.macro_retry_steps, self.options.block_fallback = params[2:]
+
+  def test_reblock(self):
+    """Switching block size mid-simulation preserves halting results."""
+    self.assertEqual(
+      Reblock.reblock_runs([((1, 1, 0), 1), ((0, 1), 10), ((0,), INF)], 2, 0),
+      [[(1, 1), 1], [(0, 0), 1], [(1, 0), 10], [(0, 0), INF]])
+    data = [("2x4-3932964-2050", 3932964, 2050),
+            ("5x2-47176870-4098", 47176870, 4098)]
+    for prover in [False, True]:
+      self.options.prover = prover
+      for name, expected_steps, expected_score in data:
+        tm = IO.load_tm(os.path.join(self.root_dir, "Machines", name), 0)
+        machine = Turing_Machine.Backsymbol_Macro_Machine(
+          Turing_Machine.Block_Macro_Machine(tm, 2))
+        sim = Simulator.Simulator(machine, self.options)
+        block_sizes = [3, 1, 4, 2]
+        while (sim.op_state == Turing_Machine.RUNNING and
+               sim.num_loops < 100_000):
+          sim.run_fast(sim.num_loops + 50)
+          if sim.op_state == Turing_Machine.RUNNING:
+            Reblock.reblock(sim,
+                            block_sizes[sim.num_reblocks % len(block_sizes)])
+        self.assertGreater(sim.num_reblocks, 0, name)
+        self.assertEqual(sim.op_state, Turing_Machine.HALT, name)
+        self.assertEqual(sim.step_num, expected_steps, name)
+        self.assertEqual(sim.get_nonzeros(), expected_score, name)
+
+  def test_prover_copy(self):
+    """Resumed provers share proven rules until one of them adds a rule."""
+    tm = IO.load_tm(os.path.join(self.root_dir, "Machines",
+                                 "2x4-3932964-2050"), 0)
+    machine = Turing_Machine.Backsymbol_Macro_Machine(
+      Turing_Machine.Block_Macro_Machine(tm, 2))
+    sim = Simulator.Simulator(machine, self.options)
+    while sim.op_state == Turing_Machine.RUNNING and not sim.prover.rules:
+      sim.run_fast(sim.num_loops + 100)
+    prover = sim.prover
+    rules = dict(prover.rules)
+    self.assertTrue(rules)
+
+    child = prover.copy(machine)
+    self.assertIs(child.rules, prover.rules)
+    new_config = ("new config",)
+    child.add_rule(next(iter(rules.values())), new_config)
+    self.assertIn(new_config, child.rules)
+    self.assertEqual(prover.rules, rules)
+    self.assertEqual(child.num_rules, prover.num_rules + 1)
+
+  def test_checkpoint(self):
+    """A Simulator restored from a checkpoint continues identically."""
+    checkpoint_filename = os.path.join(tempfile.mkdtemp(), "sim.ckpt")
+    for name in ["3x3-e17", "2x5-e704"]:
+      filename = os.path.join(self.root_dir, "Machines", name)
+      sim_states = []
+      for restore in [False, True]:
+        machine = Turing_Machine.Backsymbol_Macro_Machine(
+          Turing_Machine.Block_Macro_Machine(IO.load_tm(filename, 0), 2))
+        sim = Simulator.Simulator(machine, self.options)
+        sim.run_fast(500)
+        if restore:
+          sim.save_checkpoint(checkpoint_filename)
+          sim = Simulator.load_checkpoint(checkpoint_filename)
+        sim.run_fast(5_000)
+        sim_states.append((
+          sim.op_state, sim.num_loops, sim.step_num, sim.num_rule_moves,
+          sim.prover.num_rules, str(sim.state), str(sim.tape)))
+      self.assertEqual(sim_states[0], sim_states[1], name)
+    self.assertEqual(sim_states[0][0], Turing_Machine.RUNNING)
+    os.remove(checkpoint_filename)
+
   def test_large_halting(self):
     self.options.recursive = True
     self.options.exp_linear_rules = True
@@ -227,6 +472,25 @@ class MacroSimulatorTest(unittest.TestCase):
     self.assertFalse(tm_record.is_halting())
     self.assertEqual(tm_record.proto.status.halt_status.inf_reason,
                      io_pb2.INF_CTL)
+  def test_adaptive_order(self):
+    order = Macro_Simulator.Adaptive_Order()
+    stages = ["reverse_engineer", "lin_recur", "ctl", "sim"]
+    # Default order until all stages have enough stats.
+    self.assertEqual(order.order(stages), stages)
+    for _ in range(order.MIN_TRIALS):
+      order.record("reverse_engineer", False, 0.001)
+      order.record("lin_recur", True, 0.001)
+      order.record("ctl", True, 0.01)
+    # reverse_engineer never succeeds, so is skipped (except when exploring).
+    self.assertEqual(order.order(stages), ["lin_recur", "ctl", "sim"])
+    order.num_tms = order.EXPLORE_FREQ - 1
+    self.assertEqual(order.order(stages),
+                     ["lin_recur", "ctl", "reverse_engineer", "sim"])
+    # Faster stage moves first.
+    for _ in range(10 * order.MIN_TRIALS):
+      order.record("ctl", True, 0.0001)
+    self.assertEqual(order.order(stages), ["ctl", "lin_recur", "sim"])
+
 
 if __name__ == '__main__':
   unittest.main()
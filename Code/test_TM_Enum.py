@@ -5,9 +5,12 @@ Unit test for "TM_Enum.py".
 
 import unittest
 
+from IO import TM_Record
 import TM_Enum
 from Time_Limit import TimeLimit
 
+import io_pb2
+
 
 class TM_EnumTest(unittest.TestCase):
   def test_deepcopy_with_active_timer(self):
@@ -19,7 +22,7 @@ class TM_EnumTest(unittest.TestCase):
     tl.start(600.0)
     try:
       tm_enum.tm.time_limit = tl
-      # enum_children calls copy.deepcopy(self) internally.
+      # Children must not share (or deepcopy) the parent's machine.
       children = list(tm_enum.enum_children(0, 1))
       self.assertGreater(len(children), 0)
     finally:
@@ -34,6 +37,42 @@ class TM_EnumTest(unittest.TestCase):
     self.assertIsNot(children[0], tm_enum)
     self.assertIsNot(children[0].tm, tm_enum.tm)
 
+  def test_children_packed(self):
+    """Children's packed ttable matches the lazily built Simple_Machine."""
+    tm_enum = TM_Enum.blank_tm_enum(3, 2, first_1rb=True, allow_no_halt=False)
+    parent_packed = bytes(tm_enum.ttable)
+    children = list(tm_enum.enum_children(1, 0))
+    # A1 -> 1RB is set, so B0 can use states A-C, symbols 0-1 and both dirs.
+    self.assertEqual(len(children), 12)
+    # Parent is unchanged.
+    self.assertEqual(bytes(tm_enum.ttable), parent_packed)
+    for child in children:
+      self.assertTrue(child.is_defined(1, 0))
+      self.assertEqual(child.num_def_trans, 2)
+      grandchildren = list(child.enum_children(1, 1))
+      child.set_halt_trans(state_in = 1, symbol_in = 1)
+      proto = io_pb2.TuringMachine()
+      TM_Record.write_tm_enum(child, proto)
+      self.assertEqual(proto.ttable_packed, TM_Record._pack_tm(child.tm))
+      for grandchild in grandchildren:
+        TM_Record.write_tm_enum(grandchild, proto)
+        self.assertEqual(proto.ttable_packed,
+                         TM_Record._pack_tm(grandchild.tm))
+
+  def test_job_round_trip(self):
+    """TM_Job (compact work queue entry) rebuilds an identical TM_Enum."""
+    tm_enum = TM_Enum.blank_tm_enum(3, 3, first_1rb=True, allow_no_halt=False)
+    for child in tm_enum.enum_children(1, 0):
+      child.set_halt_trans(state_in = 1, symbol_in = 2)
+      for tme in [tm_enum, child]:
+        new_tme = TM_Record.TM_Job.from_tm_enum(tme).to_record().tm_enum()
+        self.assertEqual(new_tme.ttable, tme.ttable)
+        for attr in ["num_states", "num_symbols", "max_state", "max_symbol",
+                     "num_def_trans", "max_transitions", "only_reversible"]:
+          self.assertEqual(getattr(new_tme, attr), getattr(tme, attr), attr)
+        self.assertEqual(TM_Record._pack_tm(new_tme.tm),
+                         TM_Record._pack_tm(tme.tm))
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+"""
+Unit test for "Macro/Tape.py".
+"""
+
+import unittest
+from optparse import OptionParser
+
+from Macro import Simulator
+from Macro import Tape
+
+
+class ChainTapeTest(unittest.TestCase):
+  def setUp(self):
+    parser = OptionParser()
+    Simulator.add_option_group(parser)
+    self.options, _ = parser.parse_args([])
+
+    self.tape = Tape.Chain_Tape()
+    self.tape.init(0, 1, self.options)
+    for symbol, dir in [(1, 1), (1, 1), (2, 0), (1, 0)]:
+      self.tape.apply_single_move(symbol, dir)
+
+  def test_copy_on_write(self):
+    orig_str = str(self.tape)
+    Tape.Chain_Tape.num_copies = 0
+    copy = self.tape.copy()
+    self.assertEqual(copy, self.tape)
+    # Reading does not copy.
+    self.assertEqual(copy.get_top_symbol(), self.tape.get_top_symbol())
+    self.assertEqual(copy.compressed_size(), self.tape.compressed_size())
+    self.assertEqual(Tape.Chain_Tape.num_copies, 0)
+
+    # Modifying one tape does not affect the other.
+    copy.apply_single_move(2, 1)
+    copy.apply_chain_move(3)
+    self.assertEqual(Tape.Chain_Tape.num_copies, 1)
+    self.assertEqual(str(self.tape), orig_str)
+    self.assertNotEqual(copy, self.tape)
+
+    # The original no longer shares its half-tapes, so does not need to copy.
+    self.tape.apply_single_move(2, 1)
+    self.assertEqual(Tape.Chain_Tape.num_copies, 1)
+
+  def test_discarded_copy(self):
+    # Once an unmodified copy is discarded, the original stops sharing.
+    Tape.Chain_Tape.num_copies = 0
+    copy = self.tape.copy()
+    self.assertIs(copy.get_tape(), self.tape.get_tape())
+    del copy
+    self.tape.apply_single_move(2, 1)
+    self.assertEqual(Tape.Chain_Tape.num_copies, 0)
+
+  def test_direct_access(self):
+    # Editing blocks via `tape` (as the prover does) does not affect copies.
+    orig_str = str(self.tape)
+    copy = self.tape.copy()
+    for block in copy.tape[0] + copy.tape[1]:
+      if block.num != Tape.INF:
+        block.num += 5
+    copy.tape[0] = copy.tape[0][:1]
+    self.assertEqual(str(self.tape), orig_str)
+    self.assertNotEqual(str(copy), orig_str)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,58 @@
+#! /usr/bin/env python3
+"""
+Unit test for "Time_Limit.py".
+"""
+
+import unittest
+from unittest import mock
+
+import Time_Limit
+from Time_Limit import TimeLimit
+
+
+class TimeLimitTest(unittest.TestCase):
+    def setUp(self):
+        # Fake monotonic clock (advanced explicitly by tests).
+        self.now = 1000.0
+        patcher = mock.patch.object(Time_Limit.time, "monotonic",
+                                    lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_deadline(self):
+        time_limit = TimeLimit()
+        time_limit.start(0.05)
+        self.assertFalse(time_limit.timed_out)
+        self.now += 0.049
+        self.assertFalse(time_limit.timed_out)
+        self.now += 0.001
+        self.assertTrue(time_limit.timed_out)
+        # Stays timed out.
+        self.now -= 1.0
+        self.assertTrue(time_limit.timed_out)
+
+    def test_every_check_reads_clock(self):
+        time_limit = TimeLimit()
+        time_limit.start(0.01)
+        self.assertFalse(time_limit.timed_out)
+        self.now += 0.02
+        self.assertTrue(time_limit.timed_out)
+
+    def test_no_limit(self):
+        time_limit = TimeLimit()
+        time_limit.start(0.0)
+        for _ in range(100):
+            self.now += 1.0
+            self.assertFalse(time_limit.timed_out)
+
+    def test_cancel(self):
+        time_limit = TimeLimit()
+        time_limit.start(0.01)
+        time_limit.cancel()
+        for _ in range(100):
+            self.now += 1.0
+            self.assertFalse(time_limit.timed_out)
+
+
+if __name__ == "__main__":
+    unittest.main()
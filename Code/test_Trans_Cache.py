@@ -0,0 +1,103 @@
+#! /usr/bin/env python3
+"""
+Unit test for "Macro/Trans_Cache.py".
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+import IO
+from Macro import Trans_Cache
+from Macro import Turing_Machine
+
+
+def make_machine(ttable_str, block_size):
+  tm = IO.parse_tm(ttable_str)
+  return Turing_Machine.Backsymbol_Macro_Machine(
+    Turing_Machine.Block_Macro_Machine(tm, block_size))
+
+def all_args(machine):
+  base_m = machine.base_machine
+  return [(base_m.init_symbol, machine.init_state, dir)
+          for dir in [Turing_Machine.LEFT, Turing_Machine.RIGHT]]
+
+
+class TransCacheTest(unittest.TestCase):
+  def setUp(self):
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+
+  def tearDown(self):
+    for cache in Trans_Cache._caches.values():
+      cache.close()
+    Trans_Cache._caches.clear()
+    self.temp_dir.cleanup()
+
+  def test_round_trip(self):
+    machine = make_machine("1RB1LB_1LA1RZ", 2)
+    Trans_Cache.attach(machine, self.cache_dir, 1_000)
+    transs = [machine.get_trans_object(*args) for args in all_args(machine)]
+    disk_cache = machine.trans_table.disk_cache
+    self.assertEqual((disk_cache.num_hits, disk_cache.num_misses), (0, 2))
+    Trans_Cache.open_cache(self.cache_dir, 1_000).close()
+    Trans_Cache._caches.clear()
+
+    # A new run gets the transitions from disk.
+    machine = make_machine("1RB1LB_1LA1RZ", 2)
+    Trans_Cache.attach(machine, self.cache_dir, 1_000)
+    for args, trans in zip(all_args(machine), transs):
+      new_trans = machine.get_trans_object(*args)
+      self.assertEqual(new_trans, trans)
+      self.assertIs(new_trans.condition, trans.condition)
+    disk_cache = machine.trans_table.disk_cache
+    self.assertEqual((disk_cache.num_hits, disk_cache.num_misses), (2, 0))
+
+    # But a different TM or block size does not.
+    for ttable_str, block_size in [("1RB1LB_1LA0RZ", 2), ("1RB1LB_1LA1RZ", 3)]:
+      machine = make_machine(ttable_str, block_size)
+      Trans_Cache.attach(machine, self.cache_dir, 1_000)
+      for args in all_args(machine):
+        machine.get_trans_object(*args)
+      self.assertEqual(machine.trans_table.disk_cache.num_hits, 0)
+
+  def test_encoding(self):
+    """Transitions are stored as plain JSON and decode to the same types."""
+    machine = make_machine("1RB1LB_1LA1RZ", 2)
+    Trans_Cache.attach(machine, self.cache_dir, 1_000)
+    transs = [machine.get_trans_object(*args) for args in all_args(machine)]
+    cache = Trans_Cache.open_cache(self.cache_dir, 1_000)
+    cache.flush()
+    for (data,) in cache.db.execute("SELECT trans FROM trans"):
+      self.assertIsInstance(json.loads(data), list)
+    for trans in transs:
+      new_trans = Trans_Cache.decode_trans(Trans_Cache.encode_trans(trans))
+      self.assertEqual(new_trans, trans)
+      self.assertIs(type(new_trans.symbol_out), type(trans.symbol_out))
+      self.assertIs(type(new_trans.state_out), type(trans.state_out))
+      self.assertIs(type(new_trans.state_out.back_symbol),
+                    type(trans.state_out.back_symbol))
+
+  def test_max_entries(self):
+    cache = Trans_Cache.Trans_Cache(
+      os.path.join(self.temp_dir.name, "test.sqlite"), max_entries=10)
+    trans = make_machine("1RB1LB_1LA1RZ", 2).get_trans_object(
+      Turing_Machine.Block_Symbol((0, 0)),
+      Turing_Machine.Backsymbol_Macro_Machine_State(
+        Turing_Machine.Simple_Machine_State(0),
+        Turing_Machine.Block_Symbol((0, 0))),
+      Turing_Machine.RIGHT)
+    for i in range(25):
+      cache.put(b"%d" % i, trans)
+    cache.flush()
+    self.assertEqual(cache.db.execute("SELECT COUNT(*) FROM trans").fetchone(),
+                     (10,))
+    # Oldest entries were evicted.
+    self.assertIsNone(cache.get(b"0"))
+    self.assertEqual(cache.get(b"24"), trans)
+    cache.close()
+
+
+if __name__ == "__main__":
+  unittest.main()
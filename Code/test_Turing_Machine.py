@@ -5,7 +5,13 @@ Unit test for "Macro/Turing_Machine.py"
 
 from Macro import Turing_Machine
 
+import contextlib
+import copy
+import io
+import optparse
 import os
+import pickle
+import random
 import sys
 import unittest
 from Macro.Tape import INF
@@ -52,6 +58,129 @@ class SystemTest(unittest.TestCase):
 
     self.assertEqual(trans.condition, Turing_Machine.INF_REPEAT)
 
+  def test_lru_trans_table(self):
+    """Macro ttable evicts least recently used transitions when full."""
+    tm = IO.parse_tm("1RB1LB_1LA1RZ")
+    macro_machine = Turing_Machine.Block_Macro_Machine(tm, 2,
+                                                       max_ttable_cells=2)
+    trans_table = macro_machine.trans_table
+    args = [(Turing_Machine.Block_Symbol(symbol), tm.init_state, dir)
+            for symbol in [(0, 0), (0, 1), (1, 1)]
+            for dir in [Turing_Machine.LEFT]]
+    trans = [macro_machine.get_trans_object(*arg) for arg in args[:2]]
+    # Use args[0] so that args[1] is least recently used.
+    self.assertIs(macro_machine.get_trans_object(*args[0]), trans[0])
+    macro_machine.get_trans_object(*args[2])
+    self.assertEqual(list(trans_table), [args[0], args[2]])
+    self.assertEqual((trans_table.num_hits, trans_table.num_misses,
+                      trans_table.num_evictions), (1, 3, 1))
+
+  def test_interned_states(self):
+    """Macro symbols/states are interned and behave like value types."""
+    tm = IO.parse_tm("1RB1LB_1LA1RZ")
+    block_m = Turing_Machine.Block_Macro_Machine(tm, 2)
+    macro_machine = Turing_Machine.Backsymbol_Macro_Machine(block_m)
+    state = macro_machine.init_state
+    symbol = macro_machine.init_symbol
+    trans1 = macro_machine.get_trans_object(symbol, state, Turing_Machine.RIGHT)
+    macro_machine.trans_table.clear()
+    trans2 = macro_machine.get_trans_object(symbol, state, Turing_Machine.RIGHT)
+    self.assertIsNot(trans1, trans2)
+    self.assertIs(trans1.state_out, trans2.state_out)
+    self.assertIs(trans1.symbol_out, trans2.symbol_out)
+
+    copy_state = copy.deepcopy(trans1.state_out)
+    self.assertEqual(copy_state, trans1.state_out)
+    self.assertEqual(hash(copy_state), hash(trans1.state_out))
+    self.assertEqual(copy_state.base_state, trans1.state_out.base_state)
+    self.assertEqual(pickle.loads(pickle.dumps(copy_state)), copy_state)
+    self.assertEqual(repr(copy_state), repr(trans1.state_out))
+
+  def test_state_not_equal_to_symbol(self):
+    """Backsymbol states never equal same-content symbols or tuples."""
+    base_state = Turing_Machine.Simple_Machine_State(0)
+    back_symbol = Turing_Machine.Block_Symbol((0, 1))
+    state = Turing_Machine.Backsymbol_Macro_Machine_State(base_state,
+                                                          back_symbol)
+    for other in [Turing_Machine.Block_Symbol((base_state, back_symbol)),
+                  (base_state, back_symbol)]:
+      self.assertNotEqual(state, other)
+      self.assertNotEqual(other, state)
+      self.assertEqual(len({state: 1, other: 2}), 2)
+    self.assertEqual(state, Turing_Machine.Backsymbol_Macro_Machine_State(
+      base_state, Turing_Machine.Block_Symbol((0, 1))))
+
+  @unittest.skipIf(Turing_Machine.np is None, "numpy not installed")
+  def test_eager_ttable(self):
+    """Eagerly computed macro ttable matches lazily computed transitions."""
+    for name, block_size in [("2x2-6-4", 3), ("3x3-e17", 2), ("6x2-1", 4),
+                             ("Lafitte.Papazian.complex", 3)]:
+      tm = self.load_tm(name)
+      lazy_m = Turing_Machine.Block_Macro_Machine(
+        tm, block_size, max_sim_steps_per_symbol=200)
+      eager_m = Turing_Machine.Block_Macro_Machine(
+        tm, block_size, max_sim_steps_per_symbol=200, eager_ttable=True)
+      self.assertEqual(len(eager_m.eager_table),
+                       eager_m.num_symbols * eager_m.num_states * 2)
+      for args, trans in eager_m.eager_table.items():
+        self.assertEqual(trans, lazy_m.get_trans_object(*args), (name, args))
+        self.assertIs(eager_m.get_trans_object(*args), trans)
+      self.assertEqual(len(eager_m.trans_table), 0)
+
+  @unittest.skipIf(Turing_Machine.np is not None, "numpy installed")
+  def test_eager_ttable_requires_numpy(self):
+    """--eager-ttable is an error (rather than silently ignored) without
+    numpy."""
+    parser = optparse.OptionParser()
+    Turing_Machine.add_option_group(parser)
+    with contextlib.redirect_stderr(io.StringIO()):
+      with self.assertRaises(SystemExit):
+        parser.parse_args(["--eager-ttable"])
+    options, _ = parser.parse_args([])
+    self.assertFalse(options.eager_ttable)
+
+  def test_compiled_sim_limited(self):
+    """sim_limited on a Compiled_Machine matches the generic (Transition by
+    Transition) simulation."""
+    rand = random.Random(42)
+    conditions = set()
+    tms = [self.load_tm(name) for name in
+           ["2x2-6-4", "3x3-e17", "6x2-1", "Lafitte.Papazian.complex"]]
+    # Repeats in place.
+    tms.append(IO.parse_tm("0RA1LA"))
+    for tm in tms:
+      self.assertIsNotNone(tm.compiled())
+      generic_tm = copy.copy(tm)
+      generic_tm.compiled = lambda: None
+      for _ in range(300):
+        block_size = rand.randint(1, 8)
+        tape = [rand.randrange(tm.num_symbols) for _ in range(block_size)]
+        state = Turing_Machine.Simple_Machine_State(
+          rand.randrange(tm.num_states))
+        dir = rand.choice([Turing_Machine.LEFT, Turing_Machine.RIGHT])
+        pos = rand.randrange(block_size)
+        max_loops = rand.choice([10, 200, 10_000])
+        trans = Turing_Machine.sim_limited(tm, state, tape, pos, dir, max_loops)
+        self.assertEqual(trans, Turing_Machine.sim_limited(
+          generic_tm, state, tape, pos, dir, max_loops), (tape, state))
+        self.assertIsInstance(trans.state_out,
+                              Turing_Machine.Simple_Machine_State)
+        conditions.add(trans.condition)
+    self.assertEqual(conditions, {
+      Turing_Machine.RUNNING, Turing_Machine.HALT, Turing_Machine.UNDEFINED,
+      Turing_Machine.INF_REPEAT, Turing_Machine.OVER_STEPS_IN_MACRO})
+
+    # Modifying the ttable recompiles.
+    tm = IO.parse_tm("1RB1LB_1LA1RZ")
+    state_b = Turing_Machine.Simple_Machine_State(1)
+    self.assertEqual(Turing_Machine.sim_limited(
+      tm, state_b, [1, 1], 0, Turing_Machine.RIGHT, 1_000).condition,
+      Turing_Machine.HALT)
+    tm.trans_table[1][1] = tm.trans_table[1][0]
+    self.assertEqual(Turing_Machine.sim_limited(
+      tm, state_b, [1, 1], 0, Turing_Machine.RIGHT, 1_000).condition,
+      Turing_Machine.RUNNING)
+
   def test_machine_ttable_to_str(self):
     self.assertEqual(Turing_Machine.machine_ttable_to_str(self.load_tm("2x2-6-4")),
                      """
@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+"""
+Unit test for "Work_Queue.py".
+"""
+
+import collections
+import os
+import random
+import unittest
+
+import Work_Queue
+
+
+def encode(job : int) -> bytes:
+  return str(job).encode()
+
+def decode(job_bytes : bytes) -> int:
+  return int(job_bytes)
+
+
+class SpillingWorkQueueTest(unittest.TestCase):
+  def check_order(self, lifo):
+    """Compare against a simple in-memory queue for random push/pops."""
+    rand = random.Random(42)
+    queue = Work_Queue.Spilling_Work_Queue(
+      lifo = lifo, max_in_memory = 8, encode = encode, decode = decode)
+    self.addCleanup(queue.close)
+    expected = collections.deque()
+    next_job = 0
+    for _ in range(2000):
+      if rand.random() < 0.55:
+        jobs = list(range(next_job, next_job + rand.randrange(1, 6)))
+        next_job += len(jobs)
+        queue.push_jobs(jobs)
+        expected.extend(jobs)
+      else:
+        if not expected:
+          expected_job = None
+        elif lifo:
+          expected_job = expected.pop()
+        else:
+          expected_job = expected.popleft()
+        self.assertEqual(queue.pop_job(), expected_job)
+      self.assertEqual(queue.get_stats()["num_jobs"], len(expected))
+      self.assertLessEqual(queue.get_stats()["num_jobs_in_memory"], 8 + 5)
+
+    self.assertEqual(queue.list_jobs(), list(expected))
+    self.assertGreater(queue.get_stats()["num_jobs_spilled"], 0)
+    while expected:
+      self.assertEqual(queue.pop_job(),
+                       expected.pop() if lifo else expected.popleft())
+    self.assertIsNone(queue.pop_job())
+
+  def test_lifo(self):
+    self.check_order(lifo = True)
+
+  def test_fifo(self):
+    self.check_order(lifo = False)
+
+  def test_close(self):
+    with Work_Queue.Spilling_Work_Queue(
+        lifo = False, max_in_memory = 2, encode = encode,
+        decode = decode) as queue:
+      queue.push_jobs(list(range(10)))
+      self.assertEqual(queue.pop_job(), 0)  # Opens a segment file.
+      temp_dir = queue.temp_dir.name
+      self.assertTrue(os.listdir(temp_dir))
+    self.assertFalse(os.path.exists(temp_dir))
+
+
+if __name__ == "__main__":
+  unittest.main()